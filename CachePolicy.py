@@ -0,0 +1,246 @@
+"""Budgets, eviction policies and counters for the query caches.
+
+`InventoryManager` caches SKU lists per prefix (`PrefixCacheTrie`) and per
+category (`BoundedCache`). Without a budget both grow with every distinct
+key ever queried. A `CacheLedger` tracks the entries of one cache and their
+approximate sizes, and picks victims when a budget is exceeded:
+
+- `max_entries` bounds the number of cached keys,
+- `max_bytes` bounds the summed size of the cached lists (`sys.getsizeof`
+  of each list; the SKU strings themselves are shared with the inventory
+  and are not counted).
+
+Policies:
+
+- `"lru"`: evict the least recently used key.
+- `"lfu"`: evict the least frequently used key (ties by recency). Counts
+  live in frequency buckets, so hits, inserts and evictions are O(1).
+
+Every cache counts hits, misses, evictions and invalidations in a
+`CacheStats`, so budgets can be sized against measured hit rates.
+"""
+
+import sys
+from collections import OrderedDict
+from contextlib import nullcontext
+
+
+class CacheStats:
+    """Running counters of one cache."""
+
+    __slots__ = ("hits", "misses", "evictions", "invalidations", "updates")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # entries patched in place by a write-through cache
+        self.updates = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "invalidations": self.invalidations, "updates": self.updates, "hit_rate": self.hit_rate}
+
+    def __repr__(self):
+        return (f"CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions}, "
+                f"invalidations={self.invalidations}, updates={self.updates})")
+
+
+class LRUPolicy:
+    def __init__(self):
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def add(self, key: str):
+        self._order[key] = None
+
+    def touch(self, key: str):
+        self._order.move_to_end(key)
+
+    def discard(self, key: str):
+        self._order.pop(key, None)
+
+    def victim(self) -> str:
+        return next(iter(self._order))
+
+    def clear(self):
+        self._order.clear()
+
+
+class LFUPolicy:
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        # frequency -> keys with that count, least recently used first
+        self._buckets: dict[int, OrderedDict[str, None]] = {}
+        self._min_count = 0
+
+    def _unlink(self, key: str, count: int):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def add(self, key: str):
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def touch(self, key: str):
+        count = self._counts[key]
+        self._unlink(key, count)
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+        if self._min_count == count and count not in self._buckets:
+            self._min_count = count + 1
+
+    def discard(self, key: str):
+        count = self._counts.pop(key, None)
+        if count is not None:
+            self._unlink(key, count)
+
+    def victim(self) -> str:
+        # a discard (invalidation) can empty the lowest bucket
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self):
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+
+POLICIES = {"lru": LRUPolicy, "lfu": LFUPolicy}
+
+
+class CacheLedger:
+    """Entry sizes, budget and eviction order of one cache.
+
+    The cache owns the values; the ledger only says which keys to drop.
+    With neither budget set nothing is ever evicted.
+    """
+
+    def __init__(self, max_entries: int | None = None, max_bytes: int | None = None, policy: str = "lru"):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown cache policy {policy!r}; use one of {', '.join(POLICIES)}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = POLICIES[policy]()
+        self.stats = CacheStats()
+        self._sizes: dict[str, int] = {}
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key) -> bool:
+        return key in self._sizes
+
+    def hit(self, key: str):
+        self.stats.hits += 1
+        self.policy.touch(key)
+
+    def miss(self):
+        self.stats.misses += 1
+
+    def admit(self, key: str, value) -> list[str]:
+        """Record a newly stored `key` and return the keys to evict.
+
+        The new key may itself be returned when it alone exceeds `max_bytes`.
+        """
+        if key in self._sizes:
+            self._forget(key)
+        size = sys.getsizeof(value)
+        self._sizes[key] = size
+        self.bytes += size
+        self.policy.add(key)
+        return self._over_budget()
+
+    def _over_budget(self) -> list[str]:
+        victims = []
+        while self._sizes and ((self.max_entries is not None and len(self._sizes) > self.max_entries)
+                               or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            victim = self.policy.victim()
+            self._forget(victim)
+            victims.append(victim)
+        self.stats.evictions += len(victims)
+        return victims
+
+    def resize(self, key: str, value) -> list[str]:
+        """Re-measure an entry whose value changed in place; return keys to evict."""
+        if key not in self._sizes:
+            return []
+        size = sys.getsizeof(value)
+        self.bytes += size - self._sizes[key]
+        self._sizes[key] = size
+        return self._over_budget()
+
+    def invalidate(self, key: str):
+        """Forget `key` because its value went stale."""
+        if key in self._sizes:
+            self._forget(key)
+            self.stats.invalidations += 1
+
+    def _forget(self, key: str):
+        self.bytes -= self._sizes.pop(key)
+        self.policy.discard(key)
+
+    def clear(self):
+        """Forget every entry; the counters keep running."""
+        self._sizes.clear()
+        self.bytes = 0
+        self.policy.clear()
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._sizes), "bytes": self.bytes, **self.stats.as_dict()}
+
+
+class BoundedCache:
+    """Dict-like cache of lists with a `CacheLedger` budget (the category cache)."""
+
+    def __init__(self, max_entries: int | None = None, max_bytes: int | None = None, policy: str = "lru"):
+        self._values: dict = {}
+        self.ledger = CacheLedger(max_entries, max_bytes, policy)
+        # hits reorder the ledger, so concurrent readers need a real lock here
+        self.lock = nullcontext()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def get(self, key, default=None):
+        with self.lock:
+            value = self._values.get(key)
+            if value is None:
+                self.ledger.miss()
+                return default
+            self.ledger.hit(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self._values[key] = value
+            for victim in self.ledger.admit(key, value):
+                del self._values[victim]
+
+    def pop(self, key, default=None):
+        """Drop a stale entry (counted as an invalidation)."""
+        with self.lock:
+            self.ledger.invalidate(key)
+            return self._values.pop(key, default)
+
+    def clear(self):
+        with self.lock:
+            self._values.clear()
+            self.ledger.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.ledger.stats
@@ -0,0 +1,201 @@
+"""Streaming CSV / JSONL catalog importer.
+
+    report = import_catalog(inventory, "catalog.csv", processes=4)
+
+Both formats carry the `Product` fields `sku, name, price, quantity,
+category`: CSV as a header row plus one row per product, JSONL as one JSON
+object per line. The file is read in chunks of `chunk_size` rows. Each chunk
+is parsed and validated, optionally in a pool of worker processes, and the
+resulting products are streamed straight into `InventoryManager.bulk_load`,
+which indexes them as they arrive. Only a bounded number of chunks is in
+flight at any time, so memory holds the inventory plus a few chunks, never
+a second full copy of the catalog.
+
+Invalid rows (missing fields, a non-numeric or negative price, a
+non-integer or negative quantity) are skipped and counted in the returned
+`ImportReport`, with the first `max_errors` messages kept for display.
+"""
+
+import csv
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from Product import Product
+
+FIELDS = ("sku", "name", "price", "quantity", "category")
+
+
+class ImportReport:
+    """Counts and first error messages of one import."""
+
+    __slots__ = ("rows", "rejected", "errors", "max_errors")
+
+    def __init__(self, max_errors: int = 100):
+        self.rows = 0
+        self.rejected = 0
+        # (line number, message) for the first `max_errors` rejected rows
+        self.errors: list[tuple[int, str]] = []
+        self.max_errors = max_errors
+
+    def _record(self, accepted: int, errors: list[tuple[int, str]]):
+        self.rows += accepted
+        self.rejected += len(errors)
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def __repr__(self):
+        return f"ImportReport(rows={self.rows}, rejected={self.rejected})"
+
+
+def _detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"cannot tell the format of {path}; pass fmt='csv' or fmt='jsonl'")
+
+
+def _validate(record) -> tuple:
+    """Return the product fields of one parsed row or raise ValueError."""
+    sku, name, price, quantity, category = (record.get(f) for f in FIELDS)
+    for field, value in (("sku", sku), ("name", name), ("category", category)):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"missing {field}")
+    if isinstance(price, bool):
+        raise ValueError(f"invalid price {price!r}")
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {price!r}") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"invalid price {price!r}")
+    if isinstance(quantity, str):
+        try:
+            quantity = int(quantity)
+        except ValueError:
+            raise ValueError(f"invalid quantity {quantity!r}") from None
+    if quantity.__class__ is not int or quantity < 0:
+        raise ValueError(f"invalid quantity {quantity!r}")
+    return sku.strip(), name, price, quantity, category
+
+
+def _parse_chunk(fmt: str, header: list[str] | None, line_numbers, rows: list):
+    """Parse and validate one chunk; runs in a worker process when pooled.
+
+    `rows` are raw lines for JSONL and field lists for CSV. Returns
+    `(fields, errors)` where `fields` are tuples ready for `Product(*fields)`.
+    """
+    fields = []
+    errors = []
+    for line_no, row in zip(line_numbers, rows):
+        try:
+            if fmt == "jsonl":
+                if not row.strip():
+                    continue
+                record = json.loads(row)
+                if not isinstance(record, dict):
+                    raise ValueError("not a JSON object")
+            else:
+                if not row:
+                    continue
+                if len(row) != len(header):
+                    raise ValueError(f"expected {len(header)} fields, got {len(row)}")
+                record = dict(zip(header, row))
+            fields.append(_validate(record))
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            errors.append((line_no, str(e)))
+    return fields, errors
+
+
+def _read_chunks(path: str, fmt: str, chunk_size: int):
+    """Yield `(header, line_numbers, rows)` chunks of the file."""
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader, [])]
+            missing = [field for field in FIELDS if field not in header]
+            if missing:
+                raise ValueError(f"{path}: CSV header lacks {', '.join(missing)}")
+            while True:
+                # line_num counts physical lines, so a row starts one past
+                # where the previous one ended, even after quoted newlines
+                line_numbers = []
+                rows = []
+                start = reader.line_num + 1
+                for row in islice(reader, chunk_size):
+                    line_numbers.append(start)
+                    rows.append(row)
+                    start = reader.line_num + 1
+                if not rows:
+                    return
+                yield header, line_numbers, rows
+        else:
+            first = 1
+            while True:
+                rows = list(islice(f, chunk_size))
+                if not rows:
+                    return
+                yield None, range(first, first + len(rows)), rows
+                first += len(rows)
+
+
+def _parsed_chunks(path: str, fmt: str, chunk_size: int, processes: int):
+    chunks = _read_chunks(path, fmt, chunk_size)
+    if processes <= 1:
+        for header, line_numbers, rows in chunks:
+            yield _parse_chunk(fmt, header, line_numbers, rows)
+        return
+    # keep a bounded window of chunks in flight, in file order
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for header, line_numbers, rows in chunks:
+            pending.append(pool.submit(_parse_chunk, fmt, header, line_numbers, rows))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_catalog(path: str, fmt: str | None = None, chunk_size: int = 10000, processes: int = 0,
+                 report: ImportReport | None = None):
+    """Yield the valid products of a CSV or JSONL catalog file in file order.
+
+    `processes > 1` parses chunks in that many worker processes. Rejected
+    rows are recorded in `report` when one is given.
+    """
+    fmt = fmt or _detect_format(path)
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("fmt must be 'csv' or 'jsonl'")
+    for fields, errors in _parsed_chunks(path, fmt, chunk_size, processes):
+        if report is not None:
+            report._record(len(fields), errors)
+        for row in fields:
+            yield Product(*row)
+
+
+def import_catalog(manager, path: str, fmt: str | None = None, chunk_size: int = 10000, processes: int = 0,
+                   max_errors: int = 100) -> ImportReport:
+    """Replace the inventory of `manager` with a catalog file (see `bulk_load`)."""
+    report = ImportReport(max_errors)
+    manager.bulk_load(iter_catalog(path, fmt, chunk_size, processes, report))
+    return report
+
+
+def export_catalog(manager, path: str, fmt: str | None = None):
+    """Write the inventory of `manager` in a format `import_catalog` reads."""
+    fmt = fmt or _detect_format(path)
+    with open(path, "w", newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for p in manager.products.values():
+                writer.writerow((p.sku, p.name, p.price, p.quantity, p.category))
+        else:
+            for p in manager.products.values():
+                f.write(json.dumps(dict(zip(FIELDS, (p.sku, p.name, p.price, p.quantity, p.category)))) + "\n")
@@ -0,0 +1,250 @@
+"""In-process change-data-capture feed of inventory mutations.
+
+    feed = ChangeFeed(capacity=65536)
+    inventory = InventoryManager(change_feed=feed)
+    subscription = feed.subscribe()
+    for event in subscription.poll(max_events=1000, coalesce=True):
+        ...
+
+Every successful mutation of an `InventoryManager` appends one
+`ChangeEvent(seq, op, sku, data)` to a fixed-size ring buffer:
+
+    op          data
+    add         (name, price, quantity, category)
+    remove      None
+    qty         new quantity (update_quantity)
+    sale        new quantity (POSSystem sale)
+    return      new quantity (POSSystem return)
+    name        new name
+    category    new category
+    load        number of products (bulk_load / load_snapshot; sku is None)
+
+Sequence numbers start at 0 and increase by one per event, so a consumer
+can resume from any offset it has stored. A `load` event replaces the whole
+inventory: a mirror must re-read it from the manager.
+
+Consumers read batches with `read(offset, max_events)` or through a
+`Subscription`, which remembers its offset. `coalesce=True` keeps only the
+last quantity event (`qty`, `sale`, `return`) per SKU within a batch; the
+quantities are absolute, so a mirror loses nothing by skipping earlier ones.
+
+The ring keeps the last `capacity` events. What happens when a subscriber
+falls that far behind is the `overflow` policy:
+
+- `"drop"` (default): writers never wait. The lagging subscriber's next
+  `poll` raises `ChangeFeedLagged` naming the first event still available;
+  it must resynchronize from the inventory and `seek` there.
+- `"block"`: a writer waits until every subscriber is within `capacity`
+  events (back-pressure for consumers running on other threads). Do not
+  use it with a subscriber that is polled on the writing thread.
+
+Cost: an append is a lock round trip and three list stores, about
+0.3-0.7 us in CPython, paid by every mutation whether or not anyone
+subscribes. That is small next to a POS transaction or a WAL commit, but
+it is most of the work of the cheapest writes: `update_quantity` on a hot
+SKU drops from ~4M to ~1M calls/s (tests/changefeed_metrics.csv). Pass a
+feed only when a mirror actually consumes it. Bulk renames and
+recategorizations append their events with one `extend` under one lock.
+"""
+
+import threading
+from typing import NamedTuple
+
+
+class ChangeEvent(NamedTuple):
+    seq: int
+    op: str
+    sku: str | None
+    data: object = None
+
+
+class ChangeFeedLagged(Exception):
+    """Raised to a subscriber whose next event has been overwritten."""
+
+    def __init__(self, offset: int, oldest: int):
+        super().__init__(f"events {offset}..{oldest - 1} were overwritten; resync and seek({oldest})")
+        self.offset = offset
+        self.oldest = oldest
+
+
+# ops whose data is the new absolute quantity of the SKU
+QUANTITY_OPS = frozenset(("qty", "sale", "return"))
+
+
+class ChangeFeed:
+    def __init__(self, capacity: int = 65536, overflow: str = "drop"):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if overflow not in ("drop", "block"):
+            raise ValueError("overflow must be 'drop' or 'block'")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._block = overflow == "block"
+        # the ring is three parallel columns, not a list of events: appends
+        # then allocate no container objects for the garbage collector to
+        # scan, and events are only built for the consumers that read them
+        self._ops: list[str | None] = [None] * capacity
+        self._skus: list[str | None] = [None] * capacity
+        self._data: list = [None] * capacity
+        # sequence number of the next event
+        self.next_seq = 0
+        self._subscriptions: list[Subscription] = []
+        # appends take the bare lock: entering the Condition costs another
+        # Python-level call on every write
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # threads inside wait(); appends skip the notify while there are none
+        self._waiters = 0
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest event still in the ring."""
+        return max(0, self.next_seq - self.capacity)
+
+    def append(self, op: str, sku: str | None, data=None) -> int:
+        """Record one mutation and return its sequence number."""
+        # explicit acquire/release: about half the cost of `with` on a Lock
+        self._lock.acquire()
+        try:
+            if self._block:
+                self._wait_for_room()
+            seq = self.next_seq
+            slot = seq % self.capacity
+            self._ops[slot] = op
+            self._skus[slot] = sku
+            self._data[slot] = data
+            self.next_seq = seq + 1
+            if self._waiters:
+                self._cond.notify_all()
+            return seq
+        finally:
+            self._lock.release()
+
+    def extend(self, events) -> int:
+        """Record `(op, sku, data)` mutations under one lock; return the next sequence number."""
+        with self._lock:
+            ops, skus, data, capacity = self._ops, self._skus, self._data, self.capacity
+            for op, sku, value in events:
+                if self._block:
+                    self._wait_for_room()
+                slot = self.next_seq % capacity
+                ops[slot] = op
+                skus[slot] = sku
+                data[slot] = value
+                self.next_seq += 1
+            if self._waiters:
+                self._cond.notify_all()
+            return self.next_seq
+
+    def _wait_for_room(self):
+        # caller holds self._lock
+        limit = self.next_seq - self.capacity
+        while any(s.offset <= limit for s in self._subscriptions):
+            self._cond.wait()
+            limit = self.next_seq - self.capacity
+
+    def read(self, offset: int, max_events: int = 1000, coalesce: bool = False) -> tuple[list[ChangeEvent], int]:
+        """Return `(events, next_offset)` for up to `max_events` events from `offset`.
+
+        Raises `ChangeFeedLagged` if `offset` has already been overwritten.
+        """
+        with self._cond:
+            oldest = self.oldest_seq
+            if offset < oldest:
+                raise ChangeFeedLagged(offset, oldest)
+            end = min(self.next_seq, offset + max_events)
+            start = offset % self.capacity
+            stop = start + (end - offset)
+            columns = (self._ops, self._skus, self._data)
+            if stop <= self.capacity:
+                ops, skus, data = (column[start:stop] for column in columns)
+            else:
+                # the batch wraps around the end of the ring
+                stop -= self.capacity
+                ops, skus, data = (column[start:] + column[:stop] for column in columns)
+        events = list(map(ChangeEvent, range(offset, end), ops, skus, data))
+        if coalesce:
+            events = coalesce_quantities(events)
+        return events, end
+
+    def subscribe(self, offset: int | None = None) -> "Subscription":
+        """Start a subscription at `offset` (default: the next event)."""
+        with self._cond:
+            subscription = Subscription(self, self.next_seq if offset is None else offset)
+            self._subscriptions.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: "Subscription"):
+        with self._cond:
+            self._subscriptions.remove(subscription)
+            self._cond.notify_all()
+
+    def wait(self, offset: int, timeout: float | None = None) -> bool:
+        """Block until an event at or after `offset` exists; False on timeout."""
+        with self._cond:
+            self._waiters += 1
+            try:
+                return self._cond.wait_for(lambda: self.next_seq > offset, timeout)
+            finally:
+                self._waiters -= 1
+
+    def _advanced(self):
+        # a subscription moved forward: a blocked writer may proceed
+        if self._block:
+            with self._cond:
+                self._cond.notify_all()
+
+
+class Subscription:
+    """A consumer position in a `ChangeFeed`."""
+
+    def __init__(self, feed: ChangeFeed, offset: int):
+        self.feed = feed
+        self.offset = offset
+
+    @property
+    def lag(self) -> int:
+        """Number of events appended but not yet consumed."""
+        return self.feed.next_seq - self.offset
+
+    def poll(self, max_events: int = 1000, coalesce: bool = False, timeout: float | None = 0) -> list[ChangeEvent]:
+        """Consume the next batch of at most `max_events` events.
+
+        With `timeout` (seconds, None = forever) waits for an event when
+        none is pending; the default returns an empty batch at once.
+        """
+        if timeout != 0 and self.feed.next_seq <= self.offset:
+            self.feed.wait(self.offset, timeout)
+        events, self.offset = self.feed.read(self.offset, max_events, coalesce)
+        self.feed._advanced()
+        return events
+
+    def seek(self, offset: int):
+        """Continue from `offset` (e.g. `feed.next_seq` after a resync)."""
+        self.offset = offset
+        self.feed._advanced()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+def coalesce_quantities(events: list[ChangeEvent]) -> list[ChangeEvent]:
+    """Keep only the last quantity event per SKU, at its own position.
+
+    Any other event of the SKU (e.g. a remove and re-add) ends the run, so
+    quantity events are never moved across it.
+    """
+    out: list[ChangeEvent | None] = []
+    pending: dict[str, int] = {}
+    for event in events:
+        if event.op in QUANTITY_OPS:
+            index = pending.get(event.sku)
+            if index is not None:
+                out[index] = None
+            pending[event.sku] = len(out)
+        elif event.sku is None:
+            pending.clear()
+        else:
+            pending.pop(event.sku, None)
+        out.append(event)
+    return [event for event in out if event is not None]
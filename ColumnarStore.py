@@ -0,0 +1,158 @@
+"""Columnar backing store for `InventoryManager.products`.
+
+With `InventoryManager(columnar=True)` products are not kept as individual
+`Product` objects. Instead each attribute lives in a parallel column indexed
+by the dense SKU id that `InventoryManager` already assigns:
+
+- price    -> array('d')
+- quantity -> array('q')
+- category -> array('I') of interned category ids (+ the category table)
+- name     -> list of name strings
+
+`ColumnarProductStore` implements the mapping interface of the original
+`dict[str, Product]`, so the rest of `InventoryManager` is unchanged. Reads
+hand out `ProductView` objects: small handles (SKU id + store) whose
+attributes read and write the columns directly.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+
+from Product import Product, ProductBase
+
+
+class ProductView(ProductBase):
+    """Live view of one row of a `ColumnarProductStore`.
+
+    Has the attributes of a `Product` and shares its `ProductBase`, but
+    carries only its two slots instead of inheriting `Product`'s five
+    unused ones.
+    Assignments write straight to the columns. A view stays valid while
+    its SKU remains in the inventory.
+    """
+
+    __slots__ = ("_store", "_id")
+
+    def __init__(self, store: "ColumnarProductStore", sku_id: int):
+        self._store = store
+        self._id = sku_id
+
+    @property
+    def sku(self) -> str:
+        return self._store._owner._id_skus[self._id]
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._id]
+
+    @name.setter
+    def name(self, value: str):
+        self._store.names[self._id] = value
+
+    @property
+    def price(self) -> float:
+        return self._store.prices[self._id]
+
+    @price.setter
+    def price(self, value: float):
+        self._store.prices[self._id] = value
+
+    @property
+    def quantity(self) -> int:
+        return self._store.quantities[self._id]
+
+    @quantity.setter
+    def quantity(self, value: int):
+        self._store.quantities[self._id] = value
+
+    @property
+    def category(self) -> str:
+        return self._store.category_names[self._store.category_ids[self._id]]
+
+    @category.setter
+    def category(self, value: str):
+        self._store.category_ids[self._id] = self._store.intern_category(value)
+
+
+class ColumnarProductStore(MutableMapping):
+    """SKU -> ProductView mapping backed by parallel columns.
+
+    Rows are addressed by the owner's SKU ids (`owner._sku_ids`), so a SKU
+    must be interned before it is stored and removed from the store before
+    its id is released.
+    """
+
+    def __init__(self, owner):
+        self._owner = owner
+        self.prices = array('d')
+        self.quantities = array('q')
+        self.category_ids = array('I')
+        self.names: list[str | None] = []
+        # interned category table
+        self.category_names: list[str] = []
+        self._category_index: dict[str, int] = {}
+
+    def intern_category(self, category: str) -> int:
+        cid = self._category_index.get(category)
+        if cid is None:
+            cid = len(self.category_names)
+            self.category_names.append(category)
+            self._category_index[category] = cid
+        return cid
+
+    def _write_row(self, sku_id: int, product: Product):
+        if sku_id == len(self.names):
+            self.prices.append(product.price)
+            self.quantities.append(product.quantity)
+            self.category_ids.append(self.intern_category(product.category))
+            self.names.append(product.name)
+            return
+        if sku_id > len(self.names):
+            grow = sku_id + 1 - len(self.names)
+            self.prices.extend([0.0] * grow)
+            self.quantities.extend([0] * grow)
+            self.category_ids.extend([0] * grow)
+            self.names.extend([None] * grow)
+        self.prices[sku_id] = product.price
+        self.quantities[sku_id] = product.quantity
+        self.category_ids[sku_id] = self.intern_category(product.category)
+        self.names[sku_id] = product.name
+
+    def load(self, products):
+        """Append rows for `products`, whose ids are 0..n-1 in iteration order."""
+        for sku_id, product in enumerate(products, start=len(self.names)):
+            self._write_row(sku_id, product)
+
+    def load_columns(self, prices: array, quantities: array, category_ids: array, names: list[str],
+                     category_names: list[str]):
+        """Adopt ready-made columns for ids 0..n-1 (e.g. from a snapshot)."""
+        self.prices = prices
+        self.quantities = quantities
+        self.category_ids = category_ids
+        self.names = names
+        self.category_names = list(category_names)
+        self._category_index = {c: i for i, c in enumerate(self.category_names)}
+
+    def __getitem__(self, sku: str) -> ProductView:
+        return ProductView(self, self._owner._sku_ids[sku])
+
+    def __setitem__(self, sku: str, product: Product):
+        if isinstance(product, ProductView) and product._store is self:
+            return  # the view already writes through to its row
+        self._write_row(self._owner._sku_ids[sku], product)
+
+    def __delitem__(self, sku: str):
+        if sku not in self._owner._sku_ids:
+            raise KeyError(sku)
+        # The row is left in place so views of the removed product stay
+        # readable (like a detached Product); it is overwritten when the
+        # owner releases the id and hands it to a new SKU.
+
+    def __contains__(self, sku) -> bool:
+        return sku in self._owner._sku_ids
+
+    def __iter__(self):
+        return iter(self._owner._sku_ids)
+
+    def __len__(self) -> int:
+        return len(self._owner._sku_ids)
@@ -0,0 +1,187 @@
+"""Thread-safe `InventoryManager` for several registers sharing one inventory.
+
+`ConcurrentInventoryManager` accepts every `InventoryManager` option and adds
+two kinds of locks:
+
+- Stock: a `StripedLock` keyed by SKU. `POSSystem` holds the stripe of a SKU
+  across its check-then-act sequence (read quantity, check, write), so two
+  registers can never both sell the last unit. Sales of SKUs on different
+  stripes do not wait for each other.
+- Structure: a writer-preferring `ReadWriteLock` around the search trie,
+  token index, category index, secondary indexes and caches. Queries take
+  the read side and run side by side; adds, removals, renames, category
+  changes and `bulk_load` take the write side. Read queries may fill the
+  prefix and category caches: a fill is a single store of a freshly
+  computed result, and no writer can run while any reader holds the lock,
+  so a fill can never be stale. Each cache also has its own mutex, because
+  with a budget a hit reorders the eviction policy and a fill may evict.
+
+Quantity changes only take the write side when a quantity-derived index is
+enabled (`range_indexes`, `analytics`, `rank_topk`, `low_stock`), because
+those structures are shared by all SKUs. Without them a sale touches
+nothing but its own product and is guarded by its stripe alone.
+
+With a write-ahead log, a writer appends its record while it holds the
+write side (so the log keeps the order of the mutations) but commits it,
+i.e. waits for the fsync, only after releasing it. Readers never wait for
+the disk, and writers that finish together share one group-commit fsync.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from InventoryManager import InventoryManager
+from Locks import ReadWriteLock, StripedLock
+from Product import Product, ProductBase
+
+
+class ConcurrentInventoryManager(InventoryManager):
+    def __init__(self, *args, lock_stripes: int = 64, **kwargs):
+        # the locks must exist before the base constructor replays a WAL
+        self._stripes = StripedLock(lock_stripes)
+        self._rw = ReadWriteLock()
+        super().__init__(*args, **kwargs)
+        self._prefix_cache.lock = threading.Lock()
+        self._category_cache.lock = threading.Lock()
+        self._quantity_indexed = bool(self.quantity_index is not None or self.analytics is not None
+                                      or self._rank_topk or self.low_stock is not None)
+
+    def stock_lock(self, skus):
+        return self._stripes.hold(skus)
+
+    @contextmanager
+    def _write_locked(self):
+        """The write side, with this thread's WAL commit postponed until it is released."""
+        with self.wal_deferred_commit():
+            with self._rw.write_lock:
+                yield
+
+    # ---- writers ----
+
+    def add_product(self, product: Product):
+        with self._write_locked():
+            super().add_product(product)
+
+    def remove_product(self, product: Product | str):
+        sku = product.sku if isinstance(product, ProductBase) else product
+        # the stripe keeps an in-flight sale of this SKU from outliving its id
+        with self._stripes.lock_for(sku), self._write_locked():
+            super().remove_product(product)
+
+    def update_quantity(self, sku: str, quantity: int):
+        with self._stripes.lock_for(sku):
+            super().update_quantity(sku, quantity)
+
+    def _set_quantity(self, sku: str, product: Product, quantity: int, cause: str = "qty"):
+        # callers hold the stripe of `sku`
+        if self._quantity_indexed:
+            with self._write_locked():
+                super()._set_quantity(sku, product, quantity, cause)
+        else:
+            super()._set_quantity(sku, product, quantity, cause)
+
+    def update_quantities(self, changes) -> int:
+        changes = list(changes)
+        with self._stripes.hold({sku for sku, _ in changes}):
+            return super().update_quantities(changes)
+
+    def _set_quantities(self, items: list):
+        # callers hold the stripes of every SKU in `items`; the batch takes
+        # the write lock once instead of once per product
+        if self._quantity_indexed:
+            with self._write_locked():
+                super()._set_quantities(items)
+        else:
+            super()._set_quantities(items)
+
+    def bulk_load(self, products_iterable, processes: int = 0):
+        with self._stripes.hold_all(), self._rw.write_lock:
+            super().bulk_load(products_iterable, processes)
+
+    def load_snapshot(self, path: str):
+        with self._stripes.hold_all(), self._rw.write_lock:
+            super().load_snapshot(path)
+
+    def save_snapshot(self, path: str):
+        with self._rw.read_lock:
+            super().save_snapshot(path)
+
+    def update_product_name(self, sku: str, new_name: str) -> bool:
+        with self._write_locked():
+            return super().update_product_name(sku, new_name)
+
+    def update_product_category(self, sku: str, new_category: str) -> bool:
+        with self._write_locked():
+            return super().update_product_category(sku, new_category)
+
+    def update_product_names(self, changes) -> int:
+        with self._write_locked():
+            return super().update_product_names(changes)
+
+    def update_product_categories(self, changes) -> int:
+        with self._write_locked():
+            return super().update_product_categories(changes)
+
+    def refresh_rank(self, sku: str) -> bool:
+        with self._rw.write_lock:
+            return super().refresh_rank(sku)
+
+    def set_reorder_point(self, sku: str, reorder_point: int) -> bool:
+        with self._stripes.lock_for(sku), self._rw.write_lock:
+            return super().set_reorder_point(sku, reorder_point)
+
+    # ---- readers ----
+
+    def get_products_by_category(self, category: str, limit: int | None = None):
+        with self._rw.read_lock:
+            return super().get_products_by_category(category, limit)
+
+    def get_products_by_name_prefix(self, prefix: str, limit: int | None = None, as_generator: bool = False,
+                                    ranked: bool = False):
+        with self._rw.read_lock:
+            return super().get_products_by_name_prefix(prefix, limit, as_generator, ranked)
+
+    def iter_products_by_name_prefix(self, prefix: str, cursor=None, page_size: int = 256):
+        # Holding the read lock across yields would block writers for as long
+        # as the consumer keeps the generator alive, so stream page by page
+        # and resume from the cursor, which tolerates changes in between.
+        while True:
+            page, cursor = self.get_products_page(prefix, page_size, cursor)
+            yield from page
+            if cursor is None:
+                return
+
+    def get_products_page(self, prefix: str, limit: int, cursor=None):
+        with self._rw.read_lock:
+            return super().get_products_page(prefix, limit, cursor)
+
+    def get_products_by_price_range(self, min_price: float | None = None, max_price: float | None = None,
+                                    limit: int | None = None, offset: int = 0):
+        with self._rw.read_lock:
+            return super().get_products_by_price_range(min_price, max_price, limit, offset)
+
+    def get_products_by_quantity_range(self, min_quantity: int | None = None, max_quantity: int | None = None,
+                                       limit: int | None = None, offset: int = 0):
+        with self._rw.read_lock:
+            return super().get_products_by_quantity_range(min_quantity, max_quantity, limit, offset)
+
+    def get_products_by_fuzzy_prefix(self, prefix: str, max_distance: int | None = None,
+                                     limit: int | None = 50, transpositions: bool = True):
+        with self._rw.read_lock:
+            return super().get_products_by_fuzzy_prefix(prefix, max_distance, limit, transpositions)
+
+    def get_products_by_tokens(self, query: str, limit: int | None = None):
+        with self._rw.read_lock:
+            return super().get_products_by_tokens(query, limit)
+
+    def get_categories(self):
+        with self._rw.read_lock:
+            return super().get_categories()
+
+    def get_most_critical_products(self, limit: int = 10):
+        with self._rw.read_lock:
+            return super().get_most_critical_products(limit)
+
+    def get_low_stock_products(self, limit: int | None = None):
+        with self._rw.read_lock:
+            return super().get_low_stock_products(limit)
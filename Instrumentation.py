@@ -0,0 +1,250 @@
+"""Call counters and latency histograms for the inventory hot paths.
+
+    metrics = Metrics()
+    inventory = InventoryManager(metrics=metrics)
+    pos = POSSystem(inventory)
+    metrics.enable()
+    ...
+    metrics.snapshot()      # {"operations": {...}, "caches": {...}}
+    metrics.prometheus()    # text exposition format
+
+Instrumented objects register their methods with `instrument`. Nothing is
+wrapped while the metrics are disabled: the methods are the plain class
+methods and cost nothing extra. `enable()` shadows each registered method
+with a timing wrapper stored on the instance, `disable()` deletes the
+wrappers again, so the switch can be flipped at runtime.
+
+Each operation has a `LatencyHistogram` of wall-clock nanoseconds. Its
+buckets are log-linear (as in HdrHistogram): every power of two is split
+into 32 sub-buckets, so any recorded latency is known within ~3% and a
+record is one `bit_length`, a shift and a list increment. The call count is
+the histogram count; calls that raised are counted as errors, untimed.
+
+Cache hit and miss counts are kept by the caches themselves (`CacheStats`,
+always on); registered sources such as `InventoryManager.cache_stats` are
+read when a snapshot is taken.
+
+Updates take no lock: under `ConcurrentInventoryManager` an occasional
+increment can be lost to a thread switch, which a latency distribution
+tolerates.
+"""
+
+import time
+import weakref
+
+# sub-buckets per power of two = 2 ** _SUB_BITS
+_SUB_BITS = 5
+_SUB_COUNT = 1 << _SUB_BITS
+# values below this are counted exactly
+_LINEAR_LIMIT = _SUB_COUNT << 1
+_SHIFT_BASE = _SUB_BITS + 1
+
+
+def _bucket_bounds(index: int) -> tuple[int, int]:
+    """Lowest and highest value (inclusive) counted by bucket `index`."""
+    if index < _LINEAR_LIMIT:
+        return index, index
+    shift = (index >> _SUB_BITS) - 1
+    mantissa = index - (shift << _SUB_BITS)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of non-negative integer latencies (nanoseconds)."""
+
+    def __init__(self):
+        # 64-bit range: 32 sub-buckets for each of 64 powers of two
+        self.counts = [0] * (_SUB_COUNT * 64)
+        self.count = 0
+        self.errors = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        shift = value.bit_length() - _SHIFT_BASE
+        self.counts[value if shift <= 0 else (shift << _SUB_BITS) + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> int:
+        """Highest value equivalent to the `q`-th percentile (0 <= q <= 100)."""
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * q / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def reset(self):
+        # in place: timing wrappers hold on to the list
+        self.counts[:] = [0] * len(self.counts)
+        self.count = self.errors = self.total = self.max = 0
+
+    def snapshot(self) -> dict:
+        """Counts and latencies in microseconds."""
+        return {"count": self.count, "errors": self.errors,
+                "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+                "p50_us": self.percentile(50) / 1e3, "p90_us": self.percentile(90) / 1e3,
+                "p99_us": self.percentile(99) / 1e3, "p999_us": self.percentile(99.9) / 1e3,
+                "max_us": self.max / 1e3}
+
+
+def _timed(fn, histogram: LatencyHistogram):
+    # record() inlined: this wrapper is the whole cost of an enabled metric
+    clock = time.perf_counter_ns
+    counts = histogram.counts
+
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            histogram.errors += 1
+            raise
+        elapsed = clock() - start
+        shift = elapsed.bit_length() - _SHIFT_BASE
+        counts[elapsed if shift <= 0 else (shift << _SUB_BITS) + (elapsed >> shift)] += 1
+        histogram.count += 1
+        histogram.total += elapsed
+        if elapsed > histogram.max:
+            histogram.max = elapsed
+        return result
+
+    timed.__wrapped__ = fn
+    return timed
+
+
+class Metrics:
+    # quantiles exported to Prometheus
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+    # cache stats exported to Prometheus: (stats key, metric type)
+    CACHE_FAMILIES = (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                      ("invalidations", "counter"), ("updates", "counter"), ("hit_rate", "gauge"),
+                      ("entries", "gauge"), ("bytes", "gauge"))
+
+    def __init__(self, enabled: bool = False, namespace: str = "inventory"):
+        self.namespace = namespace
+        self.enabled = False
+        self.histograms: dict[str, LatencyHistogram] = {}
+        # (resolve, {method: operation name}); resolve() returns the object
+        # to wrap, or None once it is gone
+        self._targets = []
+        # (weakref to object, method, shadowed instance attribute or None)
+        # for every wrapper currently installed
+        self._installed = []
+        self._sources = {}
+        if enabled:
+            self.enable()
+
+    def instrument(self, resolve, methods: dict[str, str]):
+        """Time `methods` of the object returned by `resolve()`.
+
+        `resolve` is called again by `rebind`, so an owner that replaces the
+        object (e.g. a rebuilt trie) keeps it instrumented. Pass a
+        `weakref.ref` (or a function of one) so the metrics do not keep the
+        instrumented objects alive.
+        """
+        for name in methods.values():
+            self.histograms.setdefault(name, LatencyHistogram())
+        self._targets.append((resolve, methods))
+        if self.enabled:
+            self._install(resolve, methods)
+
+    def add_source(self, name: str, snapshot) -> str:
+        """Include `snapshot()` (a dict) under `caches[name]` in snapshots.
+
+        A name already in use gets a suffix ("inventory-2", "inventory-3",
+        ...), so managers sharing one `Metrics` keep separate cache stats.
+        Returns the name used.
+        """
+        unique, n = name, 1
+        while unique in self._sources:
+            n += 1
+            unique = f"{name}-{n}"
+        self._sources[unique] = snapshot
+        return unique
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            for resolve, methods in self._targets:
+                self._install(resolve, methods)
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            self._uninstall()
+
+    def rebind(self):
+        """Re-resolve every target after an owner replaced one of them."""
+        if self.enabled:
+            self._uninstall()
+            for resolve, methods in self._targets:
+                self._install(resolve, methods)
+
+    def _install(self, resolve, methods: dict[str, str]):
+        target = resolve()
+        if target is None:
+            return
+        for method, name in methods.items():
+            # the instance attribute shadows the class method (or another
+            # wrapper, such as an OperationTrace recorder, restored later)
+            previous = target.__dict__.get(method)
+            setattr(target, method, _timed(getattr(target, method), self.histograms[name]))
+            self._installed.append((weakref.ref(target), method, previous))
+
+    def _uninstall(self):
+        # newest first, so a target wrapped twice gets its original back
+        for ref, method, previous in reversed(self._installed):
+            target = ref()
+            if target is None:
+                continue
+            if previous is None:
+                target.__dict__.pop(method, None)
+            else:
+                target.__dict__[method] = previous
+        self._installed = []
+
+    def reset(self):
+        """Zero every histogram; cache counters belong to the caches."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled,
+                "operations": {name: h.snapshot() for name, h in self.histograms.items() if h.count},
+                "caches": {name: source() for name, source in self._sources.items()}}
+
+    def prometheus(self) -> str:
+        """The snapshot in the Prometheus text exposition format.
+
+        Every registered operation is exported, called or not: a series that
+        only appears after its first call breaks `rate()` over that window.
+        Quantiles of an operation without calls are NaN.
+        """
+        ns = self.namespace
+        lines = [f"# HELP {ns}_operation_latency_seconds Latency of instrumented operations.",
+                 f"# TYPE {ns}_operation_latency_seconds summary"]
+        for name, h in self.histograms.items():
+            for q in self.QUANTILES:
+                value = f"{h.percentile(q * 100) / 1e9:.9f}" if h.count else "NaN"
+                lines.append(f'{ns}_operation_latency_seconds{{op="{name}",quantile="{q}"}} {value}')
+            lines.append(f'{ns}_operation_latency_seconds_sum{{op="{name}"}} {h.total / 1e9:.9f}')
+            lines.append(f'{ns}_operation_latency_seconds_count{{op="{name}"}} {h.count}')
+        lines.append(f"# HELP {ns}_operation_errors_total Instrumented calls that raised.")
+        lines.append(f"# TYPE {ns}_operation_errors_total counter")
+        for name, h in self.histograms.items():
+            lines.append(f'{ns}_operation_errors_total{{op="{name}"}} {h.errors}')
+        caches = [(f'source="{group}",cache="{cache}"', values)
+                  for group, stats in self._sources.items() for cache, values in stats().items()]
+        for key, kind in self.CACHE_FAMILIES:
+            family = f"{ns}_cache_{key}_total" if kind == "counter" else f"{ns}_cache_{key}"
+            lines.append(f"# TYPE {family} {kind}")
+            for labels, values in caches:
+                lines.append(f"{family}{{{labels}}} {values[key]}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,123 @@
+"""Vectorized inventory analytics over NumPy price/quantity columns.
+
+`InventoryManager(analytics=True)` keeps an `InventoryAnalytics` instance in
+sync with every mutation. Rows are addressed by the manager's dense SKU ids,
+so keeping the columns current is an O(1) store per mutation, and aggregate
+questions (stock valuation, valuation per category, out-of-stock count,
+low-stock SKUs) become single vectorized passes instead of Python loops
+over `InventoryManager.products`.
+
+NumPy is an optional dependency: `InventoryManager` works without it and
+only `analytics=True` requires it.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class InventoryAnalytics:
+    def __init__(self, owner, capacity: int = 1024):
+        if np is None:
+            raise ImportError("InventoryAnalytics requires numpy (pip install numpy)")
+        self._owner = owner
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.quantities = np.zeros(capacity, dtype=np.int64)
+        self.category_ids = np.zeros(capacity, dtype=np.int32)
+        # False for ids that are free (never used or released)
+        self.live = np.zeros(capacity, dtype=bool)
+        # one past the highest id ever stored; queries only look at [:size]
+        self.size = 0
+        self.category_names: list[str] = []
+        self._category_index: dict[str, int] = {}
+
+    def _category_id(self, category: str) -> int:
+        cid = self._category_index.get(category)
+        if cid is None:
+            cid = len(self.category_names)
+            self.category_names.append(category)
+            self._category_index[category] = cid
+        return cid
+
+    def _ensure_capacity(self, n: int):
+        capacity = len(self.prices)
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        for name in ("prices", "quantities", "category_ids", "live"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    # ---- mutation hooks (called by InventoryManager) ----
+
+    def set_product(self, sku_id: int, product):
+        self._ensure_capacity(sku_id + 1)
+        self.prices[sku_id] = product.price
+        self.quantities[sku_id] = product.quantity
+        self.category_ids[sku_id] = self._category_id(product.category)
+        self.live[sku_id] = True
+        if sku_id >= self.size:
+            self.size = sku_id + 1
+
+    def remove(self, sku_id: int):
+        self.live[sku_id] = False
+        # zero the row so sums need no mask
+        self.prices[sku_id] = 0.0
+        self.quantities[sku_id] = 0
+
+    def set_quantity(self, sku_id: int, quantity: int):
+        self.quantities[sku_id] = quantity
+
+    def set_category(self, sku_id: int, category: str):
+        self.category_ids[sku_id] = self._category_id(category)
+
+    def load(self, products):
+        """Replace all columns with `products`, whose ids are 0..n-1 in order."""
+        products = list(products)
+        n = len(products)
+        self.category_names = []
+        self._category_index = {}
+        capacity = max(1024, n)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.quantities = np.zeros(capacity, dtype=np.int64)
+        self.category_ids = np.zeros(capacity, dtype=np.int32)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.prices[:n] = np.fromiter((p.price for p in products), dtype=np.float64, count=n)
+        self.quantities[:n] = np.fromiter((p.quantity for p in products), dtype=np.int64, count=n)
+        self.category_ids[:n] = np.fromiter((self._category_id(p.category) for p in products),
+                                            dtype=np.int32, count=n)
+        self.live[:n] = True
+        self.size = n
+
+    # ---- queries ----
+
+    def total_valuation(self) -> float:
+        """Sum of price * quantity over all products."""
+        n = self.size
+        return float(np.dot(self.prices[:n], self.quantities[:n]))
+
+    def valuation_by_category(self) -> dict[str, float]:
+        """Map each category with at least one product to its stock value."""
+        n = self.size
+        cats = self.category_ids[:n]
+        ncat = len(self.category_names)
+        values = np.bincount(cats, weights=self.prices[:n] * self.quantities[:n], minlength=ncat)
+        members = np.bincount(cats, weights=self.live[:n], minlength=ncat)
+        return {self.category_names[c]: float(values[c]) for c in np.flatnonzero(members)}
+
+    def out_of_stock_count(self) -> int:
+        n = self.size
+        return int(np.count_nonzero(self.live[:n] & (self.quantities[:n] == 0)))
+
+    def skus_below(self, threshold: int, limit: int | None = None) -> list[str]:
+        """SKUs whose quantity is strictly below `threshold` (in id order)."""
+        n = self.size
+        ids = np.flatnonzero(self.live[:n] & (self.quantities[:n] < threshold))
+        if limit is not None:
+            ids = ids[:limit]
+        id_skus = self._owner._id_skus
+        return [id_skus[i] for i in ids.tolist()]
@@ -1,5 +1,24 @@
-from Product import Product
-from TrieNode import Trie
+import gc
+from array import array
+from bisect import insort
+from contextlib import nullcontext
+from itertools import islice
+import weakref
+from typing import Callable
+
+from CachePolicy import BoundedCache, CacheLedger, CacheStats
+from ChangeFeed import ChangeFeed
+from ColumnarStore import ColumnarProductStore
+from Instrumentation import Metrics
+from OperationTrace import TraceRecorder
+from InventoryAnalytics import InventoryAnalytics
+from LowStockTracker import LowStockTracker
+from Product import Product, ProductBase
+from TrieNode import Trie, RadixTrie
+from PostingList import PostingList
+from Snapshot import MappedSnapshot, write_snapshot
+from SortedIndex import SortedIndex
+from WriteAheadLog import WriteAheadLog
 
 
 # Small Trie used for caching prefix query results (case-insensitive keys)
@@ -7,31 +26,76 @@ class _PrefixCacheNode:
     def __init__(self):
         self.children: dict[str, _PrefixCacheNode] = {}
         self.cached_skus: list[str] | None = None
+        # True when cached_skus holds only the first matches of a streamed query
+        self.partial: bool = False
 
 # Trie structure for caching prefix query results (case-insensitive keys)
 # Each node may store a cached list of SKUs for the prefix leading to that node. So the key
 # "App" would be stored by traversing 'A' -> 'p' -> 'p' nodes, and the last node would have
 # cached_skus set to the list of SKUs matching that prefix.
+# A CacheLedger bounds the number of cached prefixes and/or their bytes; an
+# evicted or invalidated entry also drops the node chain that only led to it.
 class PrefixCacheTrie:
-    def __init__(self):
+    def __init__(self, max_entries: int | None = None, max_bytes: int | None = None, policy: str = "lru"):
         self.root = _PrefixCacheNode()
+        self.ledger = CacheLedger(max_entries, max_bytes, policy)
+        # hits reorder the ledger, so concurrent readers need a real lock here
+        self.lock = nullcontext()
+
+    def __len__(self) -> int:
+        return len(self.ledger)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.ledger.stats
 
     def _normalize(self, key: str) -> str:
         return key.lower()
 
-    def get(self, prefix: str) -> list[str] | None:
-        node = self.root
-        for ch in self._normalize(prefix):
-            if ch not in node.children:
+    def get(self, prefix: str, limit: int | None = None) -> list[str] | None:
+        """Return cached SKUs for `prefix`.
+
+        A partial entry only answers queries whose `limit` it covers.
+        """
+        with self.lock:
+            key = self._normalize(prefix)
+            node = self.root
+            for ch in key:
+                if ch not in node.children:
+                    self.ledger.miss()
+                    return None
+                node = node.children[ch]
+            if node.cached_skus is None or (node.partial and (limit is None or len(node.cached_skus) < limit)):
+                self.ledger.miss()
                 return None
-            node = node.children[ch]
-        return node.cached_skus
+            self.ledger.hit(key)
+            return node.cached_skus
 
-    def set(self, prefix: str, skus: list[str]):
-        node = self.root
-        for ch in self._normalize(prefix):
-            node = node.children.setdefault(ch, _PrefixCacheNode())
-        node.cached_skus = list(skus)
+    def set(self, prefix: str, skus: list[str], partial: bool = False):
+        """Cache `skus` for `prefix`; the cache keeps the list itself (no copy)."""
+        with self.lock:
+            key = self._normalize(prefix)
+            node = self.root
+            for ch in key:
+                node = node.children.setdefault(ch, _PrefixCacheNode())
+            node.cached_skus = skus
+            node.partial = partial
+            for victim in self.ledger.admit(key, skus):
+                self._drop(victim)
+
+    def _drop(self, key: str):
+        """Remove the entry for `key` and prune the nodes that only led to it."""
+        path = [self.root]
+        for ch in key:
+            path.append(path[-1].children[ch])
+        node = path[-1]
+        node.cached_skus = None
+        node.partial = False
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.children or node.cached_skus is not None:
+                break
+            del path[depth - 1].children[key[depth - 1]]
 
     def invalidate_prefixes_of_name(self, name: str):
         """Invalidate cached entries for all prefixes of the given name.
@@ -39,15 +103,175 @@ class PrefixCacheTrie:
         For name 'Apple iPhone' this clears cached entries for 'a','ap','app',...
         The operation is O(m) where m is len(name).
         """
-        node = self.root
-        for ch in self._normalize(name):
-            if ch not in node.children:
-                return
-            node = node.children[ch]
-            node.cached_skus = None
+        with self.lock:
+            key = self._normalize(name)
+            node = self.root
+            deepest = 0
+            for depth, ch in enumerate(key, 1):
+                if ch not in node.children:
+                    break
+                node = node.children[ch]
+                deepest = depth
+                if node.cached_skus is not None:
+                    self.ledger.invalidate(key[:depth])
+                    node.cached_skus = None
+                    node.partial = False
+            # prune the now-empty tail of the walked chain
+            if deepest:
+                self._drop(key[:deepest])
+
+    def invalidate_prefixes_of_names(self, names):
+        """Batch form of `invalidate_prefixes_of_name`.
+
+        The names are walked in sorted order along one path stack, so a
+        cache node shared by several names is visited (and its entry
+        invalidated) once, and emptied nodes are pruned as the walk leaves
+        them. O(total length of the distinct names).
+        """
+        with self.lock:
+            # path[d] is the node of key[:d] on the current walk
+            path = [self.root]
+            key = ""
+            for name in sorted({self._normalize(n) for n in names}):
+                common = 0
+                limit = min(len(key), len(name), len(path) - 1)
+                while common < limit and key[common] == name[common]:
+                    common += 1
+                self._unwind(path, key, common)
+                node = path[-1]
+                for depth in range(len(path), len(name) + 1):
+                    node = node.children.get(name[depth - 1])
+                    if node is None:
+                        break
+                    path.append(node)
+                    if node.cached_skus is not None:
+                        self.ledger.invalidate(name[:depth])
+                        node.cached_skus = None
+                        node.partial = False
+                key = name
+            self._unwind(path, key, 0)
+
+    @staticmethod
+    def _unwind(path: list, key: str, depth: int):
+        """Pop `path` back to `depth`, pruning popped nodes left empty."""
+        while len(path) - 1 > depth:
+            node = path.pop()
+            if not node.children and node.cached_skus is None:
+                del path[-1].children[key[len(path) - 1]]
+
+    def add_to_prefixes(self, name: str, sku: str, order_key=None):
+        """Write-through: add `sku` to every cached entry that is a prefix of `name`.
+
+        With `order_key` (SKU -> SKU id) the SKU is inserted where a fresh
+        query would list it; otherwise it is appended. Partial entries (the
+        first k matches of a streamed query) cannot tell whether the new
+        SKU belongs in them, so they are invalidated instead.
+        """
+        self._patch(name, sku, order_key, True)
+
+    def remove_from_prefixes(self, name: str, sku: str):
+        """Write-through: remove `sku` from every cached entry that is a prefix of `name`."""
+        self._patch(name, sku, None, False)
+
+    def patch_prefixes(self, removed, added, order_key=None):
+        """Batch write-through: apply many `(name, sku)` removals and additions.
+
+        Changes are first collected per cached entry, then each affected
+        list is rewritten once (filtered, extended and, with `order_key`,
+        re-sorted) instead of being patched once per SKU. As in
+        `add_to_prefixes`, a partial entry that would gain SKUs is
+        invalidated.
+        """
+        with self.lock:
+            # id(node) -> [node, prefix, SKUs removed, SKUs added]
+            changes = {}
+            for pairs, adding in ((removed, False), (added, True)):
+                for name, sku in pairs:
+                    key = self._normalize(name)
+                    node = self.root
+                    for depth, ch in enumerate(key, 1):
+                        node = node.children.get(ch)
+                        if node is None:
+                            break
+                        if node.cached_skus is None:
+                            continue
+                        change = changes.get(id(node))
+                        if change is None:
+                            change = changes[id(node)] = [node, key[:depth], set(), []]
+                        if adding:
+                            change[3].append(sku)
+                        else:
+                            change[2].add(sku)
+            patched = []
+            for node, prefix, gone, new in changes.values():
+                if new and node.partial:
+                    self.ledger.invalidate(prefix)
+                    node.cached_skus = None
+                    node.partial = False
+                    continue
+                skus = node.cached_skus
+                kept = [sku for sku in skus if sku not in gone] if gone else list(skus)
+                kept.extend(new)
+                if new and order_key is not None:
+                    # the kept part is already ordered, so this is a merge
+                    kept.sort(key=order_key)
+                skus[:] = kept
+                patched.append((prefix, skus))
+            self.ledger.stats.updates += len(patched)
+            for prefix, skus in patched:
+                for victim in self.ledger.resize(prefix, skus):
+                    self._drop(victim)
+
+    def _patch(self, name: str, sku: str, order_key, adding: bool):
+        with self.lock:
+            key = self._normalize(name)
+            node = self.root
+            patched = []
+            for depth, ch in enumerate(key, 1):
+                node = node.children.get(ch)
+                if node is None:
+                    break
+                skus = node.cached_skus
+                if skus is None:
+                    continue
+                if node.partial and adding:
+                    self.ledger.invalidate(key[:depth])
+                    node.cached_skus = None
+                    node.partial = False
+                    continue
+                # removing a SKU from a partial page leaves the first matches
+                # correct; the shorter page then only answers smaller limits
+                if adding:
+                    if order_key is None:
+                        skus.append(sku)
+                    else:
+                        insort(skus, sku, key=order_key)
+                else:
+                    try:
+                        skus.remove(sku)
+                    except ValueError:
+                        continue
+                patched.append((key[:depth], skus))
+            self.ledger.stats.updates += len(patched)
+            # lists grow and shrink in place: re-account them after the walk,
+            # which may evict (and prune) entries
+            for prefix, skus in patched:
+                for victim in self.ledger.resize(prefix, skus):
+                    self._drop(victim)
 
     def clear(self):
-        self.root = _PrefixCacheNode()
+        with self.lock:
+            self.root = _PrefixCacheNode()
+            self.ledger.clear()
+
+
+# Score functions for ranked autocomplete (higher score ranks first)
+def rank_by_quantity(product: Product) -> float:
+    return product.quantity
+
+
+def rank_by_price(product: Product) -> float:
+    return product.price
 
 
 # Inventory Manager class definition for managing products.
@@ -55,18 +279,89 @@ class PrefixCacheTrie:
 # 1. Primary Hash Table for SKU to Product mapping.
 # 2. Category Index for category-based retrieval.
 # 3. Search Trie for fast name-based retrieval.
+# 4. Optional Token Index (inverted index) for word-level / multi-term search.
+# 5. Optional ordered Price / Quantity indexes for range queries.
+# SKUs are interned to dense integer ids; the category index and the search
+# trie store those ids in compact PostingLists and translate back to SKU
+# strings only at the API boundary.
 class InventoryManager: 
-    def __init__(self, store_skus_in_trie: bool = True): 
-        # 1. Primary Hash Table
-        self.products: dict[str, Product] = {}
-        # 2. Category Index. Dictionary mapping category to set of SKUs
-        self.categories: dict[str, set[str]] = {}
-        # 3. Search Trie - configurable memory/time tradeoff
-        self.search_trie = Trie(store_skus_in_nodes=store_skus_in_trie)
+    def __init__(self, store_skus_in_trie: bool = True, compress_trie: bool = False,
+                 rank_topk: int = 0, rank_key: Callable[[Product], float] = rank_by_quantity,
+                 index_tokens: bool = False, columnar: bool = False, analytics: bool = False,
+                 range_indexes: bool = False, low_stock: bool = False, reorder_point: int = 10,
+                 wal: WriteAheadLog | None = None, cache_entries: int | None = None,
+                 cache_bytes: int | None = None, cache_policy: str = "lru", cache_write_through: bool = False,
+                 change_feed: ChangeFeed | None = None, metrics: Metrics | None = None,
+                 trace: TraceRecorder | None = None): 
+        # 1. Primary Hash Table. With columnar=True it is replaced by a mapping
+        # over parallel price/quantity/category/name columns that hands out
+        # lightweight ProductView objects instead of storing Products.
+        self._columnar = columnar
+        self.products: dict[str, Product] = ColumnarProductStore(self) if columnar else {}
+        # SKU interning table: SKU string <-> dense integer id. Freed ids are
+        # reused so the id space stays dense.
+        self._sku_ids: dict[str, int] = {}
+        self._id_skus: list[str | None] = []
+        self._free_ids: list[int] = []
+        # 2. Category Index. Dictionary mapping category to posting list of SKU ids
+        self.categories: dict[str, PostingList] = {}
+        # 3. Search Trie - configurable memory/time tradeoff.
+        # compress_trie=True selects the path-compressed RadixTrie (one node per
+        # name instead of one node per character).
+        self._trie_cls = RadixTrie if compress_trie else Trie
+        # one name per product: lets node mode bisect for a node's own ids
+        self.search_trie = self._trie_cls(store_skus_in_nodes=store_skus_in_trie, posting=PostingList,
+                                          unique_ids=True)
+        # 4. Token Index: every word of every name is inserted into a second
+        # trie (node mode) so each word is prefix-searchable on its own.
+        self.token_index = self._new_token_index() if index_tokens else None
         # Prefix cache (Trie-backed) for case-insensitive prefix queries
-        self._prefix_cache = PrefixCacheTrie()
+        # Both caches are unbounded unless cache_entries/cache_bytes is set;
+        # then each evicts by cache_policy ("lru" or "lfu")
+        self._prefix_cache = PrefixCacheTrie(cache_entries, cache_bytes, cache_policy)
         # Category cache: maps category -> list of SKUs
-        self._category_cache: dict[str, list[str]] = {}
+        self._category_cache = BoundedCache(cache_entries, cache_bytes, cache_policy)
+        # cache_write_through=True patches cached prefix lists on add, remove
+        # and rename instead of invalidating them, so hot prefixes stay warm
+        self._cache_write_through = cache_write_through
+        # Ranked autocomplete: with rank_topk > 0 every trie node keeps its
+        # best `rank_topk` ids by `rank_key`. Scores are indexed by SKU id.
+        self._rank_topk = rank_topk
+        self._rank_key = rank_key
+        self._rank_scores = array('d')
+        if rank_topk:
+            self.search_trie.enable_topk(rank_topk, self._rank_scores)
+        # Vectorized analytics: NumPy price/quantity/category columns indexed
+        # by SKU id, kept in sync by every mutation (requires numpy)
+        self.analytics = InventoryAnalytics(self) if analytics else None
+        # 5. Ordered secondary indexes of (value, SKU id) for price and
+        # quantity range queries in O(log n + k)
+        self.price_index = SortedIndex('d') if range_indexes else None
+        self.quantity_index = SortedIndex('q') if range_indexes else None
+        # Low-stock tracker: indexed min-heap of SKU ids ordered by
+        # quantity - reorder point, with threshold-crossing callbacks
+        self.low_stock = LowStockTracker(self, reorder_point) if low_stock else None
+        # Change feed: every successful mutation appends a sequence-numbered
+        # event that mirrors (search, pricing, reporting) consume in batches
+        self.change_feed = change_feed
+        # Operation trace: public calls are recorded for offline replay.
+        # Attached before the metrics, whose wrappers then time the recorder
+        self.trace = trace
+        if trace is not None:
+            trace.attach(self)
+        # Instrumentation: while `metrics` is enabled the query/mutation
+        # methods, trie search and cache lookups are timed
+        self.metrics = metrics
+        if metrics is not None:
+            self._instrument(metrics)
+        # Write-ahead log: state is rebuilt from it once (through bulk_load),
+        # then every successful mutation is appended to it
+        self._wal = None
+        if wal is not None:
+            recovered = wal.replay()
+            if recovered:
+                self.bulk_load(recovered)
+            self._wal = wal
 
     # This function populates the inventory with sample data for testing
     def populate_sample_data(self):
@@ -95,20 +390,35 @@ class InventoryManager:
         if product.sku in self.products:
             print(f"Product with SKU {product.sku} already exists. Please update instead of adding.")
             return
+        sku_id = self._intern_sku(product.sku)
         self.products[product.sku] = product
 
         # Update category index with the new sku
         if product.category not in self.categories:
-            self.categories[product.category] = set()
-        self.categories[product.category].add(product.sku)
+            self.categories[product.category] = PostingList()
+        self.categories[product.category].add(sku_id)
+        if self.analytics is not None:
+            self.analytics.set_product(sku_id, product)
+        if self.price_index is not None:
+            self.price_index.add(product.price, sku_id)
+            self.quantity_index.add(product.quantity, sku_id)
+        if self.low_stock is not None:
+            self.low_stock.add(sku_id, product.sku, product.quantity)
 
         # Update search trie (store lowercase names to make searches case-insensitive)
         name_norm = product.name.lower()
-        self.search_trie.insert(name_norm, product.sku)
-        # Invalidate prefix cache entries affected by this product's name because of new addition . This ensures correctness.
-        self._prefix_cache.invalidate_prefixes_of_name(name_norm)
+        self.search_trie.insert(name_norm, sku_id)
+        self._rank(product, sku_id)
+        self._index_tokens(name_norm, sku_id)
+        # Invalidate (or, in write-through mode, patch) prefix cache entries affected by this product's name
+        self._cache_name_added(name_norm, product.sku)
         # Invalidate category cache for this product's category
         self._category_cache.pop(product.category, None)
+        if self._wal is not None:
+            self._wal.log(["add", product.sku, product.name, product.price, product.quantity, product.category])
+        if self.change_feed is not None:
+            self.change_feed.append("add", product.sku, (product.name, product.price, product.quantity,
+                                                         product.category))
 
     # Function to remove a product from the inventory
     # This function updates all data structures accordingly
@@ -117,26 +427,40 @@ class InventoryManager:
     # 3 : Remove from search trie
     def remove_product(self, product: Product | str):
         """Remove a product by Product instance or SKU string."""
-        sku = product.sku if isinstance(product, Product) else product
+        sku = product.sku if isinstance(product, ProductBase) else product
         prod = self.products.get(sku)
         if not prod:
             return
 
         # Remove from primary hash table
         del self.products[sku]
+        sku_id = self._release_sku(sku)
+        if self.analytics is not None:
+            self.analytics.remove(sku_id)
+        if self.price_index is not None:
+            self.price_index.remove(prod.price, sku_id)
+            self.quantity_index.remove(prod.quantity, sku_id)
+        if self.low_stock is not None:
+            self.low_stock.remove(sku_id, sku)
 
         # Remove from category index
         if prod.category in self.categories:
-            self.categories[prod.category].discard(sku)
+            self.categories[prod.category].discard(sku_id)
             if not self.categories[prod.category]:
                 del self.categories[prod.category]
 
         # Remove from search trie (names stored normalized)
-        self.search_trie.delete(prod.name.lower(), sku)
-        # Invalidate prefix cache entries affected by this product's name
-        self._prefix_cache.invalidate_prefixes_of_name(prod.name)
+        self.search_trie.delete(prod.name.lower(), sku_id)
+        self.search_trie.rank_remove(prod.name.lower(), sku_id)
+        self._unindex_tokens(prod.name.lower(), sku_id)
+        # Invalidate (or patch) prefix cache entries affected by this product's name
+        self._cache_name_removed(prod.name.lower(), sku)
         # Invalidate category cache for this product's category
         self._category_cache.pop(prod.category, None)
+        if self._wal is not None:
+            self._wal.log(["remove", sku])
+        if self.change_feed is not None:
+            self.change_feed.append("remove", sku)
 
     def remove_product_by_sku(self, sku: str):
         """Convenience method to remove by SKU."""
@@ -156,8 +480,51 @@ class InventoryManager:
             print("Quantity cannot be negative.")
             return
         
+        self._set_quantity(sku, product, quantity)
+
+    # Guard for a check-then-act change of the stock of `skus` (used by
+    # POSSystem). Single-threaded managers need none; see
+    # ConcurrentInventoryManager for the striped per-SKU locks.
+    def stock_lock(self, skus):
+        return nullcontext()
+
+    # Group the logged records of a multi-step change into one atomic WAL
+    # frame, and postpone commits (fsync) to the end of a batch, or with
+    # commit=False hand the batch to wal_commit, e.g. on another thread.
+    # All are no-ops without a write-ahead log.
+    def wal_transaction(self):
+        return self._wal.transaction() if self._wal is not None else nullcontext()
+
+    def wal_deferred_commit(self, commit: bool = True):
+        return self._wal.deferred(commit) if self._wal is not None else nullcontext([0])
+
+    def wal_commit(self, seq: int):
+        if self._wal is not None:
+            self._wal.commit(seq)
+
+    def _set_quantity(self, sku: str, product: Product, quantity: int, cause: str = "qty"):
+        """Store a validated quantity and keep the quantity-keyed indexes in sync.
+
+        Callers (update_quantity, POSSystem carts) have already looked the
+        product up and checked the value, so nothing is fetched or printed.
+        `cause` ("qty", "sale" or "return") is the change-feed event type.
+        """
+        sku_id = self._sku_ids[sku]
+        if self.quantity_index is not None:
+            self.quantity_index.remove(product.quantity, sku_id)
+            self.quantity_index.add(quantity, sku_id)
         product.quantity = quantity
-        self.products[product.sku] = product
+        if self.analytics is not None:
+            self.analytics.set_quantity(sku_id, quantity)
+        if self._rank_topk:
+            self._rank(product, sku_id)
+        if self.low_stock is not None:
+            # O(log n) re-sift; fires callbacks if the reorder point is crossed
+            self.low_stock.update(sku_id, sku, quantity)
+        if self._wal is not None:
+            self._wal.log(["qty", sku, quantity])
+        if self.change_feed is not None:
+            self.change_feed.append(cause, sku, quantity)
         
         
     # Retrieve a product by its SKU
@@ -170,15 +537,18 @@ class InventoryManager:
     # Time complexity : O(1) + O(n)
     # where n is number of products in that category
     # Space complexity : O(n) for the returned list
-    def get_products_by_category(self, category: str):
+    # `limit` returns only the first `limit` products, without building the rest
+    def get_products_by_category(self, category: str, limit: int | None = None):
         # O(1) lookup in category index
         if category in self.categories:
             # use category cache if available
             cached = self._category_cache.get(category)
             if cached is not None:
-                return [self.products[sku] for sku in cached]
-            skus = list(self.categories[category])
-            self._category_cache[category] = list(skus)
+                return [self.products[sku] for sku in cached[:limit]]
+            if limit is not None:
+                return self._products_for_ids(self.categories[category][:limit])
+            skus = self._skus_for_ids(self.categories[category])
+            self._category_cache[category] = skus
             return [self.products[sku] for sku in skus]
         return []
 
@@ -186,24 +556,43 @@ class InventoryManager:
     # Time complexity : O(m) + O(n)
     # where m is length of the prefix and n is number of matching products
     # Space complexity : O(n) for the returned list
-    def get_products_by_name_prefix(self, prefix: str, limit: int | None = None, as_generator: bool = False):
+    def get_products_by_name_prefix(self, prefix: str, limit: int | None = None, as_generator: bool = False,
+                                    ranked: bool = False):
         """Retrieve products matching a name prefix.
 
         - `limit` optionally limits the number of returned products.
         - `as_generator=True` returns a generator that yields Product objects
           lazily (useful for very large result sets).
+        - `ranked=True` orders results by the `rank_key` score (best first).
+          With `rank_topk` enabled and `limit <= rank_topk` the answer comes
+          straight from the precomputed per-node top-k list in
+          O(len(prefix) + limit).
         This method employs a simple cache for repeated prefix queries; the
         cache is cleared on any inventory mutation.
+        In subtree mode (`store_skus_in_trie=False`) a cache miss with a
+        `limit` or `as_generator=True` streams the trie lazily in
+        lexicographic order instead of collecting the whole subtree.
         """
         # normalize prefix to lower-case for case-insensitive caching/search
         key = prefix.lower()
-        skus = self._prefix_cache.get(key)
-        if skus is not None:
-            skus = list(skus)
+        if ranked:
+            skus = self._ranked_prefix_skus(key, limit)
         else:
-            skus = list(self.search_trie.search(key))
-            # populate prefix cache trie node for this prefix
-            self._prefix_cache.set(key, skus)
+            skus = self._prefix_cache.get(key, limit)
+            if skus is not None:
+                skus = list(skus)
+            elif not self.search_trie.store_skus_in_nodes and as_generator and limit is None:
+                return self.iter_products_by_name_prefix(prefix)
+            elif not self.search_trie.store_skus_in_nodes and limit is not None:
+                # stop walking the subtree as soon as `limit` matches are produced
+                id_skus = self._id_skus
+                skus = [id_skus[sku_id] for _, sku_id in islice(self.search_trie.iter_prefix(key), limit)]
+                # a short page means the stream was exhausted, i.e. the list is complete
+                self._prefix_cache.set(key, skus, partial=len(skus) == limit)
+            else:
+                skus = self._skus_for_ids(self.search_trie.search(key))
+                # populate prefix cache trie node for this prefix
+                self._prefix_cache.set(key, skus)
 
         if limit is not None:
             skus = skus[:limit]
@@ -216,35 +605,306 @@ class InventoryManager:
 
         return [self.products[sku] for sku in skus]
 
+    # Stream products by name prefix in lexicographic (normalized name) order
+    # Time complexity : O(m) + O(nodes visited for the items consumed)
+    def iter_products_by_name_prefix(self, prefix: str, cursor=None):
+        """Lazily yield products whose name starts with `prefix`.
+
+        Products are yielded in lexicographic order of their lower-cased name
+        (ties by insertion order). `cursor` resumes after a position returned
+        by `get_products_page`.
+        """
+        id_skus = self._id_skus
+        products = self.products
+        for _, sku_id in self.search_trie.iter_prefix(prefix.lower(), cursor):
+            yield products[id_skus[sku_id]]
+
+    def get_products_page(self, prefix: str, limit: int, cursor=None):
+        """Return `(products, next_cursor)` for one page of a prefix query.
+
+        `next_cursor` is an opaque value to pass back for the following page,
+        or None once the matches are exhausted. Each call only walks the part
+        of the trie needed for its own page.
+        """
+        id_skus = self._id_skus
+        entries = list(islice(self.search_trie.iter_prefix(prefix.lower(), cursor), limit))
+        page = [self.products[id_skus[sku_id]] for _, sku_id in entries]
+        next_cursor = entries[-1] if len(entries) == limit and entries else None
+        return page, next_cursor
+
+    # Retrieve products in a price range using the ordered price index
+    # Time complexity : O(log n + k) where k is offset + number returned
+    def get_products_by_price_range(self, min_price: float | None = None, max_price: float | None = None,
+                                    limit: int | None = None, offset: int = 0):
+        """Products with min_price <= price <= max_price, cheapest first.
+
+        `None` bounds are open; `offset`/`limit` page through the matches.
+        Requires `range_indexes=True`.
+        """
+        if self.price_index is None:
+            raise ValueError("range indexes are disabled; construct with range_indexes=True")
+        return self._products_for_ids(self.price_index.irange(min_price, max_price, offset, limit))
+
+    # Retrieve products in a quantity range using the ordered quantity index
+    # Time complexity : O(log n + k) where k is offset + number returned
+    def get_products_by_quantity_range(self, min_quantity: int | None = None, max_quantity: int | None = None,
+                                       limit: int | None = None, offset: int = 0):
+        """Products with min_quantity <= quantity <= max_quantity, lowest first.
+
+        Useful for reorder reports, e.g. `get_products_by_quantity_range(max_quantity=5)`.
+        Requires `range_indexes=True`.
+        """
+        if self.quantity_index is None:
+            raise ValueError("range indexes are disabled; construct with range_indexes=True")
+        return self._products_for_ids(self.quantity_index.irange(min_quantity, max_quantity, offset, limit))
+
+    # Most critical products by stock relative to their reorder point
+    # Time complexity : O(k log k) for k results, independent of inventory size
+    def get_most_critical_products(self, limit: int = 10):
+        """Return the `limit` products with the lowest quantity - reorder point.
+
+        Requires `low_stock=True`.
+        """
+        if self.low_stock is None:
+            raise ValueError("low-stock tracking is disabled; construct with low_stock=True")
+        return [self.products[sku] for sku in self.low_stock.most_critical(limit)]
+
+    def get_low_stock_products(self, limit: int | None = None):
+        """Return products at or below their reorder point, most critical first."""
+        if self.low_stock is None:
+            raise ValueError("low-stock tracking is disabled; construct with low_stock=True")
+        return [self.products[sku] for sku in self.low_stock.below_reorder_point(limit)]
+
+    def set_reorder_point(self, sku: str, reorder_point: int) -> bool:
+        """Override the reorder point of one SKU; returns False if not found."""
+        if self.low_stock is None:
+            raise ValueError("low-stock tracking is disabled; construct with low_stock=True")
+        product = self.get_product_by_sku(sku)
+        if product is None:
+            return False
+        self.low_stock.set_reorder_point(sku, reorder_point, product.quantity)
+        return True
+
+    # Typo-tolerant prefix search over the search trie
+    # Time complexity : O(visited nodes * m) where m is the length of the query;
+    # branches beyond the edit budget are pruned, so visited nodes stay far
+    # below the catalog size for small budgets
+    def get_products_by_fuzzy_prefix(self, prefix: str, max_distance: int | None = None,
+                                     limit: int | None = 50, transpositions: bool = True):
+        """Retrieve products whose name starts with something close to `prefix`.
+
+        - `max_distance` is the edit budget. By default it scales with the
+          query length: 0 for up to 2 characters, 1 up to 5, else 2.
+        - `transpositions=True` counts a swap of adjacent characters as one
+          edit (Damerau), which covers the most common typing mistake.
+        Results are ordered by edit distance (closest first) and capped at
+        `limit`.
+        """
+        key = prefix.lower()
+        if max_distance is None:
+            max_distance = 0 if len(key) <= 2 else 1 if len(key) <= 5 else 2
+        matches = self.search_trie.fuzzy_search(key, max_distance, limit, transpositions)
+        id_skus = self._id_skus
+        return [self.products[id_skus[sku_id]] for _, sku_id in matches]
+
+    # Retrieve products whose name contains a word starting with each query term
+    # Time complexity : O(sum of term lengths) + O(s log l) per intersection
+    # where s is the smallest posting list and l the one it is probed against
+    def get_products_by_tokens(self, query: str, limit: int | None = None):
+        """Multi-term, mid-name search over the token index.
+
+        Every whitespace-separated term of `query` is treated as a word
+        prefix (so the last, partially typed term works for autocomplete):
+        "iph 13" finds "Apple iPhone 13". The posting lists of all terms are
+        intersected smallest-first. Requires `index_tokens=True`.
+        """
+        if self.token_index is None:
+            raise ValueError("token index is disabled; construct with index_tokens=True")
+        postings = []
+        for term in set(query.lower().split()):
+            node = self.token_index._find_node(term)
+            if node is None or not node.skus:
+                return []
+            postings.append(node.skus)
+        if not postings:
+            return []
+        postings.sort(key=len)
+        result = postings[0]
+        for i, posting in enumerate(postings[1:], start=2):
+            # only the last intersection may stop early at `limit`
+            result = result.intersection(posting, limit if i == len(postings) else None)
+            if not result:
+                return []
+        ids = result[:limit] if limit is not None else result
+        return [self.products[sku] for sku in self._skus_for_ids(ids)]
+
     # Get all categories in the inventory
     # Time complexity : O(1)
     # Space complexity : O(n) for the returned list
     def get_categories(self):
         return list(self.categories.keys())
 
-    def bulk_load(self, products_iterable):
+    def bulk_load(self, products_iterable, processes: int = 0):
         """Efficiently load many products.
 
         This replaces the existing data structures with ones built from the
         provided iterable. This is faster than calling `add_product` repeatedly
         because it avoids repeated cache clears and incremental trie updates.
+        The iterable is consumed as a stream: each product is indexed as it
+        arrives, so a generator (e.g. `CatalogImporter.iter_catalog`) never
+        has to be materialized, and with `columnar=True` the Product objects
+        are dropped as soon as they are copied into the columns. A SKU that
+        appears twice keeps its first position and its last values.
+        The tries are built once the input is exhausted, in one pass over
+        the sorted names (`Trie.build`); `processes > 1` builds shards of
+        them in that many worker processes.
+        With a write-ahead log attached, the loaded catalog is written as the
+        new snapshot and the log is truncated.
+        If the iterable (or the trie build) raises, the previous catalog and
+        its indexes are put back before the exception propagates.
         """
-        # rebuild primary dict
-        self.products = {p.sku: p for p in products_iterable}
-
-        # rebuild categories
+        previous = (self._sku_ids, self._id_skus, self._free_ids, self.products, self.categories,
+                    self.search_trie, self.token_index)
+        # re-intern SKUs: ids follow load order so posting lists are built by appends
+        self._sku_ids = {}
+        self._id_skus = []
+        self._free_ids = []
+        self.products = ColumnarProductStore(self) if self._columnar else {}
         self.categories = {}
-        for p in self.products.values():
-            self.categories.setdefault(p.category, set()).add(p.sku)
+        # Every node and product created here is long-lived: without the
+        # cyclic GC, full collections would rescan the growing trie over and
+        # over while the input is parsed
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for p in products_iterable:
+                self._load_one(p)
+            # rebuild the tries from scratch over the final names
+            names = [p.name.lower() for p in self._loaded_products()]
+            self._build_search_trie(names, processes)
+            self._build_token_index(names, processes)
+        except BaseException:
+            # e.g. a malformed import row: nothing has been swapped in that
+            # the old catalog's ids would not match
+            (self._sku_ids, self._id_skus, self._free_ids, self.products, self.categories,
+             self.search_trie, self.token_index) = previous
+            raise
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        self._load_value_indexes()
+        self._finish_load()
+
+    def _load_one(self, p: Product):
+        """Index one product of a bulk load (ids are appended, never reused)."""
+        sku_id = self._sku_ids.get(p.sku)
+        if sku_id is None:
+            sku_id = len(self._id_skus)
+            self._sku_ids[p.sku] = sku_id
+            self._id_skus.append(p.sku)
+            self.products[p.sku] = p
+            self.categories.setdefault(p.category, PostingList()).append(sku_id)
+            return
+        # duplicate SKU: the later row wins
+        old_category = self.products[p.sku].category
+        self.products[p.sku] = p
+        if p.category != old_category:
+            posting = self.categories[old_category]
+            posting.discard(sku_id)
+            if not posting:
+                del self.categories[old_category]
+            self.categories.setdefault(p.category, PostingList()).add(sku_id)
+
+    # Save the whole inventory as a binary snapshot (see Snapshot.py)
+    def save_snapshot(self, path: str):
+        write_snapshot(self, path)
+
+    # Replace the inventory with a snapshot written by save_snapshot
+    # Time complexity : O(n) memcpy/string splitting for the columns; the
+    # search trie and token index are mapped, not rebuilt
+    def load_snapshot(self, path: str):
+        """Load a `save_snapshot` file through mmap.
+
+        With a matching trie layout (same `compress_trie` and
+        `store_skus_in_trie`) the tries are served straight from the mapping
+        and decoded node by node as queries reach them; otherwise they are
+        rebuilt from the names. With `columnar=True` no per-product objects
+        are created. `rank_topk`, analytics, range indexes and the low-stock
+        tracker are rebuilt as in `bulk_load`, which touches every product.
+        """
+        snapshot = MappedSnapshot(path)
+        n = snapshot.rows
+        self._id_skus = snapshot.strings("skus", n)
+        self._sku_ids = {sku: i for i, sku in enumerate(self._id_skus)}
+        self._free_ids = []
+        names = snapshot.strings("names", n)
+        prices = snapshot.column("prices", 'd')
+        quantities = snapshot.column("quantities", 'q')
+        category_ids = snapshot.column("category_ids", 'I')
+        category_names = snapshot.category_names()
+        if self._columnar:
+            self.products = ColumnarProductStore(self)
+            self.products.load_columns(prices, quantities, category_ids, names, category_names)
+        else:
+            self.products = {sku: Product(sku, names[i], prices[i], quantities[i], category_names[category_ids[i]])
+                             for i, sku in enumerate(self._id_skus)}
+        self.categories = snapshot.categories()
+
+        store_nodes = self.search_trie.store_skus_in_nodes
+        same_engine = snapshot.radix == (self._trie_cls is RadixTrie)
+        if same_engine and snapshot.store_skus_in_nodes == store_nodes:
+            self.search_trie = snapshot.search_trie()
+        else:
+            self._build_search_trie([name.lower() for name in names])
+        if self.token_index is not None:
+            if same_engine and snapshot.has_token_index:
+                self.token_index = snapshot.token_index()
+            else:
+                self._build_token_index([name.lower() for name in names])
+
+        self._load_value_indexes()
+        self._finish_load()
+
+    def _loaded_products(self):
+        """Products in id order; valid right after a load, while ids are 0..n-1."""
+        products = self.products
+        return (products[sku] for sku in self._id_skus)
+
+    def _load_value_indexes(self):
+        """Rebuild the price/quantity-keyed structures for ids 0..n-1."""
+        if self.analytics is not None:
+            self.analytics.load(self._loaded_products())
+        if self.price_index is not None:
+            ids = range(len(self._id_skus))
+            self.price_index = SortedIndex.from_pairs(array('d', (p.price for p in self._loaded_products())),
+                                                      ids, 'd')
+            self.quantity_index = SortedIndex.from_pairs(array('q', (p.quantity for p in self._loaded_products())),
+                                                         ids, 'q')
+        if self.low_stock is not None:
+            self.low_stock.load(self._id_skus, [p.quantity for p in self._loaded_products()])
 
-        # rebuild trie from scratch (faster than many incremental inserts in some modes)
-        self.search_trie = Trie(store_skus_in_nodes=self.search_trie.store_skus_in_nodes)
-        for p in self.products.values():
-            # insert normalized (lowercase) names into the search trie
-            self.search_trie.insert(p.name.lower(), p.sku)
+    def _finish_load(self):
+        """Shared tail of bulk_load/load_snapshot once ids and tries are set."""
+        # rebuild ranking scores and top-k lists in one bottom-up pass
+        if self._rank_topk:
+            self._rank_scores = array('d', (self._rank_key(p) for p in self._loaded_products()))
+            self.search_trie.enable_topk(self._rank_topk, self._rank_scores)
 
-        # reset cache
+        # reset caches
         self._prefix_cache.clear()
+        self._category_cache.clear()
+
+        # the loaded catalog replaces all logged history: persist it as the
+        # new snapshot and start an empty log
+        if self._wal is not None:
+            self._wal.write_snapshot(self.products.values())
+        # mirrors cannot follow a wholesale replacement event by event
+        if self.change_feed is not None:
+            self.change_feed.append("load", None, len(self.products))
+        # the tries were replaced: move the timing wrappers to the new ones
+        if self.metrics is not None:
+            self.metrics.rebind()
 
     def update_product_name(self, sku: str, new_name: str) -> bool:
         """Rename a product (update its name) while updating indexes/cache.
@@ -263,16 +923,25 @@ class InventoryManager:
             return True
 
         # Update trie: remove old name mapping and add new name mapping (normalized)
-        self.search_trie.delete(old_name.lower(), sku)
-        self.search_trie.insert(new_name.lower(), sku)
+        sku_id = self._sku_ids[sku]
+        self.search_trie.delete(old_name.lower(), sku_id)
+        self.search_trie.rank_remove(old_name.lower(), sku_id)
+        self.search_trie.insert(new_name.lower(), sku_id)
+        self._unindex_tokens(old_name.lower(), sku_id)
+        self._index_tokens(new_name.lower(), sku_id)
 
         # Update product record
         product.name = new_name
         self.products[sku] = product
+        self._rank(product, sku_id)
 
-        # Invalidate cache for prefixes affected by both old and new names
-        self._invalidate_prefix_cache_for_name(old_name)
-        self._invalidate_prefix_cache_for_name(new_name)
+        # Invalidate (or patch) cache for prefixes affected by both old and new names
+        self._cache_name_removed(old_name.lower(), sku)
+        self._cache_name_added(new_name.lower(), sku)
+        if self._wal is not None:
+            self._wal.log(["name", sku, new_name])
+        if self.change_feed is not None:
+            self.change_feed.append("name", sku, new_name)
         return True
 
     def update_product_category(self, sku: str, new_category: str) -> bool:
@@ -290,16 +959,19 @@ class InventoryManager:
         if old_category == new_category:
             return True
 
+        sku_id = self._sku_ids[sku]
         # Remove from old category index
         if old_category in self.categories:
-            self.categories[old_category].discard(sku)
+            self.categories[old_category].discard(sku_id)
             if not self.categories[old_category]:
                 del self.categories[old_category]
 
         # Add to new category index
         if new_category not in self.categories:
-            self.categories[new_category] = set()
-        self.categories[new_category].add(sku)
+            self.categories[new_category] = PostingList()
+        self.categories[new_category].add(sku_id)
+        if self.analytics is not None:
+            self.analytics.set_category(sku_id, new_category)
 
         # Update product record
         product.category = new_category
@@ -308,9 +980,283 @@ class InventoryManager:
         # Invalidate category cache entries for old and new categories only
         self._category_cache.pop(old_category, None)
         self._category_cache.pop(new_category, None)
+        if self._wal is not None:
+            self._wal.log(["cat", sku, new_category])
+        if self.change_feed is not None:
+            self.change_feed.append("category", sku, new_category)
 
         return True
 
+    # Bulk variants of update_quantity / update_product_name /
+    # update_product_category for restock files and catalog
+    # edits. Each takes an iterable of `(sku, value)` changes (the last
+    # change of a SKU wins, unknown SKUs are skipped), touches each index
+    # once per batch and logs the batch as one WAL frame. They return the
+    # number of products changed.
+
+    # Time complexity : O(k log n) for k changes; O(n) when k > n / 8 and the
+    # quantity index is re-keyed in one merge
+    def update_quantities(self, changes) -> int:
+        """Set many quantities. Unknown SKUs and negative quantities are skipped."""
+        # the last valid quantity of a repeated SKU wins, as with a loop of
+        # update_quantity calls
+        latest = {}
+        for sku, quantity in changes:
+            if quantity >= 0:
+                latest[sku] = quantity
+        items = []
+        for sku, quantity in latest.items():
+            product = self.products.get(sku)
+            if product is not None and product.quantity != quantity:
+                items.append((sku, product, quantity))
+        with self.wal_transaction():
+            self._set_quantities(items)
+        return len(items)
+
+    def _set_quantities(self, items: list):
+        """`_set_quantity` for every `(sku, product, quantity)` of a validated batch."""
+        # the quantity index is re-keyed in one batch (see
+        # SortedIndex.move_many), so it is detached from the per-product body
+        index = self.quantity_index
+        if index is not None:
+            sku_ids = self._sku_ids
+            moves = [(product.quantity, quantity, sku_ids[sku]) for sku, product, quantity in items]
+            self.quantity_index = None
+        try:
+            # the per-product body only: ConcurrentInventoryManager locks the
+            # batch as a whole
+            for sku, product, quantity in items:
+                InventoryManager._set_quantity(self, sku, product, quantity)
+        finally:
+            if index is not None:
+                # if a low-stock callback raised, only the products already
+                # changed are moved
+                index.move_many([move for move, (_, product, quantity) in zip(moves, items)
+                                 if product.quantity == quantity])
+                self.quantity_index = index
+
+    # Time complexity : O(k (m + log k)) trie edits for k renames of length m
+    def update_product_names(self, changes) -> int:
+        """Rename many products.
+
+        Trie deletions and insertions are applied in sorted key order, so
+        consecutive edits walk shared paths, and every cached prefix
+        entry affected by the batch is invalidated (or, with
+        `cache_write_through`, rewritten) once.
+        """
+        renames = []
+        for sku, new_name in dict(changes).items():
+            product = self.products.get(sku)
+            if product is not None and product.name != new_name:
+                renames.append((sku, self._sku_ids[sku], product, product.name, new_name))
+        if not renames:
+            return 0
+
+        trie = self.search_trie
+        for old_norm, sku_id in sorted((old.lower(), sku_id) for _, sku_id, _, old, _ in renames):
+            trie.delete(old_norm, sku_id)
+            trie.rank_remove(old_norm, sku_id)
+        for new_norm, sku_id in sorted((new.lower(), sku_id) for _, sku_id, _, _, new in renames):
+            trie.insert(new_norm, sku_id)
+        for sku, sku_id, product, old_name, new_name in renames:
+            self._unindex_tokens(old_name.lower(), sku_id)
+            self._index_tokens(new_name.lower(), sku_id)
+            product.name = new_name
+            self.products[sku] = product
+            self._rank(product, sku_id)
+
+        if self._cache_write_through:
+            if self._prefix_cache:
+                order_key = self._sku_ids.__getitem__ if trie.store_skus_in_nodes else None
+                self._prefix_cache.patch_prefixes([(old.lower(), sku) for sku, _, _, old, _ in renames],
+                                                  [(new.lower(), sku) for sku, _, _, _, new in renames], order_key)
+        elif self._prefix_cache:
+            self._prefix_cache.invalidate_prefixes_of_names(
+                [name for _, _, _, old, new in renames for name in (old, new)])
+        if self._wal is not None:
+            with self.wal_transaction():
+                for sku, _, _, _, new_name in renames:
+                    self._wal.log(["name", sku, new_name])
+        if self.change_feed is not None:
+            self.change_feed.extend(("name", sku, new_name) for sku, _, _, _, new_name in renames)
+        return len(renames)
+
+    # Time complexity : O(k log n), or O(k + size of the affected category
+    # postings) when a category receives many of the moves
+    def update_product_categories(self, changes) -> int:
+        """Move many products between categories.
+
+        Moves are grouped by category: each affected posting list is
+        updated once (`PostingList.update` / `difference_update`) and each
+        affected category cache entry is dropped once.
+        """
+        moves = []
+        for sku, new_category in dict(changes).items():
+            product = self.products.get(sku)
+            if product is not None and product.category != new_category:
+                moves.append((sku, self._sku_ids[sku], product, product.category, new_category))
+        if not moves:
+            return 0
+
+        leaving: dict[str, set[int]] = {}
+        joining: dict[str, list[int]] = {}
+        for _, sku_id, _, old_category, new_category in moves:
+            leaving.setdefault(old_category, set()).add(sku_id)
+            joining.setdefault(new_category, []).append(sku_id)
+        # new categories are created in first-seen order, as by single moves
+        for category in dict.fromkeys([*leaving, *joining]):
+            posting = self.categories.get(category)
+            if posting is None:
+                posting = self.categories[category] = PostingList()
+            if category in leaving:
+                posting.difference_update(leaving[category])
+            if category in joining:
+                posting.update(joining[category])
+            if not posting:
+                del self.categories[category]
+            self._category_cache.pop(category, None)
+
+        for sku, sku_id, product, _, new_category in moves:
+            if self.analytics is not None:
+                self.analytics.set_category(sku_id, new_category)
+            product.category = new_category
+            self.products[sku] = product
+        if self._wal is not None:
+            with self.wal_transaction():
+                for sku, _, _, _, new_category in moves:
+                    self._wal.log(["cat", sku, new_category])
+        if self.change_feed is not None:
+            self.change_feed.extend(("category", sku, new_category) for sku, _, _, _, new_category in moves)
+        return len(moves)
+
+    def refresh_rank(self, sku: str) -> bool:
+        """Recompute the ranking score of `sku` and update the top-k lists.
+
+        Call this when `rank_key` depends on state outside the product
+        record (e.g. a sales-velocity table). Returns False if the SKU is
+        unknown.
+        """
+        product = self.get_product_by_sku(sku)
+        if not product:
+            return False
+        self._rank(product, self._sku_ids[sku])
+        return True
+
+    def _rank(self, product: Product, sku_id: int):
+        """Store the score of `product` and re-rank it in the trie top-k lists."""
+        if not self._rank_topk:
+            return
+        scores = self._rank_scores
+        if sku_id >= len(scores):
+            scores.extend([0.0] * (sku_id + 1 - len(scores)))
+        scores[sku_id] = self._rank_key(product)
+        self.search_trie.rank_update(product.name.lower(), sku_id)
+
+    def _ranked_prefix_skus(self, key: str, limit: int | None) -> list[str]:
+        """SKUs matching normalized prefix `key`, best `rank_key` score first."""
+        if self._rank_topk and limit is not None:
+            ids = self.search_trie.top(key, limit)
+            if ids is not None:
+                return self._skus_for_ids(ids)
+        # no precomputed list covers this request: rank the full match set
+        products = self.products
+        rank_key = self._rank_key
+        skus = self._skus_for_ids(self.search_trie.search(key))
+        skus.sort(key=lambda sku: -rank_key(products[sku]))
+        return skus
+
+    def _intern_sku(self, sku: str) -> int:
+        """Assign a dense integer id to a newly added SKU."""
+        if self._free_ids:
+            sku_id = self._free_ids.pop()
+            self._id_skus[sku_id] = sku
+        else:
+            sku_id = len(self._id_skus)
+            self._id_skus.append(sku)
+        self._sku_ids[sku] = sku_id
+        return sku_id
+
+    def _release_sku(self, sku: str) -> int:
+        """Drop a SKU from the interning table and return its (now free) id."""
+        sku_id = self._sku_ids.pop(sku)
+        self._id_skus[sku_id] = None
+        self._free_ids.append(sku_id)
+        return sku_id
+
+    def _new_token_index(self):
+        return self._trie_cls(store_skus_in_nodes=True, posting=PostingList)
+
+    def _build_search_trie(self, names: list[str], processes: int = 0):
+        """Replace the search trie with one holding `names[i] -> i`."""
+        self.search_trie = self._trie_cls(store_skus_in_nodes=self.search_trie.store_skus_in_nodes, posting=PostingList,
+                                          unique_ids=True)
+        self.search_trie.build(names, range(len(names)), processes)
+
+    def _build_token_index(self, names: list[str], processes: int = 0):
+        """Replace the token index with one holding every word of `names[i]` -> i."""
+        if self.token_index is None:
+            return
+        tokens = []
+        ids = []
+        for sku_id, name_norm in enumerate(names):
+            for token in set(name_norm.split()):
+                tokens.append(token)
+                ids.append(sku_id)
+        self.token_index = self._new_token_index()
+        self.token_index.build(tokens, ids, processes)
+
+    def _index_tokens(self, name_norm: str, sku_id: int):
+        if self.token_index is None:
+            return
+        for token in set(name_norm.split()):
+            self.token_index.insert(token, sku_id)
+
+    def _unindex_tokens(self, name_norm: str, sku_id: int):
+        # All tokens of a name are removed together: in node mode a prefix
+        # node shared by two tokens of the same name only drops the id once
+        # both are gone.
+        if self.token_index is None:
+            return
+        for token in set(name_norm.split()):
+            self.token_index.delete(token, sku_id)
+
+    # Methods timed by `metrics`, by operation name
+    INSTRUMENTED_METHODS = ("add_product", "remove_product", "update_quantity", "update_product_name",
+                            "update_product_category", "update_quantities", "update_product_names",
+                            "update_product_categories", "get_product_by_sku", "get_products_by_category",
+                            "get_products_by_name_prefix", "get_products_page", "get_products_by_price_range",
+                            "get_products_by_quantity_range", "get_products_by_fuzzy_prefix",
+                            "get_products_by_tokens", "get_most_critical_products", "bulk_load",
+                            "save_snapshot", "load_snapshot")
+
+    def _instrument(self, metrics: Metrics):
+        # weak references: the metrics may outlive this manager
+        ref = weakref.ref(self)
+
+        def part(attr):
+            return lambda: getattr(ref(), attr, None)
+
+        metrics.instrument(ref, {name: name for name in self.INSTRUMENTED_METHODS})
+        metrics.instrument(part("search_trie"), {"search": "trie_search"})
+        metrics.instrument(part("_prefix_cache"), {"get": "prefix_cache_get"})
+        metrics.instrument(part("_category_cache"), {"get": "category_cache_get"})
+        metrics.add_source("inventory", lambda: ref().cache_stats() if ref() is not None else {})
+
+    def cache_stats(self) -> dict:
+        """Entries, bytes and hit/miss/eviction/invalidation counts of both caches."""
+        return {"prefix": self._prefix_cache.ledger.snapshot(),
+                "category": self._category_cache.ledger.snapshot()}
+
+    def _products_for_ids(self, ids) -> list[Product]:
+        id_skus = self._id_skus
+        products = self.products
+        return [products[id_skus[i]] for i in ids]
+
+    def _skus_for_ids(self, ids) -> list[str]:
+        """Translate a posting list of ids back to SKU strings."""
+        id_skus = self._id_skus
+        return [id_skus[i] for i in ids]
+
     def _invalidate_prefix_cache_for_name(self, name: str):
         """Invalidate only cache entries whose key is a prefix of `name`.
 
@@ -321,4 +1267,20 @@ class InventoryManager:
         if not self._prefix_cache:
             return
         # Use the PrefixCacheTrie's O(m) invalidation (case-insensitive)
-        self._prefix_cache.invalidate_prefixes_of_name(name)
\ No newline at end of file
+        self._prefix_cache.invalidate_prefixes_of_name(name)
+
+    def _cache_name_added(self, name_norm: str, sku: str):
+        """Account for `sku` now matching every prefix of `name_norm`."""
+        if not self._cache_write_through:
+            self._invalidate_prefix_cache_for_name(name_norm)
+        elif self._prefix_cache:
+            # node-mode results are listed in SKU-id order; keep that order
+            order_key = self._sku_ids.__getitem__ if self.search_trie.store_skus_in_nodes else None
+            self._prefix_cache.add_to_prefixes(name_norm, sku, order_key)
+
+    def _cache_name_removed(self, name_norm: str, sku: str):
+        """Account for `sku` no longer matching the prefixes of `name_norm`."""
+        if not self._cache_write_through:
+            self._invalidate_prefix_cache_for_name(name_norm)
+        elif self._prefix_cache:
+            self._prefix_cache.remove_from_prefixes(name_norm, sku)
@@ -0,0 +1,254 @@
+"""asyncio network front-end for POSSystem and InventoryManager queries.
+
+Protocol: line-delimited JSON over TCP. Each request is one line,
+
+    {"id": 1, "op": "sale", "sku": "SKU001", "quantity": 2}
+
+and gets exactly one response line, in request order:
+
+    {"id": 1, "ok": true, "result": {...}}
+    {"id": 1, "ok": false, "error": "insufficient stock"}
+
+`id` is optional and echoed back unchanged. Operations:
+
+- sale / return      sku, quantity          (one-line POS transaction)
+- transaction        lines=[[sku, qty]...], is_return=false
+- get                sku
+- prefix             prefix, limit=50, ranked=false
+- category           category
+- fuzzy              prefix, max_distance=null, limit=50
+- tokens             query, limit=null
+- price_range        min, max, limit=null, offset=0
+- quantity_range     min, max, limit=null, offset=0
+- critical           limit=10
+- categories
+
+Clients may pipeline: send many request lines without waiting. The server
+reads whatever has arrived, answers every complete line in the chunk in
+order, and writes all of their responses with one `write` and one
+`drain`, so a pipelined burst costs one syscall each way instead of one
+per request. With a write-ahead log the mutations of a burst share one
+deferred commit, made before the responses are written, so a burst costs
+one fsync rather than one per sale. The commit runs in the loop's default
+executor, so other clients are served while it waits for the disk. All
+requests run on the event loop thread, so a plain `InventoryManager`
+needs no locking here.
+
+A request line may be at most `max_line` bytes (default 1 MiB). A client
+that sends a longer one gets a "line too long" error and is disconnected,
+so a peer that never sends a newline cannot grow the buffer without bound.
+JSON nested too deeply to decode is answered as a bad request.
+
+Run with `python InventoryServer.py --port 8765 --products 100000`.
+"""
+
+import argparse
+import asyncio
+import json
+
+from InventoryManager import InventoryManager
+from OperationTrace import TraceRecorder
+from POSSystem import POSSystem
+from Product import Product
+from WriteAheadLog import WriteAheadLog
+
+_LINE_TOO_LONG = json.dumps({"id": None, "ok": False, "error": "line too long"}).encode() + b"\n"
+
+
+def product_to_dict(product) -> dict:
+    return {"sku": product.sku, "name": product.name, "price": product.price,
+            "quantity": product.quantity, "category": product.category}
+
+
+def transaction_to_dict(result) -> dict:
+    return {"total": result.total,
+            "lines": [{"sku": i.sku, "quantity": i.quantity, "unit_price": i.unit_price,
+                       "amount": i.amount} for i in result.lines]}
+
+
+class InventoryServer:
+    def __init__(self, inventory_manager: InventoryManager, host: str = "127.0.0.1", port: int = 8765,
+                 read_size: int = 1 << 16, max_line: int = 1 << 20):
+        self.inventory_manager = inventory_manager
+        self.pos = POSSystem(inventory_manager)
+        self.host = host
+        self.port = port
+        self._read_size = read_size
+        self._max_line = max_line
+        self._server: asyncio.AbstractServer | None = None
+        self._ops = {
+            "sale": self._op_sale,
+            "return": self._op_return,
+            "transaction": self._op_transaction,
+            "get": self._op_get,
+            "prefix": self._op_prefix,
+            "category": self._op_category,
+            "fuzzy": self._op_fuzzy,
+            "tokens": self._op_tokens,
+            "price_range": self._op_price_range,
+            "quantity_range": self._op_quantity_range,
+            "critical": self._op_critical,
+            "categories": self._op_categories,
+        }
+
+    # ---- lifecycle ----
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # port=0 asks the OS for a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---- connection handling ----
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = b""
+        loop = asyncio.get_running_loop()
+        manager = self.inventory_manager
+        try:
+            while True:
+                chunk = await reader.read(self._read_size)
+                if not chunk:
+                    break
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                if len(pending) > self._max_line or (lines and max(map(len, lines)) > self._max_line):
+                    writer.write(_LINE_TOO_LONG)
+                    await writer.drain()
+                    break
+                if not lines:
+                    continue
+                # answer the whole pipelined burst under one WAL commit, then
+                # flush once; the commit (fsync) must not block the loop
+                with manager.wal_deferred_commit(commit=False) as batch:
+                    responses = [self.handle_line(line) for line in lines if line.strip()]
+                if batch[0]:
+                    await loop.run_in_executor(None, manager.wal_commit, batch[0])
+                writer.write(b"".join(responses))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Answer one request line; returns the encoded response line."""
+        req_id = None
+        try:
+            request = json.loads(line)
+            req_id = request.get("id")
+            handler = self._ops.get(request.get("op"))
+            if handler is None:
+                response = {"id": req_id, "ok": False, "error": "unknown op"}
+            else:
+                response = {"id": req_id, **handler(request)}
+        except (ValueError, TypeError, KeyError, AttributeError, RecursionError) as exc:
+            response = {"id": req_id, "ok": False, "error": f"bad request: {exc}"}
+        return json.dumps(response).encode() + b"\n"
+
+    # ---- operations ----
+
+    def _transaction(self, lines, is_return: bool) -> dict:
+        result = self.pos.process_transaction([(sku, qty) for sku, qty in lines], is_return)
+        if not result:
+            return {"ok": False, "error": result.error, "sku": result.sku}
+        return {"ok": True, "result": transaction_to_dict(result)}
+
+    def _op_sale(self, req):
+        return self._transaction([(req["sku"], req["quantity"])], False)
+
+    def _op_return(self, req):
+        return self._transaction([(req["sku"], req["quantity"])], True)
+
+    def _op_transaction(self, req):
+        return self._transaction(req["lines"], bool(req.get("is_return", False)))
+
+    def _op_get(self, req):
+        product = self.inventory_manager.get_product_by_sku(req["sku"])
+        if product is None:
+            return {"ok": False, "error": "unknown sku"}
+        return {"ok": True, "result": product_to_dict(product)}
+
+    def _products(self, products):
+        return {"ok": True, "result": [product_to_dict(p) for p in products]}
+
+    def _op_prefix(self, req):
+        return self._products(self.inventory_manager.get_products_by_name_prefix(
+            req["prefix"], limit=req.get("limit", 50), ranked=bool(req.get("ranked", False))))
+
+    def _op_category(self, req):
+        return self._products(self.inventory_manager.get_products_by_category(req["category"]))
+
+    def _op_fuzzy(self, req):
+        return self._products(self.inventory_manager.get_products_by_fuzzy_prefix(
+            req["prefix"], req.get("max_distance"), req.get("limit", 50)))
+
+    def _op_tokens(self, req):
+        return self._products(self.inventory_manager.get_products_by_tokens(req["query"], req.get("limit")))
+
+    def _op_price_range(self, req):
+        return self._products(self.inventory_manager.get_products_by_price_range(
+            req.get("min"), req.get("max"), req.get("limit"), req.get("offset", 0)))
+
+    def _op_quantity_range(self, req):
+        return self._products(self.inventory_manager.get_products_by_quantity_range(
+            req.get("min"), req.get("max"), req.get("limit"), req.get("offset", 0)))
+
+    def _op_critical(self, req):
+        return self._products(self.inventory_manager.get_most_critical_products(req.get("limit", 10)))
+
+    def _op_categories(self, req):
+        return {"ok": True, "result": self.inventory_manager.get_categories()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the inventory over line-delimited JSON/TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=0,
+                        help="load N generated products instead of the sample data")
+    parser.add_argument("--wal", default=None, help="write-ahead log path (group commit)")
+    parser.add_argument("--trace", default=None,
+                        help="record every call to this operation trace (replay with OperationTrace.py)")
+    args = parser.parse_args()
+
+    trace = TraceRecorder(args.trace) if args.trace else None
+    wal = WriteAheadLog(args.wal) if args.wal else None
+    manager = InventoryManager(compress_trie=True, range_indexes=True, low_stock=True, trace=trace, wal=wal)
+    if manager.products:
+        pass  # replayed from the write-ahead log
+    elif args.products:
+        manager.bulk_load(Product(f"SKU{i:07d}", f"product {i:07d}", 1.0 + i % 1000, 1000, f"cat{i % 50}")
+                          for i in range(args.products))
+    else:
+        manager.populate_sample_data()
+    server = InventoryServer(manager, args.host, args.port)
+
+    async def run():
+        await server.start()
+        print(f"Serving {len(manager.products)} products on {server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if trace is not None:
+            trace.close()
+        if wal is not None:
+            wal.close()
+
+
+if __name__ == "__main__":
+    main()
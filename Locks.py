@@ -0,0 +1,135 @@
+"""Lock primitives for `ConcurrentInventoryManager`.
+
+- `StripedLock` maps each SKU to one of a fixed pool of re-entrant locks
+  (lock striping). Sales of SKUs on different stripes never contend, and
+  the pool stays small no matter how many SKUs exist. Several SKUs are
+  always locked in stripe order, so multi-line carts cannot deadlock.
+- `ReadWriteLock` lets any number of readers (prefix search, category
+  lookups, range queries) run together while writers (structural changes
+  to the trie and indexes) get exclusive access. It prefers writers: new
+  readers wait while a writer is queued, so a steady stream of searches
+  cannot starve an `add_product`.
+"""
+
+import threading
+
+
+class _MultiLock:
+    """Context manager holding several locks, acquired in the given order."""
+
+    __slots__ = ("_locks",)
+
+    def __init__(self, locks):
+        self._locks = locks
+
+    def __enter__(self):
+        for lock in self._locks:
+            lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        for lock in reversed(self._locks):
+            lock.release()
+
+
+class StripedLock:
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+    def hold(self, keys):
+        """Context manager locking every stripe used by `keys`."""
+        n = len(self._locks)
+        stripes = sorted({hash(key) % n for key in keys})
+        if len(stripes) == 1:
+            return self._locks[stripes[0]]
+        return _MultiLock([self._locks[i] for i in stripes])
+
+    def hold_all(self):
+        return _MultiLock(self._locks)
+
+
+class _ReadGuard:
+    __slots__ = ("_rw",)
+
+    def __init__(self, rw):
+        self._rw = rw
+
+    def __enter__(self):
+        self._rw.acquire_read()
+
+    def __exit__(self, *exc):
+        self._rw.release_read()
+
+
+class _WriteGuard:
+    __slots__ = ("_rw",)
+
+    def __init__(self, rw):
+        self._rw = rw
+
+    def __enter__(self):
+        self._rw.acquire_write()
+
+    def __exit__(self, *exc):
+        self._rw.release_write()
+
+
+class ReadWriteLock:
+    """Writer-preferring readers/writer lock.
+
+    Use `with rw.read_lock:` and `with rw.write_lock:`. The write side is
+    re-entrant for the owning thread (a writer may call other write-locked
+    methods), and a writer may also take the read side.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self.read_lock = _ReadGuard(self)
+        self.write_lock = _WriteGuard(self)
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                # reading inside our own write section
+                self._write_depth += 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._write_depth -= 1
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
@@ -0,0 +1,200 @@
+"""Low-stock tracking with an indexed min-heap and threshold callbacks.
+
+`InventoryManager(low_stock=True)` keeps a `LowStockTracker` that orders
+every SKU by urgency = quantity - reorder_point (lower is more critical).
+The heap is indexed by the manager's dense SKU ids (`pos[id]` is the slot of
+that id in the heap), so a quantity change re-sifts a single entry in
+O(log n) instead of rescanning the inventory.
+
+- `most_critical(k)` walks the heap best-first and returns the k most
+  urgent SKUs in O(k log k) without touching the rest of the heap.
+- `subscribe(callback)` registers `callback(sku, quantity, reorder_point,
+  below)`, fired only when a SKU crosses its reorder point: `below=True`
+  when stock falls to or under it (or a product is added already at or
+  under it), `below=False` when it is restocked above it.
+
+Per-SKU reorder points set with `set_reorder_point` outlive `bulk_load`,
+which reassigns ids, but not the removal of the SKU: a product re-added
+under the same SKU starts from the default again.
+"""
+
+from heapq import heappop, heappush
+from typing import Callable
+
+
+class LowStockTracker:
+    def __init__(self, owner, default_reorder_point: int = 10):
+        self._owner = owner
+        self.default_reorder_point = default_reorder_point
+        # per-SKU overrides, keyed by SKU so they survive id reassignment in bulk_load
+        self._reorder_points: dict[str, int] = {}
+        self._heap: list[int] = []
+        # indexed by SKU id: heap slot (-1 when absent) and urgency key
+        self._pos: list[int] = []
+        self._key: list[int] = []
+        self._callbacks: list[Callable] = []
+
+    # ---- heap primitives ----
+
+    def _less(self, a: int, b: int) -> bool:
+        key = self._key
+        return key[a] < key[b] or (key[a] == key[b] and a < b)
+
+    def _sift_up(self, i: int):
+        heap, pos = self._heap, self._pos
+        id_ = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not self._less(id_, heap[parent]):
+                break
+            heap[i] = heap[parent]
+            pos[heap[i]] = i
+            i = parent
+        heap[i] = id_
+        pos[id_] = i
+
+    def _sift_down(self, i: int):
+        heap, pos = self._heap, self._pos
+        n = len(heap)
+        id_ = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and self._less(heap[child + 1], heap[child]):
+                child += 1
+            if not self._less(heap[child], id_):
+                break
+            heap[i] = heap[child]
+            pos[heap[i]] = i
+            i = child
+        heap[i] = id_
+        pos[id_] = i
+
+    def _ensure(self, sku_id: int):
+        if sku_id >= len(self._pos):
+            grow = sku_id + 1 - len(self._pos)
+            self._pos.extend([-1] * grow)
+            self._key.extend([0] * grow)
+
+    # ---- reorder points ----
+
+    def reorder_point(self, sku: str) -> int:
+        return self._reorder_points.get(sku, self.default_reorder_point)
+
+    def set_reorder_point(self, sku: str, reorder_point: int, quantity: int | None = None):
+        """Set the reorder point of `sku` and re-rank it.
+
+        `quantity` is the SKU's current stock; the manager passes it so the
+        tracker never has to look products up.
+        """
+        self._reorder_points[sku] = reorder_point
+        sku_id = self._owner._sku_ids.get(sku)
+        if sku_id is None or quantity is None or self._pos[sku_id] < 0:
+            return
+        old_key = self._key[sku_id]
+        self._key[sku_id] = quantity - reorder_point
+        self._resift(sku_id, old_key)
+        self._notify(sku, quantity, reorder_point, old_key, self._key[sku_id])
+
+    # ---- mutation hooks (called by InventoryManager) ----
+
+    def add(self, sku_id: int, sku: str, quantity: int):
+        self._ensure(sku_id)
+        reorder_point = self.reorder_point(sku)
+        self._key[sku_id] = quantity - reorder_point
+        self._heap.append(sku_id)
+        self._sift_up(len(self._heap) - 1)
+        # a product that arrives already low crosses the line from "absent"
+        self._notify(sku, quantity, reorder_point, 1, self._key[sku_id])
+
+    def remove(self, sku_id: int, sku: str):
+        self._reorder_points.pop(sku, None)
+        i = self._pos[sku_id]
+        if i < 0:
+            return
+        last = self._heap.pop()
+        self._pos[sku_id] = -1
+        if last != sku_id:
+            self._heap[i] = last
+            self._pos[last] = i
+            self._sift_down(i)
+            self._sift_up(self._pos[last])
+
+    def update(self, sku_id: int, sku: str, quantity: int):
+        """Re-rank `sku_id` after a quantity change (O(log n))."""
+        if self._pos[sku_id] < 0:
+            return
+        reorder_point = self.reorder_point(sku)
+        old_key = self._key[sku_id]
+        new_key = quantity - reorder_point
+        if new_key == old_key:
+            return
+        self._key[sku_id] = new_key
+        self._resift(sku_id, old_key)
+        self._notify(sku, quantity, reorder_point, old_key, new_key)
+
+    def load(self, skus, quantities):
+        """Rebuild from parallel SKU/quantity sequences (ids 0..n-1) in O(n)."""
+        n = len(skus)
+        self._key = [q - self.reorder_point(s) for s, q in zip(skus, quantities)]
+        self._pos = list(range(n))
+        self._heap = list(range(n))
+        for i in range(n // 2 - 1, -1, -1):
+            self._sift_down(i)
+
+    def _resift(self, sku_id: int, old_key: int):
+        i = self._pos[sku_id]
+        if self._key[sku_id] < old_key:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def _notify(self, sku: str, quantity: int, reorder_point: int, old_key: int, new_key: int):
+        # low means quantity <= reorder point, i.e. key <= 0
+        if (old_key <= 0) != (new_key <= 0):
+            below = new_key <= 0
+            for callback in self._callbacks:
+                callback(sku, quantity, reorder_point, below)
+
+    # ---- queries ----
+
+    def subscribe(self, callback: Callable):
+        """Register `callback(sku, quantity, reorder_point, below)`."""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        self._callbacks.remove(callback)
+
+    def _best_first(self):
+        """Yield heap ids in urgency order, exploring only popped subtrees."""
+        heap, key = self._heap, self._key
+        if not heap:
+            return
+        frontier = [(key[heap[0]], heap[0], 0)]
+        while frontier:
+            _, id_, i = heappop(frontier)
+            yield id_
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heappush(frontier, (key[heap[child]], heap[child], child))
+
+    def most_critical(self, k: int) -> list[str]:
+        """The `k` SKUs with the lowest quantity relative to their reorder point."""
+        id_skus = self._owner._id_skus
+        out = []
+        for id_ in self._best_first():
+            if len(out) >= k:
+                break
+            out.append(id_skus[id_])
+        return out
+
+    def below_reorder_point(self, limit: int | None = None) -> list[str]:
+        """SKUs at or under their reorder point, most critical first."""
+        id_skus = self._owner._id_skus
+        out = []
+        for id_ in self._best_first():
+            if self._key[id_] > 0 or (limit is not None and len(out) >= limit):
+                break
+            out.append(id_skus[id_])
+        return out
@@ -0,0 +1,288 @@
+"""Record InventoryManager / POSSystem calls and replay them as load tests.
+
+    recorder = TraceRecorder("ops.trace")
+    inventory = InventoryManager(trace=recorder)
+    pos = POSSystem(inventory)      # records through the manager's recorder
+    ...
+    recorder.close()
+
+    python OperationTrace.py ops.trace                  # as fast as possible
+    python OperationTrace.py ops.trace --speed 1        # real time
+    python OperationTrace.py ops.trace --speed 10 --compress-trie
+
+The recorder shadows the recorded methods of each attached object with a
+wrapper (as `Instrumentation.Metrics` does) that appends one frame per
+call before running it:
+
+    <op code: u8, microseconds since the previous frame: u32, length: u32>
+    marshal payload: the positional arguments, or (args, kwargs)
+
+Op codes index `OPS`; the high bit marks a payload with keyword arguments.
+Products are stored as `(sku, name, price, quantity, category)` tuples.
+Only the outermost call is recorded: a `process_sale` that looks its SKU
+up through `get_product_by_sku` is one frame, so a replay does the same
+work once. A recording should start before the inventory is loaded (the
+`bulk_load` is part of the trace); otherwise replay on top of a snapshot
+taken when recording began (`--snapshot`).
+
+`replay` re-drives a trace against a fresh instance at full speed or on
+the recorded schedule divided by `speed`, and reports throughput plus
+latency percentiles per operation. Latency is the service time of each
+call; when the replay falls behind the schedule the delay is reported as
+lag, not added to the latencies.
+"""
+
+import argparse
+import json
+import marshal
+import struct
+import threading
+import time
+
+from Instrumentation import LatencyHistogram
+from Product import Product, ProductBase
+
+# InventoryManager and POSSystem import this module for their `trace`
+# option, so they are imported where a replay needs them
+
+MAGIC = b"INVTRACE1\n"
+_FRAME = struct.Struct("<BII")  # op code, delta microseconds, payload length
+_KWARGS = 0x80
+_MAX_DELTA_US = 0xFFFFFFFF
+
+MANAGER_OPS = ("add_product", "remove_product", "remove_product_by_sku", "update_quantity",
+               "update_product_name", "update_product_category", "get_product_by_sku",
+               "get_products_by_category", "get_products_by_name_prefix", "get_products_by_price_range",
+               "get_products_by_quantity_range", "get_products_by_fuzzy_prefix", "get_products_by_tokens",
+               "get_most_critical_products", "get_low_stock_products", "set_reorder_point", "refresh_rank",
+               "get_categories", "bulk_load", "load_snapshot")
+POS_OPS = ("process_sale", "process_return", "process_transaction", "process_batch")
+BULK_OPS = ("update_quantities", "update_product_names", "update_product_categories")
+# frame op code -> method name; append only, codes are stored in traces
+OPS = MANAGER_OPS + POS_OPS + BULK_OPS
+_CODES = {op: code for code, op in enumerate(OPS)}
+
+
+def _product_tuple(p) -> tuple:
+    return (p.sku, p.name, p.price, p.quantity, p.category)
+
+
+def _encode_add(args):
+    return args, (_product_tuple(args[0]),) + args[1:]
+
+
+def _encode_remove(args):
+    sku = args[0].sku if isinstance(args[0], ProductBase) else args[0]
+    return args, (sku,) + args[1:]
+
+
+def _encode_bulk_load(args):
+    # a generator can only be consumed once: run the load from a list
+    products = list(args[0])
+    return (products,) + args[1:], ([_product_tuple(p) for p in products],) + args[1:]
+
+
+def _encode_changes(args):
+    # bulk updates take any iterable of (sku, value) pairs
+    changes = list(args[0])
+    return (changes,) + args[1:], (changes,) + args[1:]
+
+
+# op -> function(args) returning (args to call with, args to store)
+_ENCODERS = {"add_product": _encode_add, "remove_product": _encode_remove, "bulk_load": _encode_bulk_load,
+             **{op: _encode_changes for op in BULK_OPS}}
+# op -> function(stored args) returning the args to replay
+_DECODERS = {"add_product": lambda args: (Product(*args[0]),) + args[1:],
+             "bulk_load": lambda args: ([Product(*t) for t in args[0]],) + args[1:]}
+
+
+class TraceRecorder:
+    def __init__(self, path: str, buffering: int = 1 << 16):
+        self.path = path
+        self._file = open(path, "wb", buffering=buffering)
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        # per-thread nesting depth: only outermost calls are recorded
+        self._local = threading.local()
+        self._last_ns = None
+        self.records = 0
+        # calls whose arguments marshal cannot store
+        self.skipped = 0
+
+    def attach(self, target, methods=OPS):
+        """Record calls of `methods` that `target` has (by default every op in `OPS`)."""
+        for method in methods:
+            if hasattr(target, method):
+                setattr(target, method, self._recorded(method, getattr(target, method)))
+
+    def _recorded(self, op: str, fn):
+        code = _CODES[op]
+        encode = _ENCODERS.get(op)
+        local = self._local
+
+        def recorded(*args, **kwargs):
+            if getattr(local, "depth", 0):
+                return fn(*args, **kwargs)
+            stored = args
+            if encode is not None:
+                args, stored = encode(args)
+            self._write(code, stored, kwargs)
+            local.depth = 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                local.depth = 0
+
+        recorded.__wrapped__ = fn
+        return recorded
+
+    def _write(self, code: int, args: tuple, kwargs: dict):
+        try:
+            payload = marshal.dumps((args, kwargs) if kwargs else args)
+        except ValueError:
+            self.skipped += 1
+            return
+        if kwargs:
+            code |= _KWARGS
+        with self._lock:
+            now = time.perf_counter_ns()
+            delta = 0 if self._last_ns is None else min((now - self._last_ns) // 1000, _MAX_DELTA_US)
+            self._last_ns = now
+            self._file.write(_FRAME.pack(code, delta, len(payload)) + payload)
+            self.records += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceRecord:
+    __slots__ = ("time_us", "op", "args", "kwargs")
+
+    def __init__(self, time_us: int, op: str, args: tuple, kwargs: dict):
+        self.time_us = time_us
+        self.op = op
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"TraceRecord({self.time_us}, {self.op!r}, {self.args!r}, {self.kwargs!r})"
+
+
+def read_trace(path: str) -> list[TraceRecord]:
+    """Decode a trace; `time_us` is measured from the first call. A torn tail is ignored."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an operation trace")
+    records = []
+    pos = len(MAGIC)
+    now = 0
+    while pos + _FRAME.size <= len(data):
+        code, delta, length = _FRAME.unpack_from(data, pos)
+        start = pos + _FRAME.size
+        if start + length > len(data):
+            break
+        payload = marshal.loads(data[start:start + length])
+        args, kwargs = payload if code & _KWARGS else (payload, {})
+        op = OPS[code & ~_KWARGS]
+        decode = _DECODERS.get(op)
+        now += delta
+        records.append(TraceRecord(now, op, decode(args) if decode is not None else args, kwargs))
+        pos = start + length
+    return records
+
+
+def replay(records: list[TraceRecord], manager, pos=None, speed: float | None = None) -> dict:
+    """Re-drive `records` against `manager` (and `pos`); return the report.
+
+    `speed=None` issues calls back to back; otherwise call i is issued
+    `(records[i].time_us - records[0].time_us) / speed` after the start
+    (1 = real time), so a slice of a trace replays on its own schedule.
+    """
+    if pos is None:
+        from POSSystem import POSSystem
+        pos = POSSystem(manager)
+    calls = {op: getattr(manager, op) for op in MANAGER_OPS + BULK_OPS if hasattr(manager, op)}
+    calls.update({op: getattr(pos, op) for op in POS_OPS})
+    histograms: dict[str, LatencyHistogram] = {}
+    lag = LatencyHistogram()
+    clock = time.perf_counter_ns
+    sleep = time.sleep
+    origin_us = records[0].time_us if records else 0
+    start = clock()
+    for record in records:
+        if speed is not None:
+            due = start + int((record.time_us - origin_us) * 1000 / speed)
+            ahead = due - clock()
+            if ahead > 0:
+                # sleep coarse, spin the last millisecond
+                if ahead > 2_000_000:
+                    sleep((ahead - 1_000_000) / 1e9)
+                while clock() < due:
+                    pass
+            else:
+                lag.record(-ahead)
+        histogram = histograms.get(record.op)
+        if histogram is None:
+            histogram = histograms[record.op] = LatencyHistogram()
+        t = clock()
+        try:
+            calls[record.op](*record.args, **record.kwargs)
+        except Exception:
+            # the fresh instance diverged from the recorded one
+            histogram.errors += 1
+        histogram.record(clock() - t)
+    elapsed = (clock() - start) / 1e9
+    return {
+        "records": len(records), "seconds": elapsed, "throughput": len(records) / elapsed if elapsed else 0.0,
+        "speed": speed, "recorded_seconds": (records[-1].time_us - origin_us) / 1e6 if records else 0.0,
+        "late_calls": lag.count, "max_lag_ms": lag.max / 1e6,
+        "operations": {op: {**h.snapshot(), "throughput": h.count / elapsed if elapsed else 0.0}
+                       for op, h in histograms.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an operation trace against a fresh inventory")
+    parser.add_argument("trace")
+    parser.add_argument("--speed", default="max", help="'max', or a multiple of the recorded rate (1 = real time)")
+    parser.add_argument("--compress-trie", action="store_true")
+    parser.add_argument("--subtree", action="store_true", help="store_skus_in_trie=False")
+    parser.add_argument("--range-indexes", action="store_true", help="needed to replay price/quantity range queries")
+    parser.add_argument("--low-stock", action="store_true", help="needed to replay low-stock queries")
+    parser.add_argument("--snapshot", default=None, help="load this snapshot before replaying")
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    args = parser.parse_args()
+
+    from InventoryManager import InventoryManager
+    records = read_trace(args.trace)
+    manager = InventoryManager(compress_trie=args.compress_trie, store_skus_in_trie=not args.subtree,
+                               range_indexes=args.range_indexes, low_stock=args.low_stock)
+    if args.snapshot:
+        manager.load_snapshot(args.snapshot)
+    speed = None if args.speed == "max" else float(args.speed)
+    report = replay(records, manager, speed=speed)
+    print(f"{report['records']:,} calls in {report['seconds']:.2f}s ({report['throughput']:,.0f} calls/s, "
+          f"recorded over {report['recorded_seconds']:.2f}s), {report['late_calls']:,} late, "
+          f"max lag {report['max_lag_ms']:.1f}ms")
+    for op, stats in sorted(report["operations"].items()):
+        print(f"  {op:30s} {stats['count']:>8,}  {stats['throughput']:>10,.0f}/s  p50 {stats['p50_us']:>9.1f}us  "
+              f"p99 {stats['p99_us']:>9.1f}us  p99.9 {stats['p999_us']:>9.1f}us  errors {stats['errors']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,66 @@
+import gc
+import weakref
+
+from Instrumentation import Metrics
 from InventoryManager import InventoryManager
+from OperationTrace import TraceRecorder
+
+
+# One applied line of a cart transaction
+class LineItem:
+    __slots__ = ("sku", "quantity", "unit_price", "amount")
+
+    def __init__(self, sku: str, quantity: int, unit_price: float):
+        self.sku = sku
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.amount = unit_price * quantity
+
+    def __repr__(self):
+        return f"LineItem({self.sku!r}, {self.quantity}, {self.unit_price})"
+
+
+# Outcome of one cart transaction. `ok` is False when the transaction was
+# rejected; then `error` says why, `sku` names the offending line and no line
+# was applied. Truthiness follows `ok`.
+class TransactionResult:
+    __slots__ = ("ok", "lines", "total", "error", "sku")
+
+    def __init__(self, ok: bool, lines: list[LineItem] | None = None, total: float = 0.0,
+                 error: str | None = None, sku: str | None = None):
+        self.ok = ok
+        self.lines = lines if lines is not None else []
+        self.total = total
+        self.error = error
+        self.sku = sku
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        if self.ok:
+            return f"TransactionResult(ok=True, lines={len(self.lines)}, total={self.total:.2f})"
+        return f"TransactionResult(ok=False, error={self.error!r}, sku={self.sku!r})"
+
 
 # Point of Sale (POS) System
 class POSSystem:
-    # Initialize POS with an inventory manager instance injected
-    def __init__(self, inventory_manager : InventoryManager):
+    # Initialize POS with an inventory manager instance injected. Sales,
+    # returns and carts are timed by `metrics` and recorded by `trace`
+    # (default: the manager's).
+    def __init__(self, inventory_manager : InventoryManager, metrics: Metrics | None = None,
+                 trace: TraceRecorder | None = None):
         self.inventory_manager = inventory_manager
+        if trace is None:
+            trace = getattr(inventory_manager, "trace", None)
+        if trace is not None:
+            trace.attach(self)
+        if metrics is None:
+            metrics = getattr(inventory_manager, "metrics", None)
+        if metrics is not None:
+            metrics.instrument(weakref.ref(self), {name: "pos_" + name for name in
+                                                   ("process_sale", "process_return", "process_transaction",
+                                                    "process_batch")})
     
     # Process a sale transaction
     # This function should:
@@ -12,18 +68,23 @@ class POSSystem:
     # 2. Update the inventory accordingly
     # 3. Print the total price of the sale
     def process_sale(self, sku: str, quantity: int) -> bool:
-        product = self.inventory_manager.get_product_by_sku(sku)
-        if not product:
-            print(f"Product with SKU {sku} not found.")
-            return False
-        
-        if product.quantity < quantity:
-            print(f"Insufficient stock for product {product.name}. Available: {product.quantity}, Requested: {quantity}")
-            return False
-        
-        # Update inventory
-        new_quantity = product.quantity - quantity
-        self.inventory_manager.update_quantity(product.sku, new_quantity)
+        manager = self.inventory_manager
+        # the stock check and the write must not interleave with another
+        # register selling the same SKU (no-op lock when single-threaded)
+        with manager.stock_lock((sku,)):
+            product = manager.get_product_by_sku(sku)
+            if not product:
+                print(f"Product with SKU {sku} not found.")
+                return False
+
+            if product.quantity < quantity:
+                print(f"Insufficient stock for product {product.name}. Available: {product.quantity}, Requested: {quantity}")
+                return False
+
+            # Update inventory
+            new_quantity = product.quantity - quantity
+            # product was just fetched and checked: skip update_quantity's re-lookup
+            manager._set_quantity(sku, product, new_quantity, "sale")
         
         total_price = product.price * quantity
         print(f"Sale processed for {quantity} units of {product.name}. Total price: ${total_price:.2f}")
@@ -35,15 +96,93 @@ class POSSystem:
     # 2. Update the inventory accordingly
     # 3. Print the total refund amount
     def process_return(self, sku: str, quantity: int) -> bool:
-        product = self.inventory_manager.get_product_by_sku(sku)
-        if not product:
-            print(f"Product with SKU {sku} not found. So, adding it to inventory.")
-            return False
-        
-        # Update inventory
-        new_quantity = product.quantity + quantity
-        self.inventory_manager.update_quantity(product.sku, new_quantity)
+        with self.inventory_manager.stock_lock((sku,)):
+            product = self.inventory_manager.get_product_by_sku(sku)
+            if not product:
+                print(f"Product with SKU {sku} not found. So, adding it to inventory.")
+                return False
+
+            # Update inventory
+            new_quantity = product.quantity + quantity
+            if new_quantity < 0:
+                print("Quantity cannot be negative.")
+            else:
+                self.inventory_manager._set_quantity(product.sku, product, new_quantity, "return")
         
         total_refund = product.price * quantity
         print(f"Return processed for {quantity} units of {product.name}. Total refund: ${total_refund:.2f}")
-        return True
\ No newline at end of file
+        return True
+
+    # Process a multi-line cart as one atomic transaction
+    # Time complexity : O(L) for L lines (plus index maintenance per line)
+    def process_transaction(self, lines, is_return: bool = False) -> TransactionResult:
+        """Apply every `(sku, quantity)` line of a cart, or none of them.
+
+        All lines are validated before any stock changes: unknown SKUs,
+        non-positive quantities and (for sales) insufficient stock reject
+        the whole cart. Repeated SKUs are merged before the stock check, so
+        two lines of 3 against a stock of 5 are rejected. Nothing is printed;
+        the returned `TransactionResult` describes the outcome.
+        """
+        manager = self.inventory_manager
+        # merge repeated SKUs, keeping first-seen order
+        wanted: dict[str, int] = {}
+        for sku, quantity in lines:
+            if quantity.__class__ is not int or quantity <= 0:
+                return TransactionResult(False, error="invalid quantity", sku=sku)
+            wanted[sku] = wanted.get(sku, 0) + quantity
+        if not wanted:
+            return TransactionResult(False, error="empty transaction")
+
+        # every SKU of the cart stays locked from the stock check to the last write
+        with manager.stock_lock(wanted):
+            get = manager.products.get
+            # validate everything first so a rejected cart leaves no trace
+            resolved = []
+            for sku, quantity in wanted.items():
+                product = get(sku)
+                if product is None:
+                    return TransactionResult(False, error="unknown sku", sku=sku)
+                if not is_return and product.quantity < quantity:
+                    return TransactionResult(False, error="insufficient stock", sku=sku)
+                resolved.append((sku, product, quantity))
+
+            set_quantity = manager._set_quantity
+            sign = 1 if is_return else -1
+            cause = "return" if is_return else "sale"
+            items = []
+            total = 0.0
+            # one WAL frame for the whole cart, appended before the locks drop
+            with manager.wal_transaction():
+                for sku, product, quantity in resolved:
+                    set_quantity(sku, product, product.quantity + sign * quantity, cause)
+                    item = LineItem(sku, quantity, product.price)
+                    items.append(item)
+                    total += item.amount
+        return TransactionResult(True, items, total)
+
+    # Apply many queued register transactions in one pass
+    # Time complexity : O(total lines)
+    def process_batch(self, transactions, is_return: bool = False) -> list[TransactionResult]:
+        """Apply each cart in `transactions` atomically, in order.
+
+        Carts are independent: a rejected cart does not affect the others,
+        and later carts see the stock left by earlier ones. Returns one
+        `TransactionResult` per cart. With a write-ahead log each cart is
+        still its own log record, but the batch is committed (fsynced) once
+        at the end.
+
+        The cyclic garbage collector is paused for the batch: the results
+        are acyclic, but allocating thousands of them would otherwise set
+        off repeated full collections that rescan every tracked Product.
+        """
+        process = self.process_transaction
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # with a write-ahead log, the whole batch shares one commit
+            with self.inventory_manager.wal_deferred_commit():
+                return [process(lines, is_return) for lines in transactions]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
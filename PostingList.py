@@ -0,0 +1,97 @@
+"""Compact posting list of dense integer ids.
+
+`InventoryManager` interns every SKU string to a small integer id and the
+search trie / category index store those ids in a `PostingList` instead of
+a `set[str]`. A posting list is a sorted `array('I')` (4 bytes per entry),
+so memory per entry drops from a hash-set slot plus a string reference to a
+single machine word, and copying a result is a plain memcpy.
+
+Ids are unique by construction (one id per SKU), so the list behaves like a
+sorted set: `add`/`discard` use binary search and the set operations walk
+the shorter list and probe the longer one.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+
+class PostingList(array):
+    __slots__ = ()
+
+    def __new__(cls, ids: Iterable[int] = ()):
+        if isinstance(ids, PostingList):
+            # already sorted: plain copy
+            return super().__new__(cls, "I", ids)
+        return super().__new__(cls, "I", sorted(ids))
+
+    def add(self, id_: int):
+        # Ids are mostly handed out in increasing order, so appending is the common case
+        if not self or self[-1] < id_:
+            self.append(id_)
+            return
+        i = bisect_left(self, id_)
+        if i == len(self) or self[i] != id_:
+            self.insert(i, id_)
+
+    def discard(self, id_: int):
+        i = bisect_left(self, id_)
+        if i < len(self) and self[i] == id_:
+            del self[i]
+
+    # Batch forms of add / discard (named as on `set`). A few ids are
+    # bisected in one by one; more than 1/32 of the list is cheaper as one
+    # rebuild of the array.
+    def update(self, ids: Iterable[int]):
+        new = set(ids)
+        if len(new) * 32 < len(self):
+            for id_ in new:
+                self.add(id_)
+            return
+        merged = list(self)
+        merged.extend(sorted(id_ for id_ in new if id_ not in self))
+        # two sorted runs: one merge pass
+        merged.sort()
+        self[:] = array("I", merged)
+
+    def difference_update(self, ids: Iterable[int]):
+        gone = ids if isinstance(ids, (set, frozenset)) else set(ids)
+        if len(gone) * 32 < len(self):
+            for id_ in gone:
+                self.discard(id_)
+            return
+        self[:] = array("I", [id_ for id_ in self if id_ not in gone])
+
+    def __contains__(self, id_) -> bool:
+        i = bisect_left(self, id_)
+        return i < len(self) and self[i] == id_
+
+    def intersection(self, other: "PostingList", limit: int | None = None) -> "PostingList":
+        """Return ids present in both lists (at most `limit` of them).
+
+        Iterates the shorter list and binary-searches the longer one, so the
+        cost is O(s log l) rather than O(s + l).
+        """
+        small, large = (self, other) if len(self) <= len(other) else (other, self)
+        out = PostingList()
+        lo = 0
+        n = len(large)
+        for id_ in small:
+            lo = bisect_left(large, id_, lo)
+            if lo == n:
+                break
+            if large[lo] == id_:
+                out.append(id_)
+                if limit is not None and len(out) >= limit:
+                    break
+        return out
+
+    def union(self, other: "PostingList") -> "PostingList":
+        return PostingList(set(self).union(other))
+
+    def difference(self, other: "PostingList") -> "PostingList":
+        out = PostingList()
+        for id_ in self:
+            if id_ not in other:
+                out.append(id_)
+        return out
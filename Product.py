@@ -1,5 +1,14 @@
+# Common base of Product and ColumnarStore.ProductView, for isinstance checks
+# that accept either; it has no slots, so each class keeps only its own
+class ProductBase:
+    __slots__ = ()
+
+
 # Product class definition for an e-commerce inventory management application
-class Product: 
+class Product(ProductBase): 
+    # __slots__ drops the per-instance __dict__; with millions of SKUs this
+    # roughly halves the memory of each Product object
+    __slots__ = ("sku", "name", "price", "quantity", "category")
     sku: str 
     name: str 
     price: float 
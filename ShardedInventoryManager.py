@@ -0,0 +1,330 @@
+"""Inventory partitioned by SKU hash across local worker processes.
+
+    with ShardedInventoryManager(shards=4, compress_trie=True) as inventory:
+        inventory.bulk_load(products)
+        inventory.get_products_by_name_prefix("app", limit=10)
+
+Each worker process owns a plain `InventoryManager` built with the given
+options, so the shards together use N cores and N address spaces. A SKU
+belongs to shard `crc32(sku) % shards`; the hash is stable across processes
+and runs, unlike `hash()` on strings.
+
+- Point operations (`add_product`, `remove_product`, `update_quantity`,
+  `get_product_by_sku`, `update_product_name`, `update_product_category`)
+  are sent to the owning shard only. Their bulk forms
+  (`update_quantities`, `update_product_names`, `update_product_categories`)
+  split the changes by owner and send each shard one request, in parallel.
+- `get_products_by_name_prefix` and `get_products_by_category` scatter: the
+  request goes to every shard before any reply is read, so the shards
+  search in parallel, and the partial results are merged. With a `limit`
+  each shard stops after `limit` matches and the merge stops as soon as
+  `limit` products are out.
+- `bulk_load` streams the input: products are routed into per-shard chunks
+  of `chunk_size` and each worker indexes them while the rest is still
+  being read. Each worker loads into a new manager and keeps its old one
+  until every shard has loaded, so a failure on any shard, or in the
+  input, leaves all of them with their previous catalog.
+
+Prefix results are in lexicographic order of the lower-cased name (as
+`InventoryManager.iter_products_by_name_prefix`), so a limited query returns
+the same products as on a single manager. Category results are grouped by
+shard. Products are returned as detached `Product` copies: changing one
+does not change the inventory, use the update methods instead.
+"""
+
+import heapq
+import multiprocessing
+import zlib
+from itertools import islice
+
+from InventoryManager import InventoryManager
+from Product import Product, ProductBase
+
+
+def _detached(product):
+    # columnar ProductViews reference their whole store; never pickle one
+    if product is None or product.__class__ is Product:
+        return product
+    return Product(product.sku, product.name, product.price, product.quantity, product.category)
+
+
+def _prefix(manager, prefix, limit):
+    return [_detached(p) for p in islice(manager.iter_products_by_name_prefix(prefix), limit)]
+
+
+def _category(manager, category, limit):
+    return [_detached(p) for p in manager.get_products_by_category(category, limit)]
+
+
+# Operations a worker answers: name -> function(manager, *args)
+_OPS = {
+    "add": InventoryManager.add_product,
+    "remove": InventoryManager.remove_product,
+    "update_quantity": InventoryManager.update_quantity,
+    "get": lambda manager, sku: _detached(manager.get_product_by_sku(sku)),
+    "rename": InventoryManager.update_product_name,
+    "recategorize": InventoryManager.update_product_category,
+    "update_quantities": InventoryManager.update_quantities,
+    "rename_many": InventoryManager.update_product_names,
+    "recategorize_many": InventoryManager.update_product_categories,
+    "prefix": _prefix,
+    "category": _category,
+    "categories": InventoryManager.get_categories,
+    "count": lambda manager: len(manager.products),
+}
+
+
+# Ends a `bulk_load` stream whose input failed; the workers discard the load
+_ABORT = "abort"
+
+
+class _LoadAborted(Exception):
+    pass
+
+
+def _received_products(conn):
+    """Yield the products of the chunks sent by `bulk_load`, up to a None.
+
+    Raises `_LoadAborted` if the coordinator ends the stream with `_ABORT`.
+    """
+    while True:
+        chunk = conn.recv()
+        if chunk is None:
+            return
+        if chunk == _ABORT:
+            raise _LoadAborted("bulk load aborted by the coordinator")
+        yield from chunk
+
+
+def _serve(conn, options):
+    """Worker process loop: answer `(op, args)` requests until None arrives."""
+    manager = InventoryManager(**options)
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        op, args = request
+        try:
+            if op == "bulk_load":
+                # load into a new manager; the old one stays current until
+                # the coordinator decides, after every shard has replied
+                staged = InventoryManager(**options)
+                products = _received_products(conn)
+                try:
+                    result = staged.bulk_load(products, *args)
+                finally:
+                    # a failed load must still consume the rest of the stream
+                    try:
+                        for _ in products:
+                            pass
+                    except _LoadAborted:
+                        pass
+                conn.send((True, result))
+                if conn.recv() == "commit":
+                    manager = staged
+                continue
+            else:
+                result = _OPS[op](manager, *args)
+        except Exception as e:
+            conn.send((False, e))
+        else:
+            conn.send((True, result))
+    conn.close()
+
+
+class ShardedInventoryManager:
+    def __init__(self, shards: int = 4, chunk_size: int = 10000, **options):
+        """Start `shards` worker processes, each with `InventoryManager(**options)`.
+
+        A write-ahead log cannot be shared between processes, so `wal` is
+        not accepted.
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if options.get("wal") is not None:
+            raise ValueError("a write-ahead log cannot be shared by shard processes")
+        self.chunk_size = chunk_size
+        self._conns = []
+        self._workers = []
+        for _ in range(shards):
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_serve, args=(child, options), daemon=True)
+            worker.start()
+            child.close()
+            self._conns.append(parent)
+            self._workers.append(worker)
+
+    @property
+    def shards(self) -> int:
+        return len(self._conns)
+
+    def shard_for(self, sku: str) -> int:
+        """Index of the shard that owns `sku`."""
+        return zlib.crc32(sku.encode()) % len(self._conns)
+
+    # ---- transport ----
+
+    @staticmethod
+    def _reply(conn):
+        ok, result = conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def _call(self, sku: str, op: str, *args):
+        """Send one request to the shard that owns `sku`."""
+        conn = self._conns[self.shard_for(sku)]
+        conn.send((op, args))
+        return self._reply(conn)
+
+    def _scatter(self, op: str, *args) -> list:
+        """Send one request to every shard, then gather the replies in shard order."""
+        for conn in self._conns:
+            conn.send((op, args))
+        # read every reply even if one failed, so no answer is left in a pipe
+        replies = [conn.recv() for conn in self._conns]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def _partitioned(self, op: str, changes) -> int:
+        """Send each shard its part of the `(sku, value)` changes; sum the replies."""
+        parts = [[] for _ in self._conns]
+        shard_for = self.shard_for
+        for change in changes:
+            parts[shard_for(change[0])].append(change)
+        busy = [(conn, part) for conn, part in zip(self._conns, parts) if part]
+        for conn, part in busy:
+            conn.send((op, (part,)))
+        replies = [conn.recv() for conn, _ in busy]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return sum(result for _, result in replies)
+
+    # ---- point operations ----
+
+    def add_product(self, product: Product):
+        self._call(product.sku, "add", _detached(product))
+
+    def remove_product(self, product: Product | str):
+        sku = product.sku if isinstance(product, ProductBase) else product
+        self._call(sku, "remove", sku)
+
+    def remove_product_by_sku(self, sku: str):
+        self.remove_product(sku)
+
+    def update_quantity(self, sku: str, quantity: int):
+        self._call(sku, "update_quantity", sku, quantity)
+
+    def get_product_by_sku(self, sku: str):
+        return self._call(sku, "get", sku)
+
+    def update_product_name(self, sku: str, new_name: str) -> bool:
+        return self._call(sku, "rename", sku, new_name)
+
+    def update_product_category(self, sku: str, new_category: str) -> bool:
+        return self._call(sku, "recategorize", sku, new_category)
+
+    # ---- bulk updates ----
+
+    def update_quantities(self, changes) -> int:
+        return self._partitioned("update_quantities", changes)
+
+    def update_product_names(self, changes) -> int:
+        return self._partitioned("rename_many", changes)
+
+    def update_product_categories(self, changes) -> int:
+        return self._partitioned("recategorize_many", changes)
+
+    # ---- scatter-gather queries ----
+
+    # Time complexity : O(S * (m + k) + k log S) for S shards, k = limit
+    def get_products_by_name_prefix(self, prefix: str, limit: int | None = None):
+        """Products whose name starts with `prefix`, in lexicographic name order."""
+        parts = self._scatter("prefix", prefix, limit)
+        merged = heapq.merge(*parts, key=lambda p: p.name.lower())
+        return list(islice(merged, limit))
+
+    def get_products_by_category(self, category: str, limit: int | None = None):
+        """Products in `category`, shard by shard."""
+        result = []
+        for part in self._scatter("category", category, limit):
+            result.extend(part)
+            if limit is not None and len(result) >= limit:
+                return result[:limit]
+        return result
+
+    def get_categories(self):
+        # first-seen order across shards
+        return list(dict.fromkeys(c for part in self._scatter("categories") for c in part))
+
+    def __len__(self) -> int:
+        return sum(self._scatter("count"))
+
+    # ---- loading ----
+
+    def bulk_load(self, products_iterable, processes: int = 0):
+        """Replace every shard's contents, streaming products to their owners.
+
+        `processes` is passed to each shard's `InventoryManager.bulk_load`.
+        All shards or none take the new catalog: if the input raises or any
+        shard fails, every shard keeps its previous contents.
+        """
+        conns = self._conns
+        for conn in conns:
+            conn.send(("bulk_load", (processes,)))
+        chunks = [[] for _ in conns]
+        shard_for = self.shard_for
+        chunk_size = self.chunk_size
+        end = None
+        try:
+            for p in products_iterable:
+                shard = shard_for(p.sku)
+                chunk = chunks[shard]
+                chunk.append(_detached(p))
+                if len(chunk) >= chunk_size:
+                    conns[shard].send(chunk)
+                    chunks[shard] = []
+            for conn, chunk in zip(conns, chunks):
+                if chunk:
+                    conn.send(chunk)
+        except BaseException:
+            end = _ABORT
+            raise
+        finally:
+            # end every stream even when the input raised, so no worker is
+            # left waiting inside bulk_load
+            for conn in conns:
+                conn.send(end)
+            replies = [conn.recv() for conn in conns]
+            # second phase: the shards that loaded wait for the decision
+            decision = "commit" if end is None and all(ok for ok, _ in replies) else "rollback"
+            for conn, (ok, _) in zip(conns, replies):
+                if ok:
+                    conn.send(decision)
+        for ok, result in replies:
+            if not ok:
+                raise result
+
+    # ---- lifecycle ----
+
+    def close(self):
+        """Stop the worker processes."""
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for worker in self._workers:
+            worker.join()
+        self._conns = []
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,293 @@
+"""Compact binary snapshot of an `InventoryManager`, loadable through mmap.
+
+`InventoryManager.save_snapshot(path)` writes one file with:
+
+- the product columns in SKU-id order: price (`d`), quantity (`q`) and
+  category id (`I`) arrays, plus NUL-joined SKU and name blobs. Ids freed
+  by removals are squeezed out, so a loaded snapshot has ids 0..n-1 just
+  like a `bulk_load`. Since NUL is the separator, saving a SKU, name or
+  category that contains one raises `ValueError` before anything is written,
+- the category index: the category names and each category's posting list,
+- the search trie and, when enabled, the token index, serialized node by
+  node in post-order. Each node record holds its end-of-word flag, its
+  posting list and its children's edge labels and file offsets.
+
+`InventoryManager.load_snapshot(path)` maps the file instead of reading it.
+Columns and posting lists are copied straight from the mapping with
+`frombytes` (one memcpy each, no per-product objects with a columnar
+store). The tries are not rebuilt at all: the root is a mapped node that
+decodes its own record only when its children or postings are first
+touched, so startup cost does not depend on catalog size and pages of the
+trie fault in as queries reach them. Faulted nodes are ordinary trie nodes
+afterwards, so inserts and deletes work unchanged.
+"""
+
+import mmap
+import struct
+from array import array
+
+from PostingList import PostingList
+from TrieNode import RadixTrie, RadixTrieNode, Trie, TrieNode
+
+MAGIC = b"INVSNAP1"
+# magic, version, rows, engine (0 trie / 1 radix), store_skus_in_nodes,
+# has token index, search trie root offset, token index root offset
+_HEADER = struct.Struct("<8sIIBBBxQQ")
+_SECTIONS = ("prices", "quantities", "category_ids", "skus", "names",
+             "category_names", "category_offsets", "category_postings", "nodes")
+_SECTION = struct.Struct("<QQ")  # offset, length
+_NODE = struct.Struct("<BII")    # is_end_of_word, child count, posting length
+_EDGE = struct.Struct("<IQ")     # label byte length, child node offset
+
+
+# ---- writing ----
+
+def _serialize_trie(trie, out: bytearray, base: int, remap=None) -> int:
+    """Append the nodes of `trie` to `out` in post-order; return the root offset.
+
+    `remap` (old id -> new id, order preserving) renumbers the postings.
+    """
+    radix = isinstance(trie, RadixTrie)
+    offsets = {}
+    stack = [(trie.root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children.values())
+            continue
+        offsets[id(node)] = base + len(out)
+        ids = node.skus if isinstance(node.skus, PostingList) else PostingList(node.skus)
+        if remap is not None:
+            ids = array("I", [remap[i] for i in ids])
+        out += _NODE.pack(node.is_end_of_word, len(node.children), len(ids))
+        out += ids.tobytes()
+        for key, child in node.children.items():
+            label = (child.label if radix else key).encode()
+            out += _EDGE.pack(len(label), offsets[id(child)])
+            out += label
+    return offsets[id(trie.root)]
+
+
+def _join(field: str, strings: list[str]) -> bytes:
+    """NUL-join `strings`, refusing any that contains NUL itself."""
+    text = "\0".join(strings)
+    if text.count("\0") != max(len(strings) - 1, 0):
+        bad = next(string for string in strings if "\0" in string)
+        raise ValueError(f"cannot snapshot {field} {bad!r}: it contains a NUL character")
+    return text.encode()
+
+
+def write_snapshot(manager, path: str):
+    # ids freed by removals are squeezed out so the snapshot's ids are
+    # 0..n-1; the renumbering keeps id order, so postings stay sorted
+    live = [i for i, sku in enumerate(manager._id_skus) if sku is not None]
+    remap = None
+    if len(live) != len(manager._id_skus):
+        remap = array("I", bytes(4 * len(manager._id_skus)))
+        for new_id, old_id in enumerate(live):
+            remap[old_id] = new_id
+    id_skus = [manager._id_skus[i] for i in live]
+    products = manager.products
+    rows = [products[sku] for sku in id_skus]
+
+    category_index: dict[str, int] = {}
+    for category in manager.categories:
+        category_index.setdefault(category, len(category_index))
+    prices = array("d")
+    quantities = array("q")
+    category_ids = array("I")
+    for product in rows:
+        prices.append(product.price)
+        quantities.append(product.quantity)
+        category_ids.append(category_index.setdefault(product.category, len(category_index)))
+
+    category_offsets = array("Q", [0])
+    category_postings = array("I")
+    for category in category_index:
+        posting = manager.categories.get(category, ())
+        category_postings.extend(posting if remap is None else [remap[i] for i in posting])
+        category_offsets.append(len(category_postings))
+
+    sections = {
+        "prices": prices.tobytes(),
+        "quantities": quantities.tobytes(),
+        "category_ids": category_ids.tobytes(),
+        "skus": _join("SKU", id_skus),
+        "names": _join("name", [p.name for p in rows]),
+        "category_names": _join("category", list(category_index)),
+        "category_offsets": category_offsets.tobytes(),
+        "category_postings": category_postings.tobytes(),
+    }
+    table_size = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    body = bytearray()
+    layout = {}
+    for name in _SECTIONS[:-1]:
+        # keep the numeric columns 8-byte aligned
+        body += b"\0" * (-len(body) % 8)
+        layout[name] = (table_size + len(body), len(sections[name]))
+        body += sections[name]
+    body += b"\0" * (-len(body) % 8)
+    nodes_start = table_size + len(body)
+    nodes = bytearray()
+    trie_root = _serialize_trie(manager.search_trie, nodes, nodes_start, remap)
+    token_root = 0
+    if manager.token_index is not None:
+        token_root = _serialize_trie(manager.token_index, nodes, nodes_start, remap)
+    layout["nodes"] = (nodes_start, len(nodes))
+
+    header = _HEADER.pack(MAGIC, 1, len(id_skus), isinstance(manager.search_trie, RadixTrie),
+                          manager.search_trie.store_skus_in_nodes, manager.token_index is not None,
+                          trie_root, token_root)
+    with open(path, "wb") as f:
+        f.write(header)
+        for name in _SECTIONS:
+            f.write(_SECTION.pack(*layout[name]))
+        f.write(body)
+        f.write(nodes)
+
+
+# ---- reading ----
+
+def _fault(node):
+    """Decode the record of a mapped node into ordinary node attributes."""
+    snapshot, offset = node._snapshot, node._offset
+    mm = snapshot.mm
+    is_end, n_children, n_ids = _NODE.unpack_from(mm, offset)
+    pos = offset + _NODE.size
+    skus = PostingList()
+    if n_ids:
+        skus.frombytes(mm[pos:pos + 4 * n_ids])
+        pos += 4 * n_ids
+    children = {}
+    node_cls = type(node)
+    for _ in range(n_children):
+        length, child_offset = _EDGE.unpack_from(mm, pos)
+        pos += _EDGE.size
+        label = mm[pos:pos + length].decode()
+        pos += length
+        children[label[0]] = node_cls(snapshot, child_offset, label)
+    # bypass the nodes' __setattr__, which would fault again
+    object.__setattr__(node, "is_end_of_word", bool(is_end))
+    object.__setattr__(node, "skus", skus)
+    object.__setattr__(node, "children", children)
+
+
+_LAZY = frozenset(("children", "is_end_of_word", "skus"))
+
+
+class _MappedRadixNode(RadixTrieNode):
+    """Radix node whose children/postings are decoded on first access."""
+
+    __slots__ = ("_snapshot", "_offset")
+
+    def __init__(self, snapshot, offset: int, label: str = ""):
+        self._snapshot = snapshot
+        self._offset = offset
+        self.label = label
+        self.topk = None
+
+    def __getattr__(self, name):
+        # only reached while a lazy slot is still unset
+        if name in _LAZY:
+            _fault(self)
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        # a write (say insert() marking an end of word) must land on the
+        # decoded node, or the fault on the next read would overwrite it
+        if name in _LAZY:
+            try:
+                object.__getattribute__(self, "children")
+            except AttributeError:
+                _fault(self)
+        object.__setattr__(self, name, value)
+
+
+class _MappedTrieNode(TrieNode):
+    """Character-trie node whose children/postings are decoded on first access."""
+
+    def __init__(self, snapshot, offset: int, label: str = ""):
+        self._snapshot = snapshot
+        self._offset = offset
+        self.topk = None
+
+    def __getattr__(self, name):
+        if name in _LAZY:
+            _fault(self)
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        # see _MappedRadixNode.__setattr__
+        if name in _LAZY and "children" not in self.__dict__:
+            _fault(self)
+        object.__setattr__(self, name, value)
+
+
+class MappedSnapshot:
+    """Read-only view of a snapshot file through `mmap`."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.rows, radix, self.store_skus_in_nodes, has_tokens,
+         self._trie_root, self._token_root) = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != 1:
+            raise ValueError(f"{path} is not an inventory snapshot")
+        self.radix = bool(radix)
+        self.has_token_index = bool(has_tokens)
+        self._layout = {}
+        pos = _HEADER.size
+        for name in _SECTIONS:
+            self._layout[name] = _SECTION.unpack_from(self.mm, pos)
+            pos += _SECTION.size
+
+    def _bytes(self, name: str):
+        offset, length = self._layout[name]
+        return self.mm[offset:offset + length]
+
+    def column(self, name: str, typecode: str) -> array:
+        values = array(typecode)
+        values.frombytes(self._bytes(name))
+        return values
+
+    def strings(self, name: str, count: int) -> list[str]:
+        """Split a NUL-joined blob holding `count` strings."""
+        if not count:
+            return []
+        strings = self._bytes(name).decode().split("\0")
+        if len(strings) != count:
+            raise ValueError(f"snapshot section {name!r} holds {len(strings)} strings, expected {count}")
+        return strings
+
+    def category_names(self) -> list[str]:
+        return self.strings("category_names", self._layout["category_offsets"][1] // 8 - 1)
+
+    def categories(self) -> dict[str, PostingList]:
+        offsets = self.column("category_offsets", "Q")
+        names = self.category_names()
+        offset, _ = self._layout["category_postings"]
+        index = {}
+        for i, name in enumerate(names):
+            posting = PostingList()
+            posting.frombytes(self.mm[offset + 4 * offsets[i]:offset + 4 * offsets[i + 1]])
+            if posting:
+                index[name] = posting
+        return index
+
+    def _trie(self, root_offset: int, store_skus_in_nodes: bool, unique_ids: bool):
+        cls, node_cls = (RadixTrie, _MappedRadixNode) if self.radix else (Trie, _MappedTrieNode)
+        trie = cls.__new__(cls)
+        trie._posting = PostingList
+        trie.store_skus_in_nodes = store_skus_in_nodes
+        trie.unique_ids = unique_ids
+        trie.root = node_cls(self, root_offset)
+        return trie
+
+    def search_trie(self):
+        return self._trie(self._trie_root, bool(self.store_skus_in_nodes), True)
+
+    def token_index(self):
+        return self._trie(self._token_root, True, False) if self.has_token_index else None
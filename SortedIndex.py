@@ -0,0 +1,164 @@
+"""Ordered secondary index of (key, id) pairs for range queries.
+
+`InventoryManager(range_indexes=True)` keeps one `SortedIndex` on price and
+one on quantity. Entries are kept sorted by (key, id) in a list of buckets,
+each bucket a pair of parallel arrays (`array(typecode)` for keys and
+`array('I')` for SKU ids). This is the layout used by sorted-container
+libraries: bisecting the bucket maxima and then the bucket is O(log n),
+inserting or deleting shifts at most one bucket (bounded by `load`), and a
+range scan is O(log n + k). The arrays keep an entry at 12-16 bytes instead
+of a tuple per entry.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class SortedIndex:
+    def __init__(self, typecode: str = 'd', load: int = 512):
+        self._typecode = typecode
+        self._load = load
+        self._keys: list[array] = []
+        self._ids: list[array] = []
+        # last (largest) key and id of each bucket, for bucket selection
+        self._max_keys: list = []
+        self._max_ids: list[int] = []
+        self._len = 0
+
+    @classmethod
+    def from_pairs(cls, keys, ids, typecode: str = 'd', load: int = 512) -> "SortedIndex":
+        """Build an index from parallel key/id sequences with one sort."""
+        index = cls(typecode, load)
+        index._fill(sorted(zip(keys, ids)))
+        return index
+
+    def _fill(self, pairs: list):
+        """Replace the contents with sorted `(key, id)` pairs, in full buckets."""
+        load = self._load
+        self._keys, self._ids, self._max_keys, self._max_ids = [], [], [], []
+        for start in range(0, len(pairs), load):
+            chunk = pairs[start:start + load]
+            self._keys.append(array(self._typecode, [key for key, _ in chunk]))
+            self._ids.append(array('I', [id_ for _, id_ in chunk]))
+            self._max_keys.append(chunk[-1][0])
+            self._max_ids.append(chunk[-1][1])
+        self._len = len(pairs)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _bucket_for(self, key, id_) -> int:
+        """Index of the first bucket whose max (key, id) is >= (key, id)."""
+        b = bisect_left(self._max_keys, key)
+        # equal keys may span several buckets; order within them is by id
+        while b < len(self._max_keys) and self._max_keys[b] == key and self._max_ids[b] < id_:
+            b += 1
+        return b
+
+    @staticmethod
+    def _position(keys: array, ids: array, key, id_) -> int:
+        lo = bisect_left(keys, key)
+        hi = bisect_right(keys, key, lo)
+        return bisect_left(ids, id_, lo, hi)
+
+    def add(self, key, id_: int):
+        if not self._keys:
+            self._keys.append(array(self._typecode, [key]))
+            self._ids.append(array('I', [id_]))
+            self._max_keys.append(key)
+            self._max_ids.append(id_)
+            self._len = 1
+            return
+        b = self._bucket_for(key, id_)
+        if b == len(self._keys):
+            b -= 1  # larger than everything: append to the last bucket
+        keys, ids = self._keys[b], self._ids[b]
+        pos = self._position(keys, ids, key, id_)
+        keys.insert(pos, key)
+        ids.insert(pos, id_)
+        self._max_keys[b] = keys[-1]
+        self._max_ids[b] = ids[-1]
+        self._len += 1
+        if len(keys) > 2 * self._load:
+            self._split(b)
+
+    def _split(self, b: int):
+        keys, ids = self._keys[b], self._ids[b]
+        half = len(keys) // 2
+        self._keys[b:b + 1] = [keys[:half], keys[half:]]
+        self._ids[b:b + 1] = [ids[:half], ids[half:]]
+        self._max_keys[b:b + 1] = [keys[half - 1], keys[-1]]
+        self._max_ids[b:b + 1] = [ids[half - 1], ids[-1]]
+
+    def remove(self, key, id_: int) -> bool:
+        """Remove the (key, id) entry; returns False if it is not present."""
+        b = self._bucket_for(key, id_)
+        if b == len(self._keys):
+            return False
+        keys, ids = self._keys[b], self._ids[b]
+        pos = self._position(keys, ids, key, id_)
+        if pos == len(keys) or keys[pos] != key or ids[pos] != id_:
+            return False
+        del keys[pos]
+        del ids[pos]
+        self._len -= 1
+        if not keys:
+            del self._keys[b], self._ids[b], self._max_keys[b], self._max_ids[b]
+        else:
+            self._max_keys[b] = keys[-1]
+            self._max_ids[b] = ids[-1]
+        return True
+
+    def move_many(self, moves):
+        """Re-key many entries: `moves` is a list of `(old key, new key, id)`.
+
+        A batch moving more than 1/8 of the entries is applied as one
+        merge: the untouched entries are already sorted, so sorting them
+        together with the sorted moved entries is a single merge pass.
+        Smaller batches are a `remove`/`add` pair per entry, which is
+        cheaper below that size.
+        """
+        if len(moves) * 8 <= self._len:
+            for old, new, id_ in moves:
+                self.remove(old, id_)
+                self.add(new, id_)
+            return
+        moved = {id_: new for _, new, id_ in moves}
+        pairs = [(key, id_) for keys, ids in zip(self._keys, self._ids)
+                 for key, id_ in zip(keys, ids) if id_ not in moved]
+        pairs.extend(sorted((new, id_) for id_, new in moved.items()))
+        pairs.sort()
+        self._fill(pairs)
+
+    def irange(self, lo=None, hi=None, offset: int = 0, limit: int | None = None):
+        """Yield ids with lo <= key <= hi in (key, id) order.
+
+        `None` bounds are open. The first `offset` matches are skipped a
+        bucket at a time, then at most `limit` ids are yielded.
+        """
+        if lo is None:
+            b, pos = 0, 0
+        else:
+            b = bisect_left(self._max_keys, lo)
+            pos = bisect_left(self._keys[b], lo) if b < len(self._keys) else 0
+        # skip whole buckets while the offset covers them
+        while offset and b < len(self._keys):
+            remaining = len(self._keys[b]) - pos
+            if offset < remaining:
+                pos += offset
+                offset = 0
+                break
+            offset -= remaining
+            b, pos = b + 1, 0
+        emitted = 0
+        while b < len(self._keys):
+            keys, ids = self._keys[b], self._ids[b]
+            while pos < len(keys):
+                if hi is not None and keys[pos] > hi:
+                    return
+                if limit is not None and emitted >= limit:
+                    return
+                yield ids[pos]
+                emitted += 1
+                pos += 1
+            b, pos = b + 1, 0
@@ -9,29 +9,421 @@ If `store_skus_in_nodes=True` then every node stores the set of SKUs
 of all products that share that prefix (fast searches, higher memory).
 If False, only end-of-word nodes keep SKUs and `search(prefix)` collects
 SKUs by traversing the subtree (lower memory, slower searches).
+
+`RadixTrie` is a path-compressed (Patricia) variant with the same
+`insert`/`search`/`delete` contract. Each edge carries a string label
+instead of a single character, so the number of nodes is bounded by the
+number of distinct names (at most 2x) rather than the total number of
+characters inserted.
+
+Both tries accept a `posting` factory for the per-node SKU collection. It
+defaults to `set` (SKU strings); `InventoryManager` passes
+`PostingList.PostingList` and inserts dense integer ids instead.
+
+Optionally (see `enable_topk`) every node also keeps a bounded top-k list
+of ids ordered by an external score array, which makes ranked
+autocomplete O(prefix length + k).
+
+`iter_prefix` streams matches lazily in lexicographic order and can resume
+from a cursor, so paging never walks more of the trie than is consumed.
+With `store_skus_in_nodes=True` and `unique_ids=True` (one word per id, as
+in a name index) the ids ending at a node are found by bisecting its
+children's postings (see `_own_ids`) rather than by collecting the union
+of its subtree, so an early end-of-word node stays cheap to pass.
+
+`build(words, ids)` constructs a whole trie from a word list in one pass
+over the sorted words (see `_BuildMixin`), which is how `bulk_load` fills
+its tries; `processes > 1` builds leading-character shards in a process
+pool and grafts them onto the root.
+
+`fuzzy_search` walks the trie with a bounded Levenshtein (optionally
+Damerau) DP row per node and prunes branches that exceed the edit budget.
 """
 
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush, nsmallest
+from itertools import count
 from typing import Set, Dict
 
 
 class TrieNode:
-    def __init__(self):
+    def __init__(self, posting=set):
         self.children: Dict[str, TrieNode] = {}
         self.is_end_of_word: bool = False
         # Only used in modes that keep SKUs at nodes or to store at end nodes
-        self.skus: Set[str] = set()
+        self.skus: Set[str] = posting()
+        # Best-k ids of the subtree when ranking is enabled (None == empty)
+        self.topk = None
+
+
+def _own_ids(ids, children) -> list:
+    """Ids of the sorted `ids` that are in none of the sorted `children`.
+
+    Each child holds a subset of `ids` and no two children share an id, so
+    the children's ids between the first and last value of a run
+    `ids[lo:hi]` tell how many own ids the run holds without looking at
+    them. Runs holding none are skipped, runs holding nothing else are taken
+    whole, and the rest are halved: the few ids that end at a node are found
+    in O(own * log n * fanout * log n) instead of a walk over its subtree.
+    """
+    missing = len(ids) - sum(len(c) for c in children)
+    if missing <= 0:
+        return []
+    if missing * len(children) * len(ids).bit_length() >= len(ids):
+        # many own ids: one C-level set difference is cheaper than bisecting
+        return sorted(set(ids).difference(*children))
+    own = []
+    stack = [(0, len(ids))]
+    while stack:
+        lo, hi = stack.pop()
+        first, last = ids[lo], ids[hi - 1]
+        covered = sum(bisect_right(c, last) - bisect_left(c, first) for c in children)
+        if covered == hi - lo:
+            continue
+        if covered == 0:
+            own.extend(ids[lo:hi])
+        else:
+            mid = (lo + hi) // 2
+            # left half last, so it is popped first and ids come out ascending
+            stack.append((mid, hi))
+            stack.append((lo, mid))
+            continue
+        if len(own) == missing:
+            break
+    return own
+
+
+class _TopKMixin:
+    """Bounded per-node top-k lists shared by `Trie` and `RadixTrie`.
+
+    `scores` is indexed by the (integer) ids stored in the trie; higher is
+    better and ties are broken by the smaller id. The invariant is that a
+    node's top-k is the best k of its end-of-word ids plus its children's
+    top-k lists, so a node can be refilled in O(fanout * k) without walking
+    its subtree.
+    """
+
+    topk_size: int = 0
+    scores = None
+    # True when every id is stored under at most one word (a name index, not
+    # a token index); node mode then finds a node's own ids by bisection
+    unique_ids: bool = False
+
+    def enable_topk(self, k: int, scores):
+        """Turn on top-k maintenance and build every node's list bottom-up."""
+        self.topk_size = k
+        self.scores = scores
+        # iterative post-order so children are filled before their parent
+        order = []
+        stack = [self.root]
+        while stack:
+            n = stack.pop()
+            order.append(n)
+            stack.extend(n.children.values())
+        for n in reversed(order):
+            self._refill_topk(n)
+
+    def _rank_key(self, id_):
+        return (-self.scores[id_], id_)
+
+    def _end_ids(self, node):
+        """Ids of words that end exactly at `node`."""
+        if not node.is_end_of_word:
+            return ()
+        if not self.store_skus_in_nodes or not node.children or node is self.root:
+            # the root never aggregates SKUs of longer words
+            return node.skus
+        # node mode: node.skus also holds every id below this node
+        if self.unique_ids and isinstance(node.skus, array):
+            return _own_ids(node.skus, [c.skus for c in node.children.values()])
+        below = set()
+        for c in node.children.values():
+            below.update(c.skus)
+        return [i for i in node.skus if i not in below]
+
+    def _refill_topk(self, node):
+        candidates = list(self._end_ids(node))
+        for c in node.children.values():
+            if c.topk:
+                candidates.extend(c.topk)
+        node.topk = array("I", nsmallest(self.topk_size, candidates, key=self._rank_key))
+
+    def rank_update(self, word: str, id_: int):
+        """Re-rank `id_` (stored under `word`) after insert or score change.
+
+        Walks the path bottom-up. A node that already lists `id_` is refilled
+        (the score may have dropped below the unseen k+1-th entry); otherwise
+        `id_` is inserted if it qualifies. Once `id_` does not qualify at a
+        node it cannot qualify at any ancestor, so the walk stops early.
+        """
+        if not self.topk_size:
+            return
+        key = self._rank_key(id_)
+        for node in reversed(self._path(word)):
+            topk = node.topk
+            if topk is not None and id_ in topk:
+                self._refill_topk(node)
+                continue
+            if topk is None:
+                node.topk = topk = array("I")
+            if len(topk) >= self.topk_size and key >= self._rank_key(topk[-1]):
+                break
+            pos = 0
+            while pos < len(topk) and self._rank_key(topk[pos]) < key:
+                pos += 1
+            topk.insert(pos, id_)
+            if len(topk) > self.topk_size:
+                topk.pop()
+
+    def rank_remove(self, word: str, id_: int):
+        """Drop `id_` from top-k lists after it was deleted under `word`."""
+        if not self.topk_size:
+            return
+        for node in reversed(self._path(word, partial=True)):
+            if node.topk is not None and id_ in node.topk:
+                self._refill_topk(node)
+
+    def top(self, prefix: str, k: int):
+        """Return up to `k` best ids for `prefix`, or None if k exceeds the
+        maintained list size."""
+        if k > self.topk_size:
+            return None
+        node = self._find_node(prefix)
+        if node is None or node.topk is None:
+            return []
+        return node.topk[:k].tolist()
+
+
+class _StreamMixin:
+    """Lexicographic, resumable prefix traversal shared by both tries."""
+
+    def iter_prefix(self, prefix: str, after=None):
+        """Yield `(word, id)` pairs for words starting with `prefix`.
+
+        Words come in lexicographic order and ids of the same word in
+        ascending order. `after` is a `(word, id)` cursor previously yielded;
+        the traversal seeks straight to it instead of re-walking the earlier
+        part of the subtree. Nothing is materialized up front: the caller
+        stops the walk simply by not pulling further items.
+        """
+        located = self._locate(prefix)
+        if located is None:
+            return
+        node, word = located
+        stack = []
+        if after is None:
+            stack.append((node, word, None))
+        else:
+            self._seek(node, word, after[0], after[1], stack)
+        while stack:
+            n, w, min_id = stack.pop()
+            # push children largest-first so the smallest is visited next
+            for key in sorted(n.children, reverse=True):
+                child = n.children[key]
+                stack.append((child, w + self._edge_label(key, child), None))
+            if n.is_end_of_word:
+                for id_ in sorted(self._end_ids(n)):
+                    if min_id is None or id_ > min_id:
+                        yield w, id_
+
+    def _seek(self, node, word: str, after_word: str, after_id, stack):
+        """Fill `stack` with the parts of `node`'s subtree that sort after the
+        cursor, walking down only the cursor's own path."""
+        while True:
+            if word == after_word:
+                # remaining ids at this node, then every descendant
+                stack.append((node, word, after_id))
+                return
+            if word > after_word:
+                stack.append((node, word, None))
+                return
+            if not after_word.startswith(word):
+                return  # whole subtree sorts before the cursor
+            nxt = None
+            for key in sorted(node.children, reverse=True):
+                child = node.children[key]
+                child_word = word + self._edge_label(key, child)
+                if after_word.startswith(child_word):
+                    nxt = (child, child_word)
+                elif child_word > after_word:
+                    stack.append((child, child_word, None))
+            if nxt is None:
+                return
+            node, word = nxt
 
 
-class Trie:
-    def __init__(self, store_skus_in_nodes: bool = True):
-        self.root = TrieNode()
+class _FuzzyMixin:
+    """Typo-tolerant prefix search shared by both tries."""
+
+    def fuzzy_search(self, query: str, max_distance: int, limit: int | None = None,
+                     transpositions: bool = True):
+        """Return `(distance, id)` pairs for words with a prefix close to `query`.
+
+        The distance of a word is the smallest edit distance between `query`
+        and any prefix of the word. Each trie edge character extends one DP
+        row; a branch is pruned once the row minimum exceeds `max_distance`
+        or can no longer beat the best match already found above it. Only the
+        diagonal band of width 2 * max_distance + 1 is computed.
+
+        Branches are expanded best-first by their row minimum (a lower bound
+        on every distance below them), so matches come out ordered by
+        distance, then by word, and the walk stops as soon as `limit` ids
+        have been produced.
+        """
+        qlen = len(query)
+        cap = max_distance + 1
+        first_row = list(range(qlen + 1))
+        seq = count()
+        # Entries: (bound, kind, word, seq, payload). kind 0 expands a node and
+        # sorts before kind 1, which emits a matched subtree, at equal bound.
+        root_best = min(first_row[-1], cap)
+        heap = [(0, 0, "", next(seq), (self.root, first_row, None, "", root_best))]
+        if root_best <= max_distance:
+            # a query no longer than the budget matches the empty prefix
+            heappush(heap, (root_best, 1, "", next(seq), self.root))
+        seen = set()
+        results = []
+        while heap:
+            bound, kind, word, _, payload = heappop(heap)
+            if kind == 1:
+                for id_ in self._subtree_ids(payload):
+                    if id_ not in seen:
+                        seen.add(id_)
+                        results.append((bound, id_))
+                        if limit is not None and len(results) >= limit:
+                            return results
+                continue
+            node, row, prev_row, prev_char, best = payload
+            for key, child in node.children.items():
+                label = self._edge_label(key, child)
+                child_word = word + label
+                r, pr, pc, child_best = row, prev_row, prev_char, best
+                pruned = False
+                for i, ch in enumerate(label, start=len(word) + 1):
+                    # i is the number of trie characters consumed so far
+                    new_row = [cap] * (qlen + 1)
+                    new_row[0] = min(i, cap)
+                    for j in range(max(1, i - max_distance), min(qlen, i + max_distance) + 1):
+                        cost = 0 if query[j - 1] == ch else 1
+                        v = min(new_row[j - 1] + 1, r[j] + 1, r[j - 1] + cost)
+                        if (transpositions and pr is not None and j > 1
+                                and ch == query[j - 2] and pc == query[j - 1]):
+                            v = min(v, pr[j - 2] + 1)
+                        new_row[j] = min(v, cap)
+                    pr, r, pc = r, new_row, ch
+                    if r[-1] < child_best:
+                        child_best = r[-1]
+                        heappush(heap, (child_best, 1, child_word, next(seq), child))
+                    if min(r) >= child_best:
+                        # no deeper extension can improve on what is recorded
+                        pruned = True
+                        break
+                if not pruned:
+                    heappush(heap, (min(r), 0, child_word, next(seq), (child, r, pr, pc, child_best)))
+        return results
+
+    def _subtree_ids(self, node):
+        """Ids of every word at or below `node`, in ascending order."""
+        if self.store_skus_in_nodes and node is not self.root:
+            return node.skus
+        collected = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.is_end_of_word:
+                collected.extend(self._end_ids(n))
+            stack.extend(n.children.values())
+        return sorted(collected)
+
+
+def _build_shard(trie_cls, store_skus_in_nodes, posting, words, ids, unique):
+    """Build the sub-trie of one shard of sorted words in a worker process.
+
+    Returns the root's children, which the parent grafts onto its own root.
+    """
+    trie = trie_cls(store_skus_in_nodes=store_skus_in_nodes, posting=posting)
+    trie._build_sorted(words, ids, trie._run_posting(unique))
+    return trie.root.children
+
+
+class _BuildMixin:
+    """Bulk construction from a whole word list in one linear pass.
+
+    `build` sorts the words once; in sorted order each word shares its
+    longest common prefix with the path of the previous word, so the build
+    keeps only that path, creates every node exactly once, and seals a node
+    as soon as the next word leaves its subtree. The ids under a node are
+    then a contiguous run of the sorted order, so a node's posting list is
+    made with one slice instead of one `add` per word.
+
+    With `processes > 1` the sorted words are cut into shards at
+    leading-character boundaries. Each shard's sub-trie is built in a worker
+    process and its top-level children are grafted onto the root; shards
+    share no node below the root, so the result is identical.
+    """
+
+    def build(self, words, ids, processes: int = 0):
+        """Replace the contents with `words[i] -> ids[i]` for every i.
+
+        An id may appear under several words (as in a token index).
+        """
+        # stable sort: equal words keep their (increasing) id order
+        order = sorted(range(len(words)), key=words.__getitem__)
+        words = [words[i] for i in order]
+        ids = [ids[i] for i in order]
+        # a run can only hold an id twice if some id repeats
+        unique = len(set(ids)) == len(ids)
+        if processes > 1 and len(words) >= 2 * processes:
+            self._build_sharded(words, ids, unique, processes)
+        else:
+            self._build_sorted(words, ids, self._run_posting(unique))
+
+    def _run_posting(self, unique: bool):
+        if unique:
+            return self._posting
+
+        def make_posting(run):
+            return self._posting(set(run))
+        return make_posting
+
+    def _build_sharded(self, words, ids, unique, processes):
+        # empty words end at the root and sort first: build the root from
+        # them here, then graft the shards' subtrees below it
+        start = bisect_right(words, "")
+        self._build_sorted(words[:start], ids[:start], self._run_posting(unique))
+        cuts = [start]
+        for s in range(1, processes):
+            cut = max(cuts[-1], start + (len(words) - start) * s // processes)
+            if cut < len(words):
+                # move the cut past every word sharing words[cut]'s first character
+                cut = bisect_left(words, chr(ord(words[cut][0]) + 1), cut)
+            if cut > cuts[-1]:
+                cuts.append(cut)
+        if cuts[-1] < len(words):
+            cuts.append(len(words))
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(_build_shard, type(self), self.store_skus_in_nodes, self._posting,
+                                   words[lo:hi], ids[lo:hi], unique)
+                       for lo, hi in zip(cuts, cuts[1:])]
+            children = self.root.children
+            for future in futures:
+                children.update(future.result())
+
+
+class Trie(_BuildMixin, _TopKMixin, _StreamMixin, _FuzzyMixin):
+    def __init__(self, store_skus_in_nodes: bool = True, posting=set, unique_ids: bool = False):
+        self._posting = posting
+        self.root = TrieNode(posting)
         self.store_skus_in_nodes = store_skus_in_nodes
+        self.unique_ids = unique_ids
 
     def insert(self, word: str, sku: str):
         node = self.root
         for char in word:
             if char not in node.children:
-                node.children[char] = TrieNode()
+                node.children[char] = TrieNode(self._posting)
             node = node.children[char]
             if self.store_skus_in_nodes:
                 node.skus.add(sku)
@@ -47,6 +439,29 @@ class Trie:
             node = node.children[char]
         return node
 
+    def _locate(self, prefix: str):
+        """Return `(node, word)` for the node covering `prefix`, or None."""
+        node = self._find_node(prefix)
+        return (node, prefix) if node is not None else None
+
+    def _edge_label(self, key: str, child) -> str:
+        return key
+
+    def _path(self, word: str, partial: bool = False):
+        """Return [root, ..., end node] for `word`.
+
+        With `partial=True` the existing leading part of the path is returned
+        when the word is not (or no longer) fully present.
+        """
+        node = self.root
+        path = [node]
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return path if partial else []
+            path.append(node)
+        return path
+
     def search(self, prefix: str) -> Set[str]:
         """Return set of SKUs matching the prefix.
 
@@ -57,20 +472,20 @@ class Trie:
         """
         node = self._find_node(prefix)
         if not node:
-            return set()
+            return self._posting()
         if self.store_skus_in_nodes:
-            return set(node.skus)
+            return self._posting(node.skus)
         # collect SKUs by traversing subtree
-        result: Set[str] = set()
+        collected = []
 
         stack = [node]
         while stack:
             n = stack.pop()
             if n.is_end_of_word:
-                result.update(n.skus)
+                collected.extend(n.skus)
             for child in n.children.values():
                 stack.append(child)
-        return result
+        return self._posting(collected)
 
     def delete(self, word: str, sku: str):
         node = self.root
@@ -88,4 +503,312 @@ class Trie:
         if self.store_skus_in_nodes:
             # remove sku from all prefix nodes encountered
             for n in nodes_stack:
-                n.skus.discard(sku)
\ No newline at end of file
+                n.skus.discard(sku)
+
+    def _build_sorted(self, words, ids, make_posting):
+        posting = self._posting
+        store_nodes = self.store_skus_in_nodes
+        # in node mode every non-root node gets its posting when sealed, so
+        # it is created with a throwaway empty tuple instead of a posting
+        node_posting = tuple if store_nodes else posting
+        self.root = root = TrieNode(posting)
+        # path[d] is [node, lo, end_lo, end_hi] for the first d characters
+        # of the previous word: its subtree starts at word lo and the words
+        # ending at it are end_lo:end_hi (end_lo < 0: none)
+        path = [[root, 0, -1, -1]]
+        prev = ""
+        n = len(words)
+        for i in range(n + 1):
+            word = words[i] if i < n else ""
+            common = 0
+            limit = min(len(prev), len(word))
+            while common < limit and prev[common] == word[common]:
+                common += 1
+            if i == n:
+                common = -1
+            # seal the nodes the new word leaves
+            while len(path) > common + 1:
+                node, lo, end_lo, end_hi = path.pop()
+                if end_lo >= 0:
+                    node.is_end_of_word = True
+                if store_nodes and node is not root:
+                    node.skus = make_posting(ids[lo:i])
+                elif end_lo >= 0:
+                    node.skus = make_posting(ids[end_lo:end_hi])
+            if i == n:
+                break
+            node = path[-1][0]
+            for char in word[common:]:
+                child = TrieNode(node_posting)
+                node.children[char] = child
+                node = child
+                path.append([node, i, -1, -1])
+            frame = path[-1]
+            if frame[2] < 0:
+                frame[2] = i
+            frame[3] = i + 1
+            prev = word
+
+    def node_count(self) -> int:
+        """Return the number of nodes in the trie (including the root)."""
+        count = 0
+        stack = [self.root]
+        while stack:
+            n = stack.pop()
+            count += 1
+            stack.extend(n.children.values())
+        return count
+
+
+class RadixTrieNode:
+    # __slots__ keeps per-node overhead low; radix nodes are far fewer than
+    # character nodes but each one still pays for a dict and a set.
+    __slots__ = ("label", "children", "is_end_of_word", "skus", "topk")
+
+    def __init__(self, label: str = "", posting=set):
+        # Edge label leading into this node (empty for the root)
+        self.label: str = label
+        # Children keyed by the first character of their edge label
+        self.children: Dict[str, RadixTrieNode] = {}
+        self.is_end_of_word: bool = False
+        self.skus: Set[str] = posting()
+        self.topk = None
+
+
+class RadixTrie(_BuildMixin, _TopKMixin, _StreamMixin, _FuzzyMixin):
+    """Path-compressed trie with the same contract as `Trie`.
+
+    Chains of single-child nodes are collapsed into one edge labelled with
+    the whole substring. A prefix query may therefore end in the middle of
+    an edge; in that case the node below the edge represents the prefix.
+    """
+
+    def __init__(self, store_skus_in_nodes: bool = True, posting=set, unique_ids: bool = False):
+        self._posting = posting
+        self.root = RadixTrieNode(posting=posting)
+        self.store_skus_in_nodes = store_skus_in_nodes
+        self.unique_ids = unique_ids
+
+    def insert(self, word: str, sku: str):
+        node = self.root
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None:
+                # No edge shares the next character: hang the rest of the word
+                leaf = RadixTrieNode(word[i:], self._posting)
+                node.children[word[i]] = leaf
+                node = leaf
+                if self.store_skus_in_nodes:
+                    node.skus.add(sku)
+                break
+            label = child.label
+            # length of the common prefix between the edge label and the rest of the word
+            common = 1
+            limit = min(len(label), len(word) - i)
+            while common < limit and label[common] == word[i + common]:
+                common += 1
+            if common < len(label):
+                # Split the edge: child keeps the tail, a new middle node takes the head
+                mid = RadixTrieNode(label[:common], self._posting)
+                child.label = label[common:]
+                mid.children[child.label[0]] = child
+                if self.store_skus_in_nodes:
+                    mid.skus = self._posting(child.skus)
+                if child.topk is not None:
+                    # before this insert mid's subtree is exactly child's subtree
+                    mid.topk = array("I", child.topk)
+                node.children[word[i]] = mid
+                child = mid
+            node = child
+            if self.store_skus_in_nodes:
+                node.skus.add(sku)
+            i += common
+        node.is_end_of_word = True
+        # Always add sku to end node to support subtree-collection mode
+        node.skus.add(sku)
+
+    def _find_node(self, prefix: str):
+        """Return the node covering `prefix`, or None.
+
+        If the prefix ends inside an edge label, the node at the bottom of
+        that edge is returned since its subtree is exactly the set of words
+        starting with `prefix`.
+        """
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            label = child.label
+            remaining = len(prefix) - i
+            if remaining <= len(label):
+                return child if label.startswith(prefix[i:]) else None
+            if not prefix.startswith(label, i):
+                return None
+            node = child
+            i += len(label)
+        return node
+
+    def _locate(self, prefix: str):
+        """Return `(node, word)` for the node covering `prefix`, or None.
+
+        `word` is the full string up to `node`, which may extend past the
+        prefix when it ends inside an edge label.
+        """
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            label = child.label
+            if len(prefix) - i <= len(label):
+                if not label.startswith(prefix[i:]):
+                    return None
+                return child, prefix[:i] + label
+            if not prefix.startswith(label, i):
+                return None
+            node = child
+            i += len(label)
+        return node, prefix
+
+    def _edge_label(self, key: str, child) -> str:
+        return child.label
+
+    def _path(self, word: str, partial: bool = False):
+        """Return [root, ..., end node] for `word` (see `Trie._path`)."""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return path if partial else []
+            node = child
+            path.append(node)
+            i += len(child.label)
+        return path
+
+    def search(self, prefix: str) -> Set[str]:
+        """Return set of SKUs matching the prefix.
+
+        Complexity mirrors `Trie.search`, except that the subtree walk in
+        subtree mode visits O(number of names) nodes instead of
+        O(number of characters).
+        """
+        node = self._find_node(prefix)
+        if not node:
+            return self._posting()
+        if self.store_skus_in_nodes:
+            return self._posting(node.skus)
+        collected = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.is_end_of_word:
+                collected.extend(n.skus)
+            stack.extend(n.children.values())
+        return self._posting(collected)
+
+    def delete(self, word: str, sku: str):
+        node = self.root
+        path = []
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return  # word not found
+            node = child
+            path.append(node)
+            i += len(child.label)
+
+        node.skus.discard(sku)
+        if self.store_skus_in_nodes:
+            for n in path:
+                n.skus.discard(sku)
+        if self.store_skus_in_nodes and path:
+            # node.skus also holds SKUs of longer words; it is still an end
+            # node only if some SKU terminates here (the same SKU may sit
+            # under several children, e.g. in a token index)
+            node.is_end_of_word = node.is_end_of_word and bool(self._end_ids(node))
+        else:
+            node.is_end_of_word = node.is_end_of_word and bool(node.skus)
+
+        self._compact(path)
+
+    def _compact(self, path):
+        """Prune empty leaves and re-merge single-child nodes along `path`."""
+        for idx in range(len(path) - 1, -1, -1):
+            n = path[idx]
+            parent = path[idx - 1] if idx else self.root
+            if n.is_end_of_word:
+                break
+            if not n.children:
+                del parent.children[n.label[0]]
+                continue
+            if len(n.children) == 1:
+                (only,) = n.children.values()
+                only.label = n.label + only.label
+                parent.children[only.label[0]] = only
+            break
+
+    def _build_sorted(self, words, ids, make_posting):
+        posting = self._posting
+        store_nodes = self.store_skus_in_nodes
+        # see Trie._build_sorted
+        node_posting = tuple if store_nodes else posting
+        self.root = root = RadixTrieNode(posting=posting)
+        # path of the previous word as [node, depth, lo, end_lo, end_hi]
+        # frames; depth is the string length at the bottom of node's edge
+        path = [[root, 0, 0, -1, -1]]
+        prev = ""
+        n = len(words)
+        for i in range(n + 1):
+            word = words[i] if i < n else ""
+            common = 0
+            limit = min(len(prev), len(word))
+            while common < limit and prev[common] == word[common]:
+                common += 1
+            if i == n:
+                common = -1
+            while path and path[-1][1] > common:
+                node, _, lo, end_lo, end_hi = path.pop()
+                if end_lo >= 0:
+                    node.is_end_of_word = True
+                if store_nodes and node is not root:
+                    node.skus = make_posting(ids[lo:i])
+                elif end_lo >= 0:
+                    node.skus = make_posting(ids[end_lo:end_hi])
+                parent_depth = path[-1][1] if path else 0
+                if parent_depth < common:
+                    # the words diverge inside node's edge: split it
+                    cut = common - parent_depth
+                    mid = RadixTrieNode(node.label[:cut], node_posting)
+                    node.label = node.label[cut:]
+                    mid.children[node.label[0]] = node
+                    path[-1][0].children[mid.label[0]] = mid
+                    path.append([mid, common, lo, -1, -1])
+            if i == n:
+                # the root has depth 0 and was sealed by the loop above
+                break
+            if len(word) > common:
+                leaf = RadixTrieNode(word[common:], node_posting)
+                path[-1][0].children[word[common]] = leaf
+                path.append([leaf, len(word), i, -1, -1])
+            frame = path[-1]
+            if frame[3] < 0:
+                frame[3] = i
+            frame[4] = i + 1
+            prev = word
+
+    def node_count(self) -> int:
+        """Return the number of nodes in the trie (including the root)."""
+        count = 0
+        stack = [self.root]
+        while stack:
+            n = stack.pop()
+            count += 1
+            stack.extend(n.children.values())
+        return count
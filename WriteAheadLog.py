@@ -0,0 +1,335 @@
+"""Append-only write-ahead log of inventory mutations.
+
+`InventoryManager(wal=WriteAheadLog("inventory.wal"))` replays the log on
+construction and then appends one record per successful mutation:
+
+    ["add", sku, name, price, quantity, category]
+    ["remove", sku]
+    ["qty", sku, quantity]
+    ["name", sku, name]
+    ["cat", sku, category]
+    ["txn", [record, ...]]      # several records that apply together
+
+Records carry absolute values, so replaying a record twice leaves the same
+state; compaction relies on this. Each record is one frame: a
+`<length, crc32>` header and a compact JSON payload. Replay stops at the
+first torn or corrupt frame (a crash mid-write) and truncates the file
+there.
+
+fsync policies:
+
+- "always":   every commit does its own fsync before returning.
+- "group":    group commit. A committer waits until its record is on disk,
+              but one fsync covers every record appended before it started:
+              the first waiter flushes and fsyncs the whole buffer while
+              later committers queue behind it. Concurrent registers, or a
+              `deferred()` batch, share one fsync.
+- "interval": commits return after the write to the OS; a background
+              thread fsyncs every `interval` seconds (bounded loss window).
+- "none":     write to the OS only; survives a process crash, not power loss.
+
+Compaction folds the snapshot and the log into a new snapshot (written to
+a temp file, fsynced and renamed into place) and truncates the log, which
+keeps replay time proportional to the catalog rather than to history. It
+runs automatically once `compact_every` records have been logged.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+from Product import Product
+
+_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+_FSYNC_POLICIES = ("always", "group", "interval", "none")
+
+
+def _encode(record) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str):
+    """Return `(records, good_length)` for the intact prefix of a log file."""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        data = f.read()
+    records = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, pos)
+        start = pos + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break  # torn write: everything from here on is unusable
+        records.append(json.loads(payload))
+        pos = start + length
+    return records, pos
+
+
+def apply_record(state: dict, record):
+    """Fold one record into `state` (sku -> [name, price, quantity, category])."""
+    op = record[0]
+    if op == "add":
+        state[record[1]] = list(record[2:6])
+    elif op == "remove":
+        state.pop(record[1], None)
+    elif op == "txn":
+        for sub in record[1]:
+            apply_record(state, sub)
+    else:
+        row = state.get(record[1])
+        if row is None:
+            return
+        if op == "qty":
+            row[2] = record[2]
+        elif op == "name":
+            row[0] = record[2]
+        elif op == "cat":
+            row[3] = record[2]
+
+
+class WriteAheadLog:
+    def __init__(self, path: str, fsync: str = "group", interval: float = 0.05,
+                 snapshot_path: str | None = None, compact_every: int | None = 100000):
+        if fsync not in _FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {_FSYNC_POLICIES}")
+        self.path = path
+        self.snapshot_path = snapshot_path if snapshot_path is not None else path + ".snapshot"
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self._cond = threading.Condition()
+        self._file = None
+        # frames appended but not yet written to the file
+        self._buffer: list[bytes] = []
+        self._appended = 0   # sequence number of the last appended frame
+        self._durable = 0    # sequence number covered by the last fsync
+        self._flushing = False
+        self._records_since_compaction = 0
+        self._local = threading.local()
+        self.fsync_count = 0
+        self._closed = False
+        self._syncer = None
+        if fsync == "interval":
+            self._syncer = threading.Thread(target=self._sync_periodically, args=(interval,), daemon=True)
+
+    # ---- startup ----
+
+    def replay(self) -> list[Product]:
+        """Rebuild the products described by the snapshot and the log.
+
+        Truncates a torn tail, opens the log for appending and returns the
+        products in first-added order, ready for `InventoryManager.bulk_load`.
+        """
+        state: dict[str, list] = {}
+        for record in read_records(self.snapshot_path)[0]:
+            apply_record(state, record)
+        records, good = read_records(self.path)
+        for record in records:
+            apply_record(state, record)
+        if os.path.exists(self.path) and os.path.getsize(self.path) != good:
+            os.truncate(self.path, good)
+        self._records_since_compaction = len(records)
+        self._open()
+        return [Product(sku, name, price, quantity, category)
+                for sku, (name, price, quantity, category) in state.items()]
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            if self._syncer is not None and not self._syncer.is_alive():
+                self._syncer.start()
+
+    # ---- appending ----
+
+    def log(self, record):
+        """Append `record` and commit it, unless inside `transaction()`."""
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(record)
+            return
+        self._commit(self._append(_encode(record)))
+
+    @contextmanager
+    def transaction(self):
+        """Collect this thread's records into one atomic `txn` frame.
+
+        The frame is appended on exit, so exit while still holding whatever
+        locks ordered the mutations. Nested transactions join the outer one.
+        """
+        if getattr(self._local, "pending", None) is not None:
+            yield
+            return
+        self._local.pending = []
+        try:
+            yield
+        finally:
+            records, self._local.pending = self._local.pending, None
+        if records:
+            frame = records[0] if len(records) == 1 else ["txn", records]
+            self._commit(self._append(_encode(frame)))
+
+    @contextmanager
+    def deferred(self, commit: bool = True):
+        """Postpone this thread's commits to the end of the block.
+
+        Every record is still appended in order; the block ends with a
+        single commit, so a batch of transactions costs one fsync. With
+        `commit=False` the block ends without it: the yielded list then
+        holds the sequence number to pass to `commit()`, possibly from
+        another thread (0 when there is nothing to commit).
+        """
+        batch = [0]
+        if getattr(self._local, "deferred", None) is not None:
+            yield batch  # the outer block commits
+            return
+        self._local.deferred = 0
+        try:
+            yield batch
+        finally:
+            seq, self._local.deferred = self._local.deferred, None
+        if not commit:
+            batch[0] = seq
+        elif seq:
+            self._commit(seq)
+
+    def commit(self, seq: int):
+        """Commit the records up to `seq` left open by `deferred(commit=False)`."""
+        if seq:
+            self._commit(seq)
+
+    def _append(self, frame: bytes) -> int:
+        with self._cond:
+            if self._file is None:
+                self._open()
+            self._buffer.append(frame)
+            self._appended += 1
+            self._records_since_compaction += 1
+            if self.fsync in ("interval", "none"):
+                self._write_buffer()
+            return self._appended
+
+    def _write_buffer(self):
+        # caller holds self._cond
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+
+    def _commit(self, seq: int):
+        deferred = getattr(self._local, "deferred", None)
+        if deferred is not None:
+            self._local.deferred = max(deferred, seq)
+            return
+        if self.fsync == "always":
+            with self._cond:
+                self._write_buffer()
+                os.fsync(self._file.fileno())
+                self.fsync_count += 1
+                self._durable = max(self._durable, seq)
+        elif self.fsync == "group":
+            self._wait_durable(seq)
+        if self.compact_every is not None and self._records_since_compaction >= self.compact_every:
+            self.compact()
+
+    def _wait_durable(self, seq: int):
+        with self._cond:
+            while self._durable < seq:
+                if self._flushing:
+                    # another committer is fsyncing; it or the next one covers us
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                upto = self._appended
+                frames, self._buffer = self._buffer, []
+                self._cond.release()
+                try:
+                    # appends continue into the new buffer while we fsync
+                    self._file.write(b"".join(frames))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self.fsync_count += 1
+                self._durable = upto
+                self._cond.notify_all()
+
+    def sync(self):
+        """Write and fsync everything appended so far."""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._write_buffer()
+            if self._durable < self._appended:
+                os.fsync(self._file.fileno())
+                self.fsync_count += 1
+                self._durable = self._appended
+
+    def _sync_periodically(self, interval: float):
+        while True:
+            with self._cond:
+                self._cond.wait(interval)
+                if self._closed:
+                    return
+            self.sync()
+
+    # ---- snapshots and compaction ----
+
+    def write_snapshot(self, products):
+        """Make `products` the whole durable state: new snapshot, empty log."""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._open()
+            frames = (_encode(["add", p.sku, p.name, p.price, p.quantity, p.category]) for p in products)
+            self._replace_snapshot(frames)
+
+    def compact(self):
+        """Fold the log into the snapshot and truncate the log."""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._write_buffer()
+            state: dict[str, list] = {}
+            for record in read_records(self.snapshot_path)[0]:
+                apply_record(state, record)
+            for record in read_records(self.path)[0]:
+                apply_record(state, record)
+            frames = (_encode(["add", sku, *row]) for sku, row in state.items())
+            self._replace_snapshot(frames)
+
+    def _replace_snapshot(self, frames):
+        # caller holds self._cond with no flush in progress
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            for frame in frames:
+                f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # a crash before the truncate below only means the old log is
+        # replayed on top of a snapshot that already includes it, which
+        # is harmless because records are absolute
+        self._buffer.clear()
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "wb")
+        os.fsync(self._file.fileno())
+        self._durable = self._appended
+        self._records_since_compaction = 0
+        self.fsync_count += 2
+
+    def close(self):
+        if self._file is None:
+            return
+        self.sync()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._file.close()
+            self._file = None
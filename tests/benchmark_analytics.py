@@ -0,0 +1,77 @@
+import csv
+import os
+import random
+import sys
+import time
+from InventoryManager import InventoryManager
+from collect_metrics import generate_products
+
+
+# Pure-Python baselines: what callers had to write before the analytics API
+def loop_total_valuation(mgr):
+    return sum(p.price * p.quantity for p in mgr.products.values())
+
+
+def loop_valuation_by_category(mgr):
+    totals = {}
+    for p in mgr.products.values():
+        totals[p.category] = totals.get(p.category, 0.0) + p.price * p.quantity
+    return totals
+
+
+def loop_out_of_stock_count(mgr):
+    return sum(1 for p in mgr.products.values() if p.quantity == 0)
+
+
+def loop_skus_below(mgr, threshold):
+    return [p.sku for p in mgr.products.values() if p.quantity < threshold]
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure_for_N(N):
+    random.seed(12345)
+    mgr = InventoryManager(compress_trie=True, analytics=True)
+    mgr.bulk_load(generate_products(N))
+    a = mgr.analytics
+    # some stock churn so the columns are exercised through the mutation hooks
+    for sku in random.sample(list(mgr.products), min(N, 1000)):
+        mgr.update_quantity(sku, 0)
+
+    row = {'N': N}
+    cases = [
+        ('total_valuation', lambda: loop_total_valuation(mgr), a.total_valuation),
+        ('valuation_by_category', lambda: loop_valuation_by_category(mgr), a.valuation_by_category),
+        ('out_of_stock_count', lambda: loop_out_of_stock_count(mgr), a.out_of_stock_count),
+        ('skus_below_5', lambda: loop_skus_below(mgr, 5), lambda: a.skus_below(5)),
+    ]
+    for name, loop_fn, vec_fn in cases:
+        row[f'{name}_loop_s'] = timed(loop_fn)
+        row[f'{name}_vectorized_s'] = timed(vec_fn)
+        print(f"  {name}: loop={row[f'{name}_loop_s']*1000:.2f}ms "
+              f"vectorized={row[f'{name}_vectorized_s']*1000:.3f}ms")
+    return row
+
+
+def run(ns, out_csv='tests/analytics_metrics.csv'):
+    rows = []
+    for N in ns:
+        print(f"Running N={N}")
+        rows.append(measure_for_N(N))
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    run(sizes)
@@ -0,0 +1,69 @@
+import csv
+import gc
+import os
+import random
+import sys
+import time
+from TrieNode import Trie, RadixTrie
+from PostingList import PostingList
+from collect_metrics import generate_products
+
+
+def build_insert(trie_cls, store_nodes, names):
+    # the loop bulk_load used to run: one insert per name
+    trie = trie_cls(store_skus_in_nodes=store_nodes, posting=PostingList)
+    for sku_id, name in enumerate(names):
+        trie.insert(name, sku_id)
+    return trie
+
+
+def build_sorted(trie_cls, store_nodes, names, processes=0):
+    trie = trie_cls(store_skus_in_nodes=store_nodes, posting=PostingList)
+    trie.build(names, range(len(names)), processes)
+    return trie
+
+
+def timed(fn, *args):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        trie = fn(*args)
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    nodes = trie.node_count()
+    del trie
+    return elapsed, nodes
+
+
+def run(sizes=(100000, 1000000), out_csv='tests/build_metrics.csv', max_char_trie=100000):
+    cores = os.cpu_count() or 1
+    process_counts = sorted({2, 4, cores} - {0, 1})
+    rows = []
+    for n in sizes:
+        random.seed(12345)
+        names = [p.name.lower() for p in generate_products(n)]
+        # a per-character trie of random names has ~19 nodes per name, so
+        # above `max_char_trie` only the radix trie is measured
+        engines = (Trie, RadixTrie) if n <= max_char_trie else (RadixTrie,)
+        for trie_cls in engines:
+            for store_nodes in (True, False):
+                cases = [('insert', 0, build_insert), ('sorted', 0, build_sorted)]
+                cases += [('sharded', procs, build_sorted) for procs in process_counts]
+                for mode, procs, fn in cases:
+                    args = (trie_cls, store_nodes, names) + ((procs,) if fn is build_sorted else ())
+                    elapsed, nodes = timed(fn, *args)
+                    rows.append({'N': n, 'engine': trie_cls.__name__, 'store_nodes': store_nodes, 'mode': mode,
+                                 'processes': procs, 'cores': cores, 'build_s': elapsed, 'nodes': nodes})
+                    print(f"{n:>9,} {trie_cls.__name__:9s} store_nodes={store_nodes!s:5} {mode:8s} "
+                          f"processes={procs}: {elapsed:.2f}s ({nodes:,} nodes)")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(tuple(int(a) for a in sys.argv[1:]) or (100000, 1000000))
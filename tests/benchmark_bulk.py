@@ -0,0 +1,98 @@
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from InventoryManager import InventoryManager
+from WriteAheadLog import WriteAheadLog
+from collect_metrics import generate_products
+
+# operation -> (per-call method, bulk method)
+OPERATIONS = {
+    'quantity': ('update_quantity', 'update_quantities'),
+    'name': ('update_product_name', 'update_product_names'),
+    'category': ('update_product_category', 'update_product_categories'),
+}
+
+
+def draw_changes(products, operation, count):
+    if operation == 'quantity':
+        return [(p.sku, random.randint(0, 1000)) for p in random.sample(products, count)]
+    if operation == 'name':
+        return [(p.sku, f"{p.name} {random.randint(1, 9)}") for p in random.sample(products, count)]
+    categories = sorted({p.category for p in products})
+    return [(p.sku, random.choice(categories)) for p in random.sample(products, count)]
+
+
+def warm_cache(mgr, prefixes):
+    for prefix in prefixes:
+        mgr.get_products_by_name_prefix(prefix)
+
+
+def measure(products, options, operation, changes, bulk, prefixes, wal_path=None):
+    """Seconds to apply `changes` with the per-call or the bulk method."""
+    if wal_path is not None:
+        # a fresh log per run; each per-call update is its own fsynced commit
+        if os.path.exists(wal_path):
+            os.remove(wal_path)
+        options = dict(options, wal=WriteAheadLog(wal_path, fsync="group", compact_every=None))
+    mgr = InventoryManager(**options)
+    # the manager updates Product objects in place: give each run its own
+    mgr.bulk_load([p.__class__(p.sku, p.name, p.price, p.quantity, p.category) for p in products])
+    warm_cache(mgr, prefixes)
+    single, batch = OPERATIONS[operation]
+    t0 = time.perf_counter()
+    if bulk:
+        getattr(mgr, batch)(changes)
+    else:
+        update = getattr(mgr, single)
+        for sku, value in changes:
+            update(sku, value)
+    return time.perf_counter() - t0
+
+
+def best_of(repeat, *args):
+    # each run gets a fresh manager; the fastest one is the least disturbed
+    return min(measure(*args) for _ in range(repeat))
+
+
+def run(n=100000, batch_sizes=(100, 1000, 10000, 50000), repeat=3, out_csv='tests/bulk_metrics.csv'):
+    random.seed(12345)
+    products = list(generate_products(n))
+    prefixes = sorted({p.name[:3].lower() for p in random.sample(products, 500)})
+    # config -> (manager options, batch sizes, write-ahead log)
+    configs = {
+        'node': ({'compress_trie': True, 'range_indexes': True}, batch_sizes, False),
+        'write_through': ({'compress_trie': True, 'range_indexes': True, 'cache_write_through': True},
+                          batch_sizes, False),
+        # one fsync per call: only the smaller batches
+        'wal': ({'compress_trie': True, 'range_indexes': True}, batch_sizes[:2], True),
+    }
+    directory = tempfile.mkdtemp(prefix="bulk-bench-")
+    rows = []
+    try:
+        for config, (options, sizes, wal) in configs.items():
+            wal_path = os.path.join(directory, "inventory.wal") if wal else None
+            for operation in OPERATIONS:
+                for size in sizes:
+                    changes = draw_changes(products, operation, size)
+                    loop_s = best_of(repeat, products, options, operation, changes, False, prefixes, wal_path)
+                    bulk_s = best_of(repeat, products, options, operation, changes, True, prefixes, wal_path)
+                    rows.append({'N': n, 'config': config, 'operation': operation, 'batch': size,
+                                 'loop_s': loop_s, 'bulk_s': bulk_s, 'speedup': loop_s / bulk_s,
+                                 'bulk_changes_per_s': size / bulk_s})
+                    print(f"{n:>8,} {config:13s} {operation:8s} x{size:>6,}: loop {loop_s * 1e3:8.1f}ms, "
+                          f"bulk {bulk_s * 1e3:8.1f}ms ({loop_s / bulk_s:.1f}x)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,93 @@
+import csv
+import os
+import random
+import sys
+import time
+from InventoryManager import InventoryManager
+from collect_metrics import generate_products
+
+
+def zipf_queries(names, count, s=1.1, pool_size=20000):
+    """`count` prefix queries drawn Zipf(s) from a pool of real name prefixes."""
+    rng = random.Random(7)
+    pool = list(dict.fromkeys(name[:rng.randint(2, 4)].lower() for name in rng.sample(names, pool_size)))
+    weights = [1 / rank ** s for rank in range(1, len(pool) + 1)]
+    return rng.choices(pool, weights, k=count)
+
+
+def measure(products, queries, budget, policy):
+    mgr = InventoryManager(compress_trie=True, store_skus_in_trie=False, cache_entries=budget, cache_policy=policy)
+    mgr.bulk_load(products)
+    t0 = time.perf_counter()
+    for prefix in queries:
+        mgr.get_products_by_name_prefix(prefix)
+    elapsed = time.perf_counter() - t0
+    stats = mgr.cache_stats()['prefix']
+    return len(queries) / elapsed, stats
+
+
+def measure_write_mix(products, queries, write_every, write_through):
+    """Zipf prefix queries with a rename after every `write_every` queries."""
+    mgr = InventoryManager(compress_trie=True, store_skus_in_trie=False, cache_write_through=write_through)
+    mgr.bulk_load(products)
+    rng = random.Random(11)
+    t0 = time.perf_counter()
+    for i, prefix in enumerate(queries):
+        mgr.get_products_by_name_prefix(prefix)
+        if i % write_every == 0:
+            product = rng.choice(products)
+            # rename onto a popular prefix, as a restock/import would touch hot names
+            mgr.update_product_name(product.sku, prefix + product.name)
+    elapsed = time.perf_counter() - t0
+    return len(queries) / elapsed, mgr.cache_stats()['prefix']
+
+
+def run_write_mix(n=100000, write_every=(100, 10, 2), query_count=20000,
+                  out_csv='tests/cache_write_metrics.csv'):
+    random.seed(12345)
+    products = list(generate_products(n))
+    queries = zipf_queries([p.name for p in products], query_count)
+    rows = []
+    for every in write_every:
+        for write_through in (False, True):
+            ops, stats = measure_write_mix(products, queries, every, write_through)
+            mode = 'write-through' if write_through else 'invalidate'
+            rows.append({'N': n, 'write_every': every, 'mode': mode, 'queries_per_s': ops,
+                         'hit_rate': stats['hit_rate'], 'invalidations': stats['invalidations'],
+                         'updates': stats['updates']})
+            print(f"{n:>8,} rename every {every:>3} queries, {mode:13s}: {ops:,.0f} queries/s, "
+                  f"hit rate {stats['hit_rate']:.1%}")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run(n=100000, budgets=(100, 1000, 10000, None), query_count=50000, out_csv='tests/cache_metrics.csv'):
+    random.seed(12345)
+    products = list(generate_products(n))
+    queries = zipf_queries([p.name for p in products], query_count)
+    rows = []
+    for budget in budgets:
+        for policy in ('lru', 'lfu'):
+            qps, stats = measure(products, queries, budget, policy)
+            rows.append({'N': n, 'policy': policy, 'max_entries': budget if budget is not None else 'unbounded',
+                         'queries_per_s': qps, 'hit_rate': stats['hit_rate'], 'evictions': stats['evictions'],
+                         'entries': stats['entries'], 'cache_kb': stats['bytes'] / 1024})
+            print(f"{n:>8,} {policy} max_entries={budget}: {qps:,.0f} queries/s, hit rate "
+                  f"{stats['hit_rate']:.1%}, {stats['entries']:,} entries, {stats['bytes'] / 1024:,.0f} KB")
+            if budget is None:
+                # the policy never evicts without a budget
+                break
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    run(n)
+    run_write_mix(n)
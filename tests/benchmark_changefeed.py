@@ -0,0 +1,61 @@
+import csv
+import os
+import random
+import sys
+import time
+from ChangeFeed import ChangeFeed
+from InventoryManager import InventoryManager
+from collect_metrics import generate_products
+
+
+def measure_writes(products, updates, feed):
+    """update_quantity calls per second, optionally appending to `feed`."""
+    mgr = InventoryManager(compress_trie=True, change_feed=feed)
+    mgr.bulk_load(products)
+    t0 = time.perf_counter()
+    for sku, quantity in updates:
+        mgr.update_quantity(sku, quantity)
+    return len(updates) / (time.perf_counter() - t0)
+
+
+def measure_consume(feed, batch, coalesce):
+    """Drain `feed` from its oldest event; return (events/s read, events delivered)."""
+    subscription = feed.subscribe(feed.oldest_seq)
+    delivered = 0
+    t0 = time.perf_counter()
+    while subscription.lag:
+        delivered += len(subscription.poll(batch, coalesce=coalesce))
+    elapsed = time.perf_counter() - t0
+    subscription.close()
+    return (feed.next_seq - feed.oldest_seq) / elapsed, delivered
+
+
+def run(n=100000, update_count=200000, hot_skus=(100, 10000), batch=1000,
+        out_csv='tests/changefeed_metrics.csv'):
+    random.seed(12345)
+    products = list(generate_products(n))
+    rows = []
+    for hot in hot_skus:
+        # updates concentrated on `hot` SKUs, as sale bursts are
+        skus = [p.sku for p in random.sample(products, hot)]
+        updates = [(random.choice(skus), random.randint(0, 500)) for _ in range(update_count)]
+        base = measure_writes(products, updates, None)
+        feed = ChangeFeed(capacity=update_count + 1)
+        with_feed = measure_writes(products, updates, feed)
+        for coalesce in (False, True):
+            read_rate, delivered = measure_consume(feed, batch, coalesce)
+            rows.append({'N': n, 'updates': update_count, 'hot_skus': hot, 'batch': batch, 'coalesce': coalesce,
+                         'writes_per_s': base, 'writes_per_s_feed': with_feed,
+                         'append_overhead_pct': (base / with_feed - 1) * 100,
+                         'events_read_per_s': read_rate, 'events_delivered': delivered})
+            print(f"{n:>8,} hot={hot:>6,}: writes {base:,.0f}/s -> {with_feed:,.0f}/s with feed, "
+                  f"coalesce={coalesce}: read {read_rate:,.0f} events/s, delivered {delivered:,}")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,80 @@
+import csv
+import os
+import random
+import string
+import sys
+import time
+from InventoryManager import InventoryManager
+from collect_metrics import generate_products
+
+
+def add_typo(word):
+    """Apply one random edit (substitute, delete, insert or swap) to `word`."""
+    if len(word) < 2:
+        return word
+    i = random.randrange(len(word) - 1)
+    op = random.choice(('sub', 'del', 'ins', 'swap'))
+    if op == 'sub':
+        return word[:i] + random.choice(string.ascii_lowercase) + word[i + 1:]
+    if op == 'del':
+        return word[:i] + word[i + 1:]
+    if op == 'ins':
+        return word[:i] + random.choice(string.ascii_lowercase) + word[i:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def measure_for_N(N, queries=200, prefix_len=6, limit=10, compress=True):
+    random.seed(12345)
+    mgr = InventoryManager(compress_trie=compress)
+    mgr.bulk_load(generate_products(N))
+    names = [p.name.lower() for p in random.sample(list(mgr.products.values()), queries)]
+    exact_prefixes = [n[:prefix_len] for n in names]
+    typo_prefixes = [add_typo(p) for p in exact_prefixes]
+
+    t0 = time.perf_counter()
+    for p in exact_prefixes:
+        mgr.get_products_by_name_prefix(p, limit=limit)
+        # the prefix cache would make repeated exact queries free
+        mgr._prefix_cache.clear()
+    t1 = time.perf_counter()
+
+    found = 0
+    t2 = time.perf_counter()
+    for p in typo_prefixes:
+        found += bool(mgr.get_products_by_fuzzy_prefix(p, max_distance=1, limit=limit))
+    t3 = time.perf_counter()
+
+    t4 = time.perf_counter()
+    for p in typo_prefixes:
+        mgr.get_products_by_fuzzy_prefix(p, max_distance=2, limit=limit)
+    t5 = time.perf_counter()
+
+    return {
+        'N': N,
+        'engine': 'radix' if compress else 'trie',
+        'exact_s': (t1 - t0) / queries,
+        'fuzzy_d1_s': (t3 - t2) / queries,
+        'fuzzy_d2_s': (t5 - t4) / queries,
+        'typo_recall_d1': found / queries,
+    }
+
+
+def run(ns, out_csv='tests/fuzzy_metrics.csv'):
+    fieldnames = ['N', 'engine', 'exact_s', 'fuzzy_d1_s', 'fuzzy_d2_s', 'typo_recall_d1']
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for N in ns:
+            print(f"Running N={N}")
+            row = measure_for_N(N)
+            print(f"  exact={row['exact_s']*1000:.3f}ms fuzzy(d=1)={row['fuzzy_d1_s']*1000:.3f}ms "
+                  f"fuzzy(d=2)={row['fuzzy_d2_s']*1000:.3f}ms recall(d=1)={row['typo_recall_d1']:.2f}")
+            writer.writerow(row)
+            f.flush()
+
+
+if __name__ == '__main__':
+    # default sizes from the request; pass smaller sizes on the command line to try it quickly
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    run(sizes)
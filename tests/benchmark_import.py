@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from CatalogImporter import FIELDS, import_catalog, iter_catalog
+from InventoryManager import InventoryManager
+from collect_metrics import generate_products
+
+
+def write_catalog(path, n):
+    """Write `n` random products without holding them in memory."""
+    random.seed(12345)
+    with open(path, 'w', newline='' if path.endswith('.csv') else None, encoding='utf-8') as f:
+        writer = csv.writer(f) if path.endswith('.csv') else None
+        if writer:
+            writer.writerow(FIELDS)
+        for p in generate_products(n):
+            row = (p.sku, p.name, p.price, p.quantity, p.category)
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+
+
+def load_materialized(path, processes):
+    # the pattern the importer replaces: parse everything, then bulk_load
+    mgr = InventoryManager(compress_trie=True, columnar=True)
+    mgr.bulk_load(list(iter_catalog(path, processes=processes)))
+    return mgr
+
+
+def load_streaming(path, processes):
+    mgr = InventoryManager(compress_trie=True, columnar=True)
+    import_catalog(mgr, path, processes=processes)
+    return mgr
+
+
+def measure(loader, path, processes):
+    t0 = time.perf_counter()
+    mgr = loader(path, processes)
+    elapsed = time.perf_counter() - t0
+    rows = len(mgr.products)
+    del mgr
+    # second run under tracemalloc (main process only) for peak memory
+    tracemalloc.start()
+    mgr = loader(path, processes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del mgr
+    return rows / elapsed, peak / 2 ** 20
+
+
+def check_failed_import(directory):
+    """An import that raises partway must leave the previous catalog queryable."""
+    good = os.path.join(directory, 'good.csv')
+    write_catalog(good, 1000)
+    bad = os.path.join(directory, 'bad.csv')
+    with open(bad, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([('sku', 'name', 'price'), ('X1', 'apple', '1.0')])
+    for columnar in (False, True):
+        mgr = InventoryManager(compress_trie=True, columnar=columnar)
+        import_catalog(mgr, good)
+        before = (len(mgr.products), mgr.get_categories(),
+                  [p.sku for p in mgr.get_products_by_name_prefix('a', limit=20)])
+        try:
+            import_catalog(mgr, bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("importing a CSV without quantity/category did not fail")
+        after = (len(mgr.products), mgr.get_categories(),
+                 [p.sku for p in mgr.get_products_by_name_prefix('a', limit=20)])
+        assert after == before, f"failed import changed the catalog (columnar={columnar})"
+    print("failed import leaves the previous catalog intact")
+
+
+def run(sizes=(10000, 100000, 300000), out_csv='tests/import_metrics.csv'):
+    directory = tempfile.mkdtemp(prefix='import-bench-')
+    processes = max(2, min(4, os.cpu_count() or 1))
+    rows = []
+    try:
+        check_failed_import(directory)
+        for n in sizes:
+            for fmt in ('csv', 'jsonl'):
+                path = os.path.join(directory, f'catalog-{n}.{fmt}')
+                write_catalog(path, n)
+                cases = [('materialized', load_materialized, 0), ('streaming', load_streaming, 0),
+                         ('streaming', load_streaming, processes)]
+                for mode, loader, procs in cases:
+                    rps, peak_mb = measure(loader, path, procs)
+                    rows.append({'rows': n, 'format': fmt, 'mode': mode, 'processes': procs,
+                                 'rows_per_s': rps, 'peak_mb': peak_mb,
+                                 'file_mb': os.path.getsize(path) / 2 ** 20})
+                    print(f"{n:>8,} {fmt:5s} {mode:12s} processes={procs}: {rps:,.0f} rows/s, "
+                          f"peak {peak_mb:.1f} MB")
+                os.remove(path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(tuple(int(a) for a in sys.argv[1:]) or (10000, 100000, 300000))
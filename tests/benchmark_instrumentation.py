@@ -0,0 +1,72 @@
+import csv
+import os
+import random
+import string
+import sys
+import time
+from Instrumentation import Metrics
+from InventoryManager import InventoryManager
+from POSSystem import POSSystem
+from collect_metrics import generate_products
+
+
+def per_call_ns(calls, repeats=5):
+    """Best-of-`repeats` mean nanoseconds per call for each `(fn, args_list)`.
+
+    The variants are timed in turn within every repeat, so warm-up and
+    machine noise do not favour one of them.
+    """
+    best = [float('inf')] * len(calls)
+    for _ in range(repeats):
+        for i, (fn, args_list) in enumerate(calls):
+            t0 = time.perf_counter_ns()
+            for args in args_list:
+                fn(*args)
+            best[i] = min(best[i], (time.perf_counter_ns() - t0) / len(args_list))
+    return best
+
+
+def workloads(products, count):
+    rng = random.Random(7)
+    skus = [rng.choice(products).sku for _ in range(count)]
+    prefixes = [''.join(rng.choices(string.ascii_lowercase, k=2)) for _ in range(count)]
+    return {
+        'get_product_by_sku': lambda m, pos: (m.get_product_by_sku, [(sku,) for sku in skus]),
+        # after the first pass every prefix is a cache hit
+        'get_products_by_name_prefix': lambda m, pos: (m.get_products_by_name_prefix,
+                                                       [(prefix, 10) for prefix in prefixes]),
+        'update_quantity': lambda m, pos: (m.update_quantity, [(sku, 50) for sku in skus]),
+        'process_transaction': lambda m, pos: (pos.process_transaction, [([(sku, 1)],) for sku in skus]),
+    }
+
+
+def run(n=100000, count=20000, out_csv='tests/instrumentation_metrics.csv'):
+    random.seed(12345)
+    products = list(generate_products(n))
+    for p in products:
+        p.quantity = 10 ** 9  # sales never run out during the repeats
+    modes = {}
+    for mode in ('none', 'disabled', 'enabled'):
+        metrics = None if mode == 'none' else Metrics(enabled=mode == 'enabled')
+        mgr = InventoryManager(compress_trie=True, metrics=metrics)
+        mgr.bulk_load(products)
+        modes[mode] = (mgr, POSSystem(mgr))
+    rows = []
+    for op, make in workloads(products, count).items():
+        timings = dict(zip(modes, per_call_ns([make(mgr, pos) for mgr, pos in modes.values()])))
+        rows.append({'N': n, 'operation': op, 'calls': count,
+                     'ns_per_call_none': timings['none'], 'ns_per_call_disabled': timings['disabled'],
+                     'ns_per_call_enabled': timings['enabled'],
+                     'disabled_overhead_pct': (timings['disabled'] / timings['none'] - 1) * 100,
+                     'enabled_overhead_pct': (timings['enabled'] / timings['none'] - 1) * 100})
+        print(f"{n:>8,} {op:28s}: none {timings['none']:,.0f} ns, disabled {timings['disabled']:,.0f} ns, "
+              f"enabled {timings['enabled']:,.0f} ns per call")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
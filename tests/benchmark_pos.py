@@ -0,0 +1,78 @@
+import contextlib
+import csv
+import os
+import random
+import sys
+import time
+from InventoryManager import InventoryManager
+from POSSystem import POSSystem
+from collect_metrics import generate_products
+
+
+def make_carts(skus, count, lines_per_cart):
+    return [[(random.choice(skus), random.randint(1, 3)) for _ in range(lines_per_cart)]
+            for _ in range(count)]
+
+
+def fresh_pos(N, indexed):
+    random.seed(12345)
+    mgr = InventoryManager(compress_trie=True, range_indexes=indexed, low_stock=indexed)
+    # plenty of stock so every sale succeeds and all runs do the same work
+    products = list(generate_products(N))
+    for p in products:
+        p.quantity = 10 ** 9
+    mgr.bulk_load(products)
+    return POSSystem(mgr), [p.sku for p in products]
+
+
+def measure_for_N(N, indexed, sales=50000, lines_per_cart=5):
+    label = 'indexed' if indexed else 'plain'
+    print(f"Running N={N} ({label})")
+    row = {'N': N, 'indexes': label}
+
+    pos, skus = fresh_pos(N, indexed)
+    carts = make_carts(skus, sales, 1)
+    t0 = time.perf_counter()
+    # process_sale prints a receipt line per call; send it to a real (null) file
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        for cart in carts:
+            sku, qty = cart[0]
+            pos.process_sale(sku, qty)
+    row['process_sale_per_s'] = sales / (time.perf_counter() - t0)
+
+    pos, skus = fresh_pos(N, indexed)
+    t0 = time.perf_counter()
+    for cart in carts:
+        pos.process_transaction(cart)
+    row['transaction_1_line_per_s'] = sales / (time.perf_counter() - t0)
+
+    pos, skus = fresh_pos(N, indexed)
+    multi = make_carts(skus, sales // lines_per_cart, lines_per_cart)
+    t0 = time.perf_counter()
+    results = pos.process_batch(multi)
+    elapsed = time.perf_counter() - t0
+    assert all(results)
+    # throughput counted in sale lines so it is comparable with process_sale
+    row[f'batch_{lines_per_cart}_line_per_s'] = len(multi) * lines_per_cart / elapsed
+
+    for key, value in row.items():
+        if key.endswith('_per_s'):
+            print(f"  {key}: {value:,.0f} sales/s")
+    return row
+
+
+def run(ns, out_csv='tests/pos_metrics.csv'):
+    rows = []
+    for N in ns:
+        for indexed in (False, True):
+            rows.append(measure_for_N(N, indexed))
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000]
+    run(sizes)
@@ -0,0 +1,88 @@
+import csv
+import os
+import random
+import string
+import sys
+import time
+from InventoryManager import InventoryManager
+from Product import Product
+from ShardedInventoryManager import ShardedInventoryManager
+from collect_metrics import generate_products
+
+
+def rate(fn, args_list):
+    t0 = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return len(args_list) / (time.perf_counter() - t0)
+
+
+def measure(mgr, products, queries):
+    t0 = time.perf_counter()
+    mgr.bulk_load(products)
+    load_s = time.perf_counter() - t0
+    rng = random.Random(7)
+    skus = [(rng.choice(products).sku,) for _ in range(queries)]
+    prefixes = [(''.join(rng.choices(string.ascii_lowercase, k=2)), 10) for _ in range(queries)]
+    return {'load_s': load_s,
+            'get_per_s': rate(mgr.get_product_by_sku, skus),
+            'prefix_per_s': rate(mgr.get_products_by_name_prefix, prefixes),
+            'category_per_s': rate(mgr.get_products_by_category, [('Books', 10)] * queries)}
+
+
+def check_failed_load():
+    """A load that fails in the input or on one shard must leave every shard as it was."""
+    def failing_input(products):
+        yield from products
+        raise ValueError("input failed")
+
+    original = [Product(f'SKU{i}', f'apple {i}', 1.0, i, 'Fruit') for i in range(20)]
+    replacement = [Product(f'NEW{i}', f'apricot {i}', 1.0, i, 'Fruit') for i in range(50)]
+    # a product whose name cannot be indexed fails only the shard that owns it
+    bad_shard = replacement[:49] + [Product('BAD', None, 1.0, 1, 'Fruit')]
+    with ShardedInventoryManager(shards=4, chunk_size=5, compress_trie=True) as mgr:
+        mgr.bulk_load(original)
+        before = (len(mgr), [p.sku for p in mgr.get_products_by_name_prefix('a')])
+        for products, error in ((failing_input(replacement), ValueError),
+                                (bad_shard, AttributeError)):
+            try:
+                mgr.bulk_load(products)
+            except error:
+                pass
+            else:
+                raise AssertionError("a failing sharded bulk_load did not raise")
+            after = (len(mgr), [p.sku for p in mgr.get_products_by_name_prefix('a')])
+            assert after == before, f"failed sharded load changed the catalog: {after[0]} products"
+        mgr.bulk_load(replacement)
+        assert len(mgr) == 50
+    print("failed sharded load leaves every shard intact")
+
+
+def run(n=200000, shard_counts=(1, 2, 4), queries=2000, out_csv='tests/sharding_metrics.csv'):
+    check_failed_load()
+    random.seed(12345)
+    products = list(generate_products(n))
+    cores = os.cpu_count() or 1
+    rows = []
+    # baseline: one in-process manager, no IPC
+    mgr = InventoryManager(compress_trie=True)
+    base = measure(mgr, products, queries)
+    rows.append({'N': n, 'mode': 'single', 'shards': 0, 'cores': cores, **base})
+    del mgr
+    for shards in shard_counts:
+        with ShardedInventoryManager(shards=shards, compress_trie=True) as mgr:
+            rows.append({'N': n, 'mode': 'sharded', 'shards': shards, 'cores': cores,
+                         **measure(mgr, products, queries)})
+    for row in rows:
+        print(f"{row['N']:>8,} {row['mode']:8s} shards={row['shards']}: load {row['load_s']:.2f}s, "
+              f"get {row['get_per_s']:,.0f}/s, prefix {row['prefix_per_s']:,.0f}/s, "
+              f"category {row['category_per_s']:,.0f}/s")
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,105 @@
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from InventoryManager import InventoryManager
+from Product import Product
+from WriteAheadLog import WriteAheadLog
+
+
+def catalog(n):
+    return [Product(f"SKU{i:07d}", f"product {i % 1000:03d} item {i:07d}", 1.0 + i % 500, i % 100, f"cat{i % 20}")
+            for i in range(n)]
+
+
+def manager(columnar):
+    return InventoryManager(compress_trie=True, columnar=columnar)
+
+
+def first_query(mgr):
+    t0 = time.perf_counter()
+    mgr.get_products_by_name_prefix("product 123", limit=10)
+    return time.perf_counter() - t0
+
+
+def measure(directory, n, columnar):
+    """Cold start from the WAL snapshot (bulk_load) vs the binary snapshot."""
+    products = catalog(n)
+    mgr = manager(columnar)
+    mgr.bulk_load(products)
+    binary = os.path.join(directory, "inventory.snap")
+    mgr.save_snapshot(binary)
+    wal_path = os.path.join(directory, "inventory.wal")
+    wal = WriteAheadLog(wal_path, fsync="none")
+    wal.write_snapshot(products)
+    wal.close()
+    del mgr, products
+
+    t0 = time.perf_counter()
+    wal = WriteAheadLog(wal_path, fsync="none")
+    replayed = manager(columnar)
+    replayed.bulk_load(wal.replay())
+    replay_s = time.perf_counter() - t0
+    replay_query = first_query(replayed)
+    wal.close()
+    del replayed
+
+    t0 = time.perf_counter()
+    mapped = manager(columnar)
+    mapped.load_snapshot(binary)
+    mapped_s = time.perf_counter() - t0
+    mapped_query = first_query(mapped)
+
+    row = {'products': n, 'columnar': columnar, 'log_snapshot_load_s': replay_s,
+           'log_first_query_ms': replay_query * 1000, 'binary_snapshot_load_s': mapped_s,
+           'binary_first_query_ms': mapped_query * 1000, 'binary_snapshot_mb': os.path.getsize(binary) / 2 ** 20,
+           'log_snapshot_mb': os.path.getsize(wal.snapshot_path) / 2 ** 20}
+    print(f"{n:>9,} products columnar={columnar!s:5}: replay+bulk_load {replay_s:.2f}s "
+          f"(first query {row['log_first_query_ms']:.2f}ms), mmap snapshot {mapped_s:.2f}s "
+          f"(first query {row['binary_first_query_ms']:.2f}ms), "
+          f"{row['binary_snapshot_mb']:.1f} MB vs {row['log_snapshot_mb']:.1f} MB")
+    return row
+
+
+def check_mutate_after_load(directory):
+    """Writes to a loaded snapshot's not-yet-decoded trie nodes must stick."""
+    path = os.path.join(directory, "mutate.snap")
+    for compress in (False, True):
+        for store_skus_in_trie in (False, True):
+            options = {'compress_trie': compress, 'store_skus_in_trie': store_skus_in_trie}
+            mgr = InventoryManager(**options)
+            mgr.bulk_load([Product("SKU1", "ab", 1.0, 1, "c"), Product("SKU2", "ac", 1.0, 1, "c")])
+            mgr.save_snapshot(path)
+            loaded = InventoryManager(**options)
+            loaded.load_snapshot(path)
+            # "a" ends at a node that so far was only an inner node on disk
+            loaded.add_product(Product("SKU3", "a", 1.0, 1, "c"))
+            loaded.add_product(Product("SKU4", "abc", 1.0, 1, "c"))
+            loaded.remove_product("SKU2")
+            found = sorted(p.sku for p in loaded.get_products_by_name_prefix("a"))
+            assert found == ["SKU1", "SKU3", "SKU4"], (options, found)
+            assert [p.sku for p in loaded.get_products_by_name_prefix("ab")] in (["SKU1", "SKU4"], ["SKU4", "SKU1"])
+    print("mutations after load_snapshot are kept")
+
+
+def run(sizes=(100000, 1000000), out_csv='tests/snapshot_metrics.csv'):
+    directory = tempfile.mkdtemp(prefix="snapshot-bench-")
+    rows = []
+    try:
+        check_mutate_after_load(directory)
+        for n in sizes:
+            for columnar in (False, True):
+                rows.append(measure(directory, n, columnar))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(tuple(int(a) for a in sys.argv[1:]) or (100000, 1000000))
@@ -0,0 +1,344 @@
+"""Steady-state benchmark suite for InventoryManager and POSSystem.
+
+    python tests/benchmark_suite.py --out tests/benchmark_suite.json
+    python tests/benchmark_suite.py --baseline tests/benchmark_baseline.json
+
+Every workload is a weighted mix of operations:
+
+    get        get_product_by_sku (Zipf-popular SKU)
+    prefix     get_products_by_name_prefix(prefix, limit=20) (Zipf-popular prefix)
+    category   get_products_by_category (full scan of one category)
+    rename     update_product_name (Zipf-popular SKU)
+    quantity   update_quantity (restock of a Zipf-popular SKU)
+    sale       process_transaction with one line
+    burst      process_transaction with a cart of 2-8 lines
+
+Each trial builds a fresh manager from the same seeded catalog, runs
+`--warmup` untimed operations and then `--ops` timed ones drawn from the
+same seeded stream, so every trial, and two runs of one build, replay
+identical work; trials go round-robin over the workloads. Each trial
+records per-operation latencies in a log-linear histogram (see
+`Instrumentation.LatencyHistogram`); `sale` and `burst` receipts go to
+/dev/null, so terminal output is not part of the timing.
+
+Identical trials still differ by up to ~1.5x on a busy machine, and the
+best of five by up to ~1.3x between runs, so no fixed tolerance alone
+tells a regression from noise. The JSON report has, per workload, the
+best trial throughput (ops/s) and per operation the best trial's
+p50/p90/p99/p99.9 (microseconds), with every trial's value and the
+percentiles of all trials pooled. With `--baseline` a tracked metric
+(`--track`, default throughput and p50) fails the run with exit status 1
+only when both hold:
+
+- its best trial is worse than the baseline's by more than `--tolerance`
+  (and, for latencies, by at least `--min-delta-us`), and
+- a one-sided Mann-Whitney U test of this run's trials against the
+  baseline's rejects "no slower" at `--alpha` (five trials a side can
+  reach p = 0.004).
+
+`--save-baseline` writes the report to the baseline path instead;
+`tests/benchmark_baseline.json` is the baseline of the default options.
+"""
+
+import argparse
+import bisect
+import contextlib
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from Instrumentation import LatencyHistogram
+from InventoryManager import InventoryManager
+from POSSystem import POSSystem
+from collect_metrics import generate_products
+
+WORKLOADS = {
+    "read_heavy": {"get": 50, "prefix": 35, "category": 2, "sale": 10, "rename": 1, "quantity": 2},
+    "write_heavy": {"get": 20, "prefix": 20, "sale": 30, "quantity": 20, "rename": 10},
+    "sale_burst": {"burst": 70, "sale": 10, "get": 15, "prefix": 5},
+    "category_scan": {"category": 20, "prefix": 40, "get": 40},
+    "rename_storm": {"rename": 40, "prefix": 50, "get": 10},
+}
+
+# higher is better for throughput, lower for latencies
+TRACKABLE = ("throughput", "p50", "p90", "p99", "p999")
+
+
+class Zipf:
+    """Seeded Zipf(s) sampler over `items` (the first item is the most popular)."""
+
+    def __init__(self, items, s: float, rng: random.Random):
+        self.items = items
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1 / rank ** s for rank in range(1, len(items) + 1)))
+
+    def __call__(self):
+        index = bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.items[min(index, len(self.items) - 1)]
+
+
+def parse_mix(text: str) -> dict:
+    """`"get=50,prefix=30,sale=20"` -> {"get": 50, "prefix": 30, "sale": 20}."""
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown operation {op!r}; use one of {', '.join(OPERATIONS)}")
+        mix[op] = float(weight)
+    return mix
+
+
+# Operation stream: each generator turns one draw into `(op, args)`; the
+# executors below run it. Drawing and running are separate so only the
+# inventory call is timed.
+
+def _draw_cart(ctx):
+    rng = ctx["rng"]
+    return [(ctx["sku"](), 1) for _ in range(rng.randint(2, 8))]
+
+
+def _draw_rename(ctx):
+    sku = ctx["sku"]()
+    # bounded names: a product alternates between a few spellings
+    return sku, f"{ctx['names'][sku]} {ctx['rng'].randint(1, 4)}"
+
+
+DRAWS = {
+    "get": lambda ctx: (ctx["sku"](),),
+    "prefix": lambda ctx: (ctx["prefix"](), 20),
+    "category": lambda ctx: (ctx["rng"].choice(ctx["categories"]),),
+    "rename": _draw_rename,
+    "quantity": lambda ctx: (ctx["sku"](), ctx["rng"].randint(500, 1000)),
+    "sale": lambda ctx: ([(ctx["sku"](), 1)],),
+    "burst": lambda ctx: (_draw_cart(ctx),),
+}
+
+OPERATIONS = {
+    "get": lambda mgr, pos: mgr.get_product_by_sku,
+    "prefix": lambda mgr, pos: mgr.get_products_by_name_prefix,
+    "category": lambda mgr, pos: mgr.get_products_by_category,
+    "rename": lambda mgr, pos: mgr.update_product_name,
+    "quantity": lambda mgr, pos: mgr.update_quantity,
+    "sale": lambda mgr, pos: pos.process_transaction,
+    "burst": lambda mgr, pos: pos.process_transaction,
+}
+
+
+def operation_stream(products, mix: dict, count: int, seed: int, zipf_s: float):
+    """`count` reproducible `(op, args)` pairs drawn from `mix`."""
+    rng = random.Random(seed)
+    skus = [p.sku for p in products]
+    rng.shuffle(skus)
+    prefixes = list(dict.fromkeys(p.name[:rng.randint(2, 4)].lower() for p in products))
+    rng.shuffle(prefixes)
+    ctx = {"rng": rng, "sku": Zipf(skus, zipf_s, rng), "prefix": Zipf(prefixes, zipf_s, rng),
+           "categories": sorted({p.category for p in products}), "names": {p.sku: p.name for p in products}}
+    ops = list(mix)
+    ops_drawn = rng.choices(ops, [mix[op] for op in ops], k=count)
+    return [(op, DRAWS[op](ctx)) for op in ops_drawn]
+
+
+def _merge(into: LatencyHistogram, histogram: LatencyHistogram):
+    into.counts = [a + b for a, b in zip(into.counts, histogram.counts)]
+    into.count += histogram.count
+    into.total += histogram.total
+    into.max = max(into.max, histogram.max)
+
+
+def _percentiles(histogram: LatencyHistogram) -> dict:
+    return {"p50": histogram.percentile(50) / 1e3, "p90": histogram.percentile(90) / 1e3,
+            "p99": histogram.percentile(99) / 1e3, "p999": histogram.percentile(99.9) / 1e3}
+
+
+def run_trial(products, stream, warmup: int, manager_options: dict, histograms: dict) -> dict:
+    # stock is topped up so sales are never rejected for running out
+    catalog = [p.__class__(p.sku, p.name, p.price, 10 ** 9, p.category) for p in products]
+    mgr = InventoryManager(**manager_options)
+    t0 = time.perf_counter()
+    mgr.bulk_load(catalog)
+    load_s = time.perf_counter() - t0
+    pos = POSSystem(mgr)
+    calls = {op: make(mgr, pos) for op, make in OPERATIONS.items()}
+    clock = time.perf_counter_ns
+    timed = stream[warmup:]
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for op, args in stream[:warmup]:
+            calls[op](*args)
+        gc.collect()
+        start = clock()
+        for op, args in timed:
+            t = clock()
+            calls[op](*args)
+            histograms[op].record(clock() - t)
+        elapsed = clock() - start
+    return {"load_s": load_s, "throughput": len(timed) / (elapsed / 1e9)}
+
+
+def run_workloads(products, workloads: dict, args, manager_options: dict) -> dict:
+    """Run `args.trials` trials of every workload and summarize each one."""
+    # every trial of a workload replays the same stream: a different draw per
+    # trial (say, which categories get scanned) would add work noise
+    streams = {name: operation_stream(products, mix, args.warmup + args.ops, args.seed, args.zipf)
+               for name, mix in workloads.items()}
+    pooled = {name: {op: LatencyHistogram() for op in mix} for name, mix in workloads.items()}
+    per_trial = {name: {op: {metric: [] for metric in TRACKABLE[1:]} for op in mix}
+                 for name, mix in workloads.items()}
+    trials = {name: [] for name in workloads}
+    # round-robin over the workloads, so a slow spell of the machine costs
+    # each workload one trial instead of all trials of one workload
+    for _ in range(args.trials):
+        for name, mix in workloads.items():
+            histograms = {op: LatencyHistogram() for op in mix}
+            trials[name].append(run_trial(products, streams[name], args.warmup, manager_options, histograms))
+            for op, h in histograms.items():
+                _merge(pooled[name][op], h)
+                if h.count:
+                    for metric, value in _percentiles(h).items():
+                        per_trial[name][op][metric].append(value)
+    return {name: {
+        "mix": mix,
+        "throughput": max(t["throughput"] for t in trials[name]),
+        "throughput_trials": [t["throughput"] for t in trials[name]],
+        "load_s": min(t["load_s"] for t in trials[name]),
+        "operations": {op: {"count": h.count, "mean_us": h.total / h.count / 1e3 if h.count else 0.0,
+                            **{metric: min(values, default=0.0)
+                               for metric, values in per_trial[name][op].items()},
+                            "trials": per_trial[name][op], "pooled": _percentiles(h), "max": h.max / 1e3}
+                       for op, h in pooled[name].items()},
+    } for name, mix in workloads.items()}
+
+
+def mann_whitney_p(worse, other) -> float:
+    """One-sided exact Mann-Whitney U p-value that `worse` tends to exceed `other`."""
+    m, n = len(worse), len(other)
+    u = sum(1.0 if a > b else 0.5 if a == b else 0.0 for a in worse for b in other)
+    # ways[i][j][k]: orderings of i values of `worse` and j of `other` with U == k
+    ways = [[[0] * (m * n + 1) for _ in range(n + 1)] for _ in range(m + 1)]
+    for i in range(m + 1):
+        for j in range(n + 1):
+            if i == 0 or j == 0:
+                ways[i][j][0] = 1
+                continue
+            for k in range(i * j + 1):
+                # the largest value belongs to `worse` (beats all j) or to `other`
+                ways[i][j][k] = (ways[i - 1][j][k - j] if k >= j else 0) + ways[i][j - 1][k]
+    total = sum(ways[m][n])
+    return sum(ways[m][n][k] for k in range(m * n + 1) if k >= u) / total
+
+
+def compare(report: dict, baseline: dict, tolerance: float, track, min_delta_us: float = 1.0,
+            alpha: float = 0.05) -> list[str]:
+    """Tracked metrics of `report` that regressed against `baseline`.
+
+    A regression is a best trial worse by more than `tolerance` whose trials
+    are also significantly worse (Mann-Whitney U at `alpha`); a baseline
+    without per-trial values is judged on the tolerance alone. A latency
+    must also be worse by at least `min_delta_us`: sub-microsecond
+    operations jitter by more than any sensible relative tolerance.
+    """
+    def significant(worse, other):
+        return not worse or not other or mann_whitney_p(worse, other) < alpha
+
+    regressions = []
+    for name, result in report["workloads"].items():
+        base = baseline["workloads"].get(name)
+        if base is None:
+            continue
+        if ("throughput" in track and result["throughput"] < base["throughput"] * (1 - tolerance)
+                and significant([-t for t in result["throughput_trials"]],
+                                [-t for t in base.get("throughput_trials", [])])):
+            regressions.append(f"{name}: throughput {result['throughput']:,.0f} ops/s "
+                               f"< baseline {base['throughput']:,.0f} ops/s")
+        for op, stats in result["operations"].items():
+            base_stats = base["operations"].get(op)
+            if base_stats is None:
+                continue
+            for metric in track:
+                if metric == "throughput":
+                    continue
+                if (stats[metric] > max(base_stats[metric] * (1 + tolerance), base_stats[metric] + min_delta_us)
+                        and significant(stats["trials"][metric], base_stats.get("trials", {}).get(metric, []))):
+                    regressions.append(f"{name}/{op}: {metric} {stats[metric]:.1f}us "
+                                       f"> baseline {base_stats[metric]:.1f}us")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload benchmark suite with regression gates")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--ops", type=int, default=20000, help="timed operations per trial")
+    parser.add_argument("--warmup", type=int, default=2000, help="untimed operations per trial")
+    parser.add_argument("--trials", type=int, default=5, help="fresh trials per workload; the best one counts")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of SKU/prefix popularity")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="comma-separated workload names")
+    parser.add_argument("--mix", action="append", default=[], metavar="NAME:OP=W,...",
+                        help="extra workload, e.g. custom:get=60,prefix=30,sale=10")
+    parser.add_argument("--compress-trie", action="store_true")
+    parser.add_argument("--subtree", action="store_true", help="store_skus_in_trie=False")
+    parser.add_argument("--cache-entries", type=int, default=None)
+    parser.add_argument("--out", default="tests/benchmark_suite.json")
+    parser.add_argument("--baseline", default=None, help="report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the report to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed relative regression of the best trial")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="significance level of the trial-vs-baseline Mann-Whitney U test")
+    parser.add_argument("--min-delta-us", type=float, default=1.0,
+                        help="latency increases below this are never a regression")
+    parser.add_argument("--track", default="throughput,p50", help=f"metrics to gate on ({', '.join(TRACKABLE)})")
+    args = parser.parse_args()
+
+    workloads = {name: WORKLOADS[name] for name in args.workloads.split(",") if name}
+    for spec in args.mix:
+        name, _, mix = spec.partition(":")
+        workloads[name] = parse_mix(mix)
+    track = args.track.split(",")
+    for metric in track:
+        if metric not in TRACKABLE:
+            parser.error(f"unknown metric {metric!r}; use one of {', '.join(TRACKABLE)}")
+    manager_options = {"compress_trie": args.compress_trie, "store_skus_in_trie": not args.subtree,
+                       "cache_entries": args.cache_entries}
+
+    random.seed(args.seed)
+    products = list(generate_products(args.products))
+    report = {
+        "meta": {"products": args.products, "ops": args.ops, "warmup": args.warmup, "trials": args.trials,
+                 "seed": args.seed, "zipf": args.zipf, "manager": manager_options,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "workloads": {},
+    }
+    report["workloads"] = run_workloads(products, workloads, args, manager_options)
+    for name, result in report["workloads"].items():
+        ops = ", ".join(f"{op} p50 {s['p50']:.1f}us p99 {s['p99']:.1f}us" for op, s in result["operations"].items())
+        print(f"{name:14s} {result['throughput']:>10,.0f} ops/s  ({ops})")
+
+    if args.save_baseline:
+        if args.baseline is None:
+            parser.error("--save-baseline needs --baseline")
+        args.out = args.baseline
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.baseline is not None and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["products"] != args.products or baseline["meta"]["manager"] != manager_options:
+            print("warning: baseline was recorded with a different catalog size or manager configuration")
+        regressions = compare(report, baseline, args.tolerance, track, args.min_delta_us, args.alpha)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regression beyond {args.tolerance:.0%} in {', '.join(track)}")
+
+
+if __name__ == "__main__":
+    main()
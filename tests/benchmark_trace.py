@@ -0,0 +1,64 @@
+import csv
+import os
+import random
+import sys
+import time
+from InventoryManager import InventoryManager
+from OperationTrace import TraceRecorder, read_trace, replay
+from POSSystem import POSSystem
+from benchmark_suite import OPERATIONS, WORKLOADS, operation_stream
+from collect_metrics import generate_products
+
+
+def record(products, stream, path):
+    """Run `stream` against a fresh manager, recording to `path` when given; return seconds."""
+    recorder = TraceRecorder(path) if path else None
+    mgr = InventoryManager(compress_trie=True, trace=recorder)
+    pos = POSSystem(mgr)
+    mgr.bulk_load(products)
+    calls = {op: make(mgr, pos) for op, make in OPERATIONS.items()}
+    t0 = time.perf_counter()
+    for op, args in stream:
+        calls[op](*args)
+    elapsed = time.perf_counter() - t0
+    if recorder is not None:
+        recorder.close()
+    return elapsed
+
+
+def run(n=100000, ops=20000, speeds=(None, 10.0, 1.0), trace_path='tests/benchmark.trace',
+        out_csv='tests/trace_metrics.csv'):
+    random.seed(12345)
+    products = [p.__class__(p.sku, p.name, p.price, 10 ** 9, p.category) for p in generate_products(n)]
+    stream = operation_stream(products, WORKLOADS['read_heavy'], ops, 7, 1.1)
+    plain_s = record(products, stream, None)
+    recorded_s = record(products, stream, trace_path)
+    size = os.path.getsize(trace_path)
+    records = read_trace(trace_path)
+    rows = []
+    for speed in speeds:
+        # replay the recorded bulk_load first, then time the operations alone
+        mgr = InventoryManager(compress_trie=True)
+        replay(records[:1], mgr)
+        report = replay(records[1:], mgr, speed=speed)
+        prefix = report['operations']['get_products_by_name_prefix']
+        rows.append({'N': n, 'ops': ops, 'speed': 'max' if speed is None else speed,
+                     'ops_per_s_plain': ops / plain_s, 'ops_per_s_recording': ops / recorded_s,
+                     'trace_bytes': size, 'replay_s': report['seconds'],
+                     'recorded_s': report['recorded_seconds'], 'replay_calls_per_s': report['throughput'],
+                     'late_calls': report['late_calls'], 'prefix_p50_us': prefix['p50_us'],
+                     'prefix_p99_us': prefix['p99_us']})
+        print(f"{n:>8,} speed={rows[-1]['speed']}: replayed {report['records']:,} calls in "
+              f"{report['seconds']:.2f}s (recorded over {report['recorded_seconds']:.2f}s), "
+              f"{report['throughput']:,.0f} calls/s, prefix p99 {prefix['p99_us']:.1f}us")
+    print(f"recording: {ops / plain_s:,.0f} -> {ops / recorded_s:,.0f} ops/s, trace {size / 1024:,.0f} KB")
+    os.remove(trace_path)
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
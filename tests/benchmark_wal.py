@@ -0,0 +1,131 @@
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from ConcurrentInventoryManager import ConcurrentInventoryManager
+from POSSystem import POSSystem
+from Product import Product
+from WriteAheadLog import WriteAheadLog
+
+
+def catalog(n):
+    return (Product(f"SKU{i:07d}", f"product {i:07d}", 1.0 + i % 500, 10 ** 9, f"cat{i % 20}")
+            for i in range(n))
+
+
+def run_sales(directory, policy, threads, carts_per_thread, batch, n_products, low_stock=False, readers=0):
+    """Sales/s and fsyncs for one fsync policy with `threads` registers.
+
+    With `low_stock` every quantity change takes the structure write lock and
+    the registers restock through `update_quantity` instead of selling;
+    `readers` threads run prefix queries until the registers finish.
+    """
+    wal = WriteAheadLog(os.path.join(directory, f"{policy}-{threads}-{batch}-{low_stock}.wal"), fsync=policy,
+                        compact_every=None)
+    mgr = ConcurrentInventoryManager(compress_trie=True, wal=wal, low_stock=low_stock)
+    mgr.bulk_load(catalog(n_products))
+    pos = POSSystem(mgr)
+    skus = list(mgr.products)
+    start_fsyncs = wal.fsync_count
+
+    def register(seed):
+        rng = random.Random(seed)
+        carts = [[(rng.choice(skus), 1)] for _ in range(carts_per_thread)]
+        if low_stock:
+            for [(sku, _)] in carts:
+                mgr.update_quantity(sku, rng.randrange(1000))
+        elif batch > 1:
+            for i in range(0, len(carts), batch):
+                pos.process_batch(carts[i:i + batch])
+        else:
+            for cart in carts:
+                pos.process_transaction(cart)
+
+    done = threading.Event()
+    reads = [0] * readers
+
+    def reader(slot):
+        rng = random.Random(-slot)
+        while not done.is_set():
+            mgr.get_products_by_name_prefix(f"product {rng.randrange(10000):04d}", limit=10)
+            reads[slot] += 1
+            time.sleep(0)  # a client between requests, not a GIL-bound spin
+
+    workers = [threading.Thread(target=register, args=(t,)) for t in range(threads)]
+    querying = [threading.Thread(target=reader, args=(r,)) for r in range(readers)]
+    t0 = time.perf_counter()
+    for w in workers + querying:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    for q in querying:
+        q.join()
+    fsyncs = wal.fsync_count - start_fsyncs
+    wal.close()
+    sales = threads * carts_per_thread
+    return {'policy': policy, 'threads': threads, 'batch': batch, 'low_stock': low_stock, 'readers': readers,
+            'sales_per_s': sales / elapsed, 'fsyncs': fsyncs, 'sales_per_fsync': sales / max(fsyncs, 1),
+            'reads_per_s': sum(reads) / elapsed}
+
+
+def measure_replay(directory, n_products, updates):
+    """Startup time from a long log, before and after compaction."""
+    path = os.path.join(directory, "replay.wal")
+    wal = WriteAheadLog(path, fsync="none", compact_every=None)
+    mgr = ConcurrentInventoryManager(compress_trie=True, wal=wal)
+    mgr.bulk_load(catalog(n_products))
+    skus = list(mgr.products)
+    rng = random.Random(1)
+    for _ in range(updates):
+        mgr.update_quantity(rng.choice(skus), rng.randint(0, 1000))
+    wal.close()
+
+    t0 = time.perf_counter()
+    wal = WriteAheadLog(path, fsync="none", compact_every=None)
+    ConcurrentInventoryManager(compress_trie=True, wal=wal)
+    long_log = time.perf_counter() - t0
+    wal.compact()
+    wal.close()
+
+    t1 = time.perf_counter()
+    wal = WriteAheadLog(path, fsync="none", compact_every=None)
+    ConcurrentInventoryManager(compress_trie=True, wal=wal)
+    compacted = time.perf_counter() - t1
+    wal.close()
+    print(f"Replay {n_products} products + {updates} log records: {long_log:.3f}s; "
+          f"after compaction: {compacted:.3f}s")
+
+
+def run(n_products=20000, carts_per_thread=2000, out_csv='tests/wal_metrics.csv'):
+    directory = tempfile.mkdtemp(prefix="wal-bench-")
+    rows = []
+    try:
+        cases = [('always', 1, 1), ('always', 8, 1), ('group', 1, 1), ('group', 8, 1),
+                 ('group', 1, 100), ('interval', 8, 1), ('none', 8, 1)]
+        # quantity-indexed updates take the write lock; their fsync must not
+        # happen under it, or the reader and the group commit stall
+        cases += [('always', 8, 1, True, 1), ('group', 8, 1, True, 1), ('none', 8, 1, True, 1)]
+        for policy, threads, batch, *extra in cases:
+            row = run_sales(directory, policy, threads, carts_per_thread, batch, n_products, *extra)
+            rows.append(row)
+            print(f"fsync={policy:8s} threads={threads} batch={batch:3d} low_stock={row['low_stock']!s:5s}: "
+                  f"{row['sales_per_s']:,.0f} sales/s, {row['fsyncs']} fsyncs "
+                  f"({row['sales_per_fsync']:.1f} sales per fsync), {row['reads_per_s']:,.0f} reads/s")
+        measure_replay(directory, n_products, 200000)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
+    with open(out_csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    run(*(int(a) for a in sys.argv[1:2]))
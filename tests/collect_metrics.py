@@ -26,19 +26,23 @@ def generate_products(n):
         yield Product(sku, name, price, qty, category)
 
 
-def measure_for_N(N, store_nodes):
+def measure_for_N(N, store_nodes, compress=False, columnar=False):
     random.seed(12345)
-    mgr = InventoryManager(store_skus_in_trie=store_nodes)
-    # generate products
-    products = list(generate_products(N))
+    mgr = InventoryManager(store_skus_in_trie=store_nodes, compress_trie=compress, columnar=columnar)
 
+    # trace from before product creation so retained memory includes the
+    # product records themselves, not only the indexes
     tracemalloc.start()
+    # generate products
+    products = list(generate_products(N))
     t0 = time.perf_counter()
     mgr.bulk_load(products)
     t1 = time.perf_counter()
-    current, peak = tracemalloc.get_traced_memory()
     # do a prefix search for a likely common prefix: take first char of first product
     prefix = products[0].name[0]
+    # drop the input list: what remains is what the inventory retains
+    del products
+    current, peak = tracemalloc.get_traced_memory()
     # cold lookup
     t2 = time.perf_counter()
     res = mgr.get_products_by_name_prefix(prefix, limit=50)
@@ -52,9 +56,13 @@ def measure_for_N(N, store_nodes):
     return {
         'N': N,
         'mode': 'node' if store_nodes else 'subtree',
+        'engine': 'radix' if compress else 'trie',
+        'storage': 'columnar' if columnar else 'objects',
+        'trie_nodes': mgr.search_trie.node_count(),
         'build_time_s': t1 - t0,
         'mem_current_mb': current / 1024 / 1024,
         'mem_peak_mb': peak / 1024 / 1024,
+        'bytes_per_product': current / N,
         'cold_lookup_s': t3 - t2,
         'hot_lookup_s': t5 - t4,
         'found': len(res)
@@ -62,21 +70,25 @@ def measure_for_N(N, store_nodes):
 
 
 def run(ns, out_csv='tests/metrics.csv'):
-    fieldnames = ['N','mode','build_time_s','mem_current_mb','mem_peak_mb','cold_lookup_s','hot_lookup_s','found']
+    fieldnames = ['N','mode','engine','storage','trie_nodes','build_time_s','mem_current_mb','mem_peak_mb','bytes_per_product','cold_lookup_s','hot_lookup_s','found']
     os.makedirs(os.path.dirname(out_csv), exist_ok=True)
     with open(out_csv, 'w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         for N in ns:
-            for mode in (True, False):
-                print(f"Running N={N} mode={'node' if mode else 'subtree'}")
-                try:
-                    row = measure_for_N(N, mode)
-                except MemoryError:
-                    print(f"MemoryError for N={N} mode={mode}")
-                    continue
-                writer.writerow(row)
-                f.flush()
+            for compress in (False, True):
+                for mode in (True, False):
+                    for columnar in (False, True):
+                        engine = 'radix' if compress else 'trie'
+                        storage = 'columnar' if columnar else 'objects'
+                        print(f"Running N={N} mode={'node' if mode else 'subtree'} engine={engine} storage={storage}")
+                        try:
+                            row = measure_for_N(N, mode, compress, columnar)
+                        except MemoryError:
+                            print(f"MemoryError for N={N} mode={mode} engine={engine} storage={storage}")
+                            continue
+                        writer.writerow(row)
+                        f.flush()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_request(rng, n_products):
+    """Storefront-like mix: mostly searches and lookups, some register sales."""
+    sku = f"SKU{rng.randrange(n_products):07d}"
+    r = rng.random()
+    if r < 0.5:
+        return {"op": "prefix", "prefix": f"product {rng.randrange(1000):03d}", "limit": 10}
+    if r < 0.7:
+        return {"op": "get", "sku": sku}
+    if r < 0.9:
+        return {"op": "sale", "sku": sku, "quantity": 1}
+    if r < 0.95:
+        return {"op": "return", "sku": sku, "quantity": 1}
+    return {"op": "price_range", "min": 100, "max": 110, "limit": 10}
+
+
+async def connection(host, port, n_requests, depth, n_products, seed, latencies):
+    """One client connection keeping up to `depth` requests in flight."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    sent_at = {}
+    next_id = 0
+
+    def send(count):
+        nonlocal next_id
+        burst = []
+        for _ in range(count):
+            req = make_request(rng, n_products)
+            req["id"] = next_id
+            sent_at[next_id] = time.perf_counter()
+            next_id += 1
+            burst.append(json.dumps(req).encode() + b"\n")
+        writer.write(b"".join(burst))
+
+    send(min(depth, n_requests))
+    received = 0
+    while received < n_requests:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response = json.loads(line)
+        latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+        received += 1
+        # refill the pipeline to keep `depth` requests outstanding
+        if next_id < n_requests:
+            send(1)
+            await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+async def run_load(host, port, connections, requests_per_connection, depth, n_products):
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(connection(host, port, requests_per_connection, depth, n_products, c, latencies)
+                           for c in range(connections)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "connections": connections,
+        "depth": depth,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def spawn_server(port, n_products):
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "InventoryServer.py"),
+                             "--port", str(port), "--products", str(n_products)],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    # the server prints one line once it is listening
+    print(proc.stdout.readline().strip())
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for InventoryServer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000, help="requests per connection")
+    parser.add_argument("--depths", default="1,16", help="pipeline depths to compare")
+    parser.add_argument("--no-spawn", action="store_true", help="use an already running server")
+    args = parser.parse_args()
+
+    proc = None if args.no_spawn else spawn_server(args.port, args.products)
+    try:
+        for depth in (int(d) for d in args.depths.split(",")):
+            stats = asyncio.run(run_load(args.host, args.port, args.connections, args.requests,
+                                         depth, args.products))
+            print(f"connections={stats['connections']} depth={depth}: {stats['rps']:,.0f} req/s "
+                  f"p50={stats['p50_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,33 +10,33 @@ def read_csv(path='tests/metrics.csv'):
     with open(path, newline='') as f:
         reader = csv.DictReader(f)
         for r in reader:
-            rows.append({k: (float(v) if k not in ('mode','N') else (v if k=='mode' else int(v))) for k,v in r.items()})
+            row = {k: (float(v) if k not in ('mode','engine','storage','N') else (int(v) if k=='N' else v)) for k,v in r.items()}
+            # older CSVs predate the engine/storage columns
+            row.setdefault('engine', 'trie')
+            row.setdefault('storage', 'objects')
+            rows.append(row)
     return rows
 
 
 def plot(rows, out_dir='docs'):
     os.makedirs(out_dir, exist_ok=True)
-    # organize by mode
-    modes = {'node': [], 'subtree': []}
+    # organize by (engine, mode, storage)
+    series = {}
     for r in rows:
-        modes[r['mode']].append(r)
-    for m in modes:
-        modes[m].sort(key=lambda x: x['N'])
+        series.setdefault((r['engine'], r['mode'], r['storage']), []).append(r)
+    for key in series:
+        series[key].sort(key=lambda x: x['N'])
+    labels = {'node': 'node-stored', 'subtree': 'subtree'}
 
-    Ns_node = [r['N'] for r in modes['node']]
-    build_node = [r['build_time_s'] for r in modes['node']]
-    mem_node = [r['mem_peak_mb'] for r in modes['node']]
-    cold_node = [r['cold_lookup_s'] for r in modes['node']]
-
-    Ns_sub = [r['N'] for r in modes['subtree']]
-    build_sub = [r['build_time_s'] for r in modes['subtree']]
-    mem_sub = [r['mem_peak_mb'] for r in modes['subtree']]
-    cold_sub = [r['cold_lookup_s'] for r in modes['subtree']]
+    def plot_metric(metric):
+        for (engine, mode, storage), rs in sorted(series.items()):
+            extras = [x for x in (engine, storage) if x not in ('trie', 'objects')]
+            label = labels[mode] + (f" ({', '.join(extras)})" if extras else '')
+            plt.plot([r['N'] for r in rs], [r[metric] for r in rs], marker='o', label=label)
 
     # Build time
     plt.figure()
-    plt.plot(Ns_node, build_node, marker='o', label='node-stored')
-    plt.plot(Ns_sub, build_sub, marker='o', label='subtree')
+    plot_metric('build_time_s')
     plt.xlabel('N (number of products)')
     plt.ylabel('Build time (s)')
     plt.title('Build time vs N')
@@ -47,8 +47,7 @@ def plot(rows, out_dir='docs'):
 
     # Memory
     plt.figure()
-    plt.plot(Ns_node, mem_node, marker='o', label='node-stored')
-    plt.plot(Ns_sub, mem_sub, marker='o', label='subtree')
+    plot_metric('mem_peak_mb')
     plt.xlabel('N (number of products)')
     plt.ylabel('Peak memory (MB)')
     plt.title('Peak memory vs N')
@@ -59,8 +58,7 @@ def plot(rows, out_dir='docs'):
 
     # Cold lookup
     plt.figure()
-    plt.plot(Ns_node, cold_node, marker='o', label='node-stored')
-    plt.plot(Ns_sub, cold_sub, marker='o', label='subtree')
+    plot_metric('cold_lookup_s')
     plt.xlabel('N (number of products)')
     plt.ylabel('Cold prefix lookup time (s)')
     plt.title('Cold prefix lookup time vs N')
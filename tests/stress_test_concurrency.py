@@ -0,0 +1,103 @@
+import random
+import sys
+import threading
+import time
+from ConcurrentInventoryManager import ConcurrentInventoryManager
+from InventoryManager import InventoryManager
+from POSSystem import POSSystem
+from Product import Product
+
+
+def build(manager_cls, n_skus, stock, **kwargs):
+    mgr = manager_cls(compress_trie=True, **kwargs)
+    mgr.bulk_load(Product(f"SKU{i:05d}", f"item {i:05d}", 9.99, stock, f"cat{i % 7}")
+                  for i in range(n_skus))
+    return mgr
+
+
+def register(pos, skus, attempts, sold, seed):
+    """One register thread: random 1-3 line carts; records what it sold."""
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        cart = [(rng.choice(skus), rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+        result = pos.process_transaction(cart)
+        if result:
+            for line in result.lines:
+                sold[line.sku] = sold.get(line.sku, 0) + line.quantity
+
+
+def browser(mgr, stop):
+    """Concurrent reader and renamer so the trie and caches see traffic too."""
+    rng = random.Random(7)
+    while not stop.is_set():
+        mgr.get_products_by_name_prefix(f"item {rng.randint(0, 9)}", limit=20)
+        mgr.get_products_by_category(f"cat{rng.randint(0, 6)}")
+        sku = f"SKU{rng.randint(0, 99):05d}"
+        mgr.update_product_name(sku, f"item {rng.randint(0, 99999):05d}")
+
+
+def check_overselling(manager_cls, threads=8, n_skus=100, stock=300, attempts=4000, **kwargs):
+    mgr = build(manager_cls, n_skus, stock, **kwargs)
+    pos = POSSystem(mgr)
+    skus = [f"SKU{i:05d}" for i in range(n_skus)]
+    sold_per_thread = [{} for _ in range(threads)]
+    stop = threading.Event()
+    reader = threading.Thread(target=browser, args=(mgr, stop))
+    workers = [threading.Thread(target=register, args=(pos, skus, attempts, sold_per_thread[t], t))
+               for t in range(threads)]
+    reader.start()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    stop.set()
+    reader.join()
+
+    oversold = 0
+    for sku in skus:
+        sold = sum(s.get(sku, 0) for s in sold_per_thread)
+        remaining = mgr.get_product_by_sku(sku).quantity
+        # every unit reported sold must have left the shelf exactly once
+        if sold + remaining != stock or remaining < 0:
+            oversold += 1
+    return oversold
+
+
+def measure_throughput(thread_counts=(1, 2, 4, 8), sales_per_thread=20000, n_skus=10000, disjoint=True):
+    mode = 'disjoint SKUs' if disjoint else 'shared hot SKUs'
+    print(f"\n=== Throughput ({mode}) ===")
+    for threads in thread_counts:
+        mgr = build(ConcurrentInventoryManager, n_skus, 10 ** 9)
+        pos = POSSystem(mgr)
+        skus = [f"SKU{i:05d}" for i in range(n_skus)]
+        if disjoint:
+            # each register sells its own slice of the catalog
+            slices = [skus[t::threads] for t in range(threads)]
+        else:
+            slices = [skus[:16]] * threads
+        workers = [threading.Thread(target=register, args=(pos, slices[t], sales_per_thread, {}, t))
+                   for t in range(threads)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - t0
+        print(f"threads={threads}: {threads * sales_per_thread / elapsed:,.0f} carts/s")
+
+
+if __name__ == '__main__':
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    # switch threads as often as possible to provoke check-then-act races
+    sys.setswitchinterval(1e-6)
+    print("\n=== Overselling check (8 registers, 100 SKUs) ===")
+    print(f"InventoryManager (no locking): {check_overselling(InventoryManager)} SKUs with lost or oversold units")
+    bad = check_overselling(ConcurrentInventoryManager)
+    print(f"ConcurrentInventoryManager: {bad} SKUs with lost or oversold units")
+    bad += check_overselling(ConcurrentInventoryManager, range_indexes=True, low_stock=True)
+    assert bad == 0, "ConcurrentInventoryManager oversold stock"
+    sys.setswitchinterval(0.005)
+    measure_throughput(disjoint=True)
+    measure_throughput(disjoint=False)
+    print('\nConcurrency stress test completed.\n')
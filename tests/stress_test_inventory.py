@@ -1,8 +1,11 @@
+import contextlib
+import io
 import random
 import string
 import time
 import tracemalloc
 from InventoryManager import InventoryManager
+from POSSystem import POSSystem
 from Product import Product
 
 
@@ -24,17 +27,19 @@ def generate_products(n):
         yield Product(sku, name, price, qty, category)
 
 
-def measure(build_mode_store_nodes: bool, n=20000, prefix='A'):
-    print(f"\n=== Mode store_nodes={build_mode_store_nodes} N={n} ===")
+def measure(build_mode_store_nodes: bool, n=20000, prefix='A', compress=False):
+    engine = 'radix' if compress else 'trie'
+    print(f"\n=== Mode store_nodes={build_mode_store_nodes} engine={engine} N={n} ===")
     tracemalloc.start()
     t0 = time.perf_counter()
-    mgr = InventoryManager(store_skus_in_trie=build_mode_store_nodes)
+    mgr = InventoryManager(store_skus_in_trie=build_mode_store_nodes, compress_trie=compress)
     # bulk load for faster construction
     products = list(generate_products(n))
     mgr.bulk_load(products)
     t1 = time.perf_counter()
     current, peak = tracemalloc.get_traced_memory()
     print(f"Build time: {t1 - t0:.3f}s, current_mem={current/1024/1024:.2f}MB peak={peak/1024/1024:.2f}MB")
+    print(f"Trie nodes: {mgr.search_trie.node_count()}")
 
     # measure prefix search cold
     t2 = time.perf_counter()
@@ -51,10 +56,128 @@ def measure(build_mode_store_nodes: bool, n=20000, prefix='A'):
     tracemalloc.stop()
 
 
+def measure_ranked(n=20000, prefix='a', k=10, compress=True):
+    engine = 'radix' if compress else 'trie'
+    print(f"\n=== Ranked top-{k} autocomplete engine={engine} N={n} ===")
+    mgr = InventoryManager(compress_trie=compress, rank_topk=k)
+    t0 = time.perf_counter()
+    mgr.bulk_load(list(generate_products(n)))
+    t1 = time.perf_counter()
+    print(f"Build time (with top-k lists): {t1 - t0:.3f}s")
+
+    t2 = time.perf_counter()
+    res = mgr.get_products_by_name_prefix(prefix, limit=k, ranked=True)
+    t3 = time.perf_counter()
+    print(f"Ranked prefix search (top-k) time: {t3 - t2:.6f}s, found={len(res)}")
+
+    t4 = time.perf_counter()
+    res2 = mgr.get_products_by_name_prefix(prefix, limit=k + 1, ranked=True)
+    t5 = time.perf_counter()
+    print(f"Ranked prefix search (full sort) time: {t5 - t4:.6f}s, found={len(res2)}")
+
+    # a sale on the best-ranked product forces top-k refills along its path
+    t6 = time.perf_counter()
+    mgr.update_quantity(res[0].sku, 0)
+    t7 = time.perf_counter()
+    print(f"Quantity update with top-k maintenance: {t7 - t6:.6f}s")
+
+
+def measure_tokens(n=20000, compress=True):
+    engine = 'radix' if compress else 'trie'
+    print(f"\n=== Token index engine={engine} N={n} ===")
+    mgr = InventoryManager(compress_trie=compress, index_tokens=True)
+    products = list(generate_products(n))
+    t0 = time.perf_counter()
+    mgr.bulk_load(products)
+    t1 = time.perf_counter()
+    print(f"Build time (with token index): {t1 - t0:.3f}s")
+
+    # simulate typing the first two words of a name, one keystroke at a time
+    words = products[0].name.lower().split()[:2]
+    query = ' '.join(words)
+    t2 = time.perf_counter()
+    for i in range(1, len(query) + 1):
+        res = mgr.get_products_by_tokens(query[:i], limit=10)
+    t3 = time.perf_counter()
+    print(f"Token search per keystroke: {(t3 - t2) / len(query):.6f}s, found={len(res)}")
+
+
+def measure_ranges(n=20000, churn=5000):
+    print(f"\n=== Price/quantity range indexes N={n} ===")
+    mgr = InventoryManager(compress_trie=True, range_indexes=True)
+    products = list(generate_products(n))
+    t0 = time.perf_counter()
+    mgr.bulk_load(products)
+    t1 = time.perf_counter()
+    print(f"Build time (with range indexes): {t1 - t0:.3f}s")
+
+    t2 = time.perf_counter()
+    res = mgr.get_products_by_price_range(100, 300, limit=50)
+    t3 = time.perf_counter()
+    print(f"Price range 100-300 (limit 50): {t3 - t2:.6f}s, found={len(res)}")
+
+    # constant stock churn keeps the quantity index current
+    skus = [p.sku for p in products]
+    t4 = time.perf_counter()
+    for _ in range(churn):
+        mgr.update_quantity(random.choice(skus), random.randint(0, 1000))
+    t5 = time.perf_counter()
+    print(f"Quantity update with index maintenance: {(t5 - t4) / churn:.6f}s per update")
+
+    t6 = time.perf_counter()
+    res = mgr.get_products_by_quantity_range(max_quantity=5)
+    t7 = time.perf_counter()
+    print(f"Reorder report (quantity <= 5): {t7 - t6:.6f}s, found={len(res)}")
+
+
+def measure_low_stock(n=20000, sales=20000, k=10):
+    print(f"\n=== Low-stock tracker N={n} ===")
+    mgr = InventoryManager(compress_trie=True, low_stock=True, reorder_point=20)
+    products = list(generate_products(n))
+    mgr.bulk_load(products)
+    alerts = []
+    mgr.low_stock.subscribe(lambda sku, qty, rp, below: alerts.append(sku) if below else None)
+    pos = POSSystem(mgr)
+
+    skus = [p.sku for p in products]
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(sales):
+            pos.process_sale(random.choice(skus), random.randint(1, 5))
+    t1 = time.perf_counter()
+    print(f"POS sale with low-stock tracking: {(t1 - t0) / sales:.6f}s per sale, alerts={len(alerts)}")
+
+    t2 = time.perf_counter()
+    critical = mgr.get_most_critical_products(k)
+    t3 = time.perf_counter()
+    print(f"Top-{k} most critical: {t3 - t2:.6f}s, worst={critical[0].sku} qty={critical[0].quantity}")
+
+    t4 = time.perf_counter()
+    sorted(mgr.products.values(), key=lambda p: p.quantity - 20)[:k]
+    t5 = time.perf_counter()
+    print(f"Full-scan equivalent: {t5 - t4:.6f}s")
+
+    # a product added already under its reorder point alerts like a sale would
+    alerts.clear()
+    mgr.add_product(Product("LOWSTOCK-NEW", "Arrives low", 1.0, 3, "Misc"))
+    assert alerts == ["LOWSTOCK-NEW"], alerts
+    # a removed SKU takes its reorder-point override with it
+    mgr.set_reorder_point("LOWSTOCK-NEW", 100)
+    mgr.remove_product("LOWSTOCK-NEW")
+    assert mgr.low_stock.reorder_point("LOWSTOCK-NEW") == 20
+
+
 if __name__ == '__main__':
     random.seed(12345)
     # choose prefix as first letter of some generated name; using 'A' may match few
     # run for two modes for comparison
     measure(True, n=20000, prefix='A')
     measure(False, n=20000, prefix='A')
+    # path-compressed radix trie for comparison
+    measure(True, n=20000, prefix='A', compress=True)
+    measure(False, n=20000, prefix='A', compress=True)
+    measure_ranked(n=20000, prefix='a')
+    measure_tokens(n=20000)
+    measure_ranges(n=20000)
+    measure_low_stock(n=20000)
     print('\nStress test completed. Adjust N to scale higher.\n')